@@ -0,0 +1,78 @@
+import importlib.util
+import json
+from typing import Any, Callable
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from app.models.vacancy import Vacancy
+
+# orjson — необязательная зависимость: без неё тот же интерфейс поверх json
+HAS_ORJSON = importlib.util.find_spec("orjson") is not None
+
+if HAS_ORJSON:
+    import orjson
+
+# схемы, которые валидируются/сериализуются на каждом запросе: TypeAdapter
+# строит валидатор и сериализатор (pydantic-core) один раз при импорте
+VACANCY_ADAPTER = TypeAdapter(Vacancy)
+VACANCY_LIST_ADAPTER = TypeAdapter(list[Vacancy])
+STR_DICT_ADAPTER = TypeAdapter(dict[str, str])
+
+
+def _default(obj: Any) -> Any:
+    # то, что orjson/json не умеют сами: модели pydantic, множества и т.п.
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    return jsonable_encoder(obj)
+
+
+def dumps(obj: Any) -> bytes:
+    """JSON в UTF-8 без экранирования кириллицы; модель pydantic сериализует её собственный сериализатор."""
+    if isinstance(obj, BaseModel):
+        return obj.__pydantic_serializer__.to_json(obj)
+    if HAS_ORJSON:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes | bytearray | memoryview | str) -> Any:
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse через dumps(): orjson, если установлен. Возвращённый напрямую
+    из обработчика, он обходит и jsonable_encoder — для больших ответов это основная экономия.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def json_body(adapter: TypeAdapter) -> Callable:
+    """
+    Зависимость: тело запроса разбирается и проверяется adapter.validate_json
+    за один проход pydantic-core — без json.loads и повторного обхода dict.
+    Ошибки — как у обычного Body: 422 с loc от "body".
+    """
+
+    async def dependency(request: Request):
+        body = await request.body()
+        try:
+            return adapter.validate_json(body)
+        except ValidationError as e:
+            errors = [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+            raise RequestValidationError(errors, body=body)
+
+    return dependency
+
+
+def body_openapi(adapter: TypeAdapter) -> dict:
+    """openapi_extra для роута с json_body: схема тела в документации."""
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": adapter.json_schema()}}}}
@@ -6,5 +6,162 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_API_BASE = os.getenv("OPENAI_API_BASE")
 
+# пул соединений общего AsyncOpenAI клиента
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30"))
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "1") == "1"
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+
+# системные промпты base/*.md: каталог и период проверки mtime (0 — не следить)
+PROMPTS_DIR = os.getenv("PROMPTS_DIR", "base")
+PROMPTS_RELOAD_INTERVAL = float(os.getenv("PROMPTS_RELOAD_INTERVAL", "2"))
+
+# кеш ответов LLM: LRU в памяти + необязательный SQLite (пустой путь — выключен)
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "1") == "1"
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+CACHE_TTL = float(os.getenv("CACHE_TTL", "3600"))
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", "")
+# кешировать и вызовы с temperature > 0 (generate, evaluate)
+CACHE_NONDETERMINISTIC = os.getenv("CACHE_NONDETERMINISTIC", "0") == "1"
+
+# POST /vacancy/parse/batch: параллельных вызовов LLM по умолчанию и максимум
+PARSE_BATCH_CONCURRENCY = int(os.getenv("PARSE_BATCH_CONCURRENCY", "8"))
+PARSE_BATCH_MAX_CONCURRENCY = int(os.getenv("PARSE_BATCH_MAX_CONCURRENCY", "64"))
+
+# POST /vacancy/rank: параллельных оценок резюме по умолчанию и размер шортлиста
+RANK_CONCURRENCY = int(os.getenv("RANK_CONCURRENCY", "8"))
+RANK_TOP_K = int(os.getenv("RANK_TOP_K", "10"))
+# доля резюме, которая после локального BM25-отбора уходит в LLM (1 — без отбора)
+PRESCREEN_KEEP_FRACTION = float(os.getenv("PRESCREEN_KEEP_FRACTION", "1"))
+
+# разбор вакансий правилами до вызова LLM: порог уверенности поля и поля,
+# которые должны пройти порог, чтобы LLM не вызывался вовсе
+RULES_ENABLED = os.getenv("RULES_ENABLED", "1") == "1"
+RULES_CONFIDENCE_THRESHOLD = float(os.getenv("RULES_CONFIDENCE_THRESHOLD", "0.8"))
+RULES_REQUIRED_FIELDS = os.getenv("RULES_REQUIRED_FIELDS", "job_title,company,skills,salary,location").split(",")
+
+# адаптивный лимит одновременных вызовов LLM (AIMD) и очередь перед ним:
+# сверх LLM_QUEUE_SIZE ожидающих или после LLM_QUEUE_TIMEOUT секунд ожидания — 503
+LLM_LIMIT_INITIAL = int(os.getenv("LLM_LIMIT_INITIAL", "20"))
+LLM_LIMIT_MIN = int(os.getenv("LLM_LIMIT_MIN", "1"))
+LLM_LIMIT_MAX = int(os.getenv("LLM_LIMIT_MAX", str(OPENAI_MAX_CONNECTIONS)))
+LLM_LIMIT_BACKOFF = float(os.getenv("LLM_LIMIT_BACKOFF", "0.9"))
+LLM_LIMIT_LATENCY_TOLERANCE = float(os.getenv("LLM_LIMIT_LATENCY_TOLERANCE", "2.0"))
+LLM_QUEUE_SIZE = int(os.getenv("LLM_QUEUE_SIZE", "100"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "10"))
+
+# квоты OpenAI на организацию (0 — узнать из заголовков x-ratelimit-*),
+# максимум ожидания квоты до 503 и max_tokens, который резервируется на ответ
+OPENAI_RPM = int(os.getenv("OPENAI_RPM", "0"))
+OPENAI_TPM = int(os.getenv("OPENAI_TPM", "0"))
+LLM_RATE_MAX_WAIT = float(os.getenv("LLM_RATE_MAX_WAIT", "30"))
+LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "2048"))
+
+# устойчивость вызовов LLM: повторы с decorrelated jitter (пауза от BASE до CAP секунд),
+# доля повторов от обычных вызовов, таймауты по видам вызова («вид=секунды» через запятую)
+LLM_RETRY_ATTEMPTS = int(os.getenv("LLM_RETRY_ATTEMPTS", "3"))
+LLM_RETRY_BASE = float(os.getenv("LLM_RETRY_BASE", "0.2"))
+LLM_RETRY_CAP = float(os.getenv("LLM_RETRY_CAP", "5"))
+LLM_RETRY_BUDGET = float(os.getenv("LLM_RETRY_BUDGET", "0.2"))
+LLM_DEADLINES = {
+    kind: float(seconds)
+    for kind, seconds in (item.split("=") for item in os.getenv("LLM_DEADLINES", "parse=30,generate=60,evaluate=60,evaluate_chunk=30").split(",") if item)
+}
+# hedging: дубль вызова после квантиля задержки; доля дублей от обычных вызовов
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "0") == "1"
+LLM_HEDGE_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", "0.05"))
+LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+# фоновые задачи (?async=true у /vacancy/generate и /vacancy/evaluate):
+# файл очереди SQLite, число воркеров, аренда задачи и попытки
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", "jobs.db")
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "4"))
+JOBS_LEASE = float(os.getenv("JOBS_LEASE", "60"))
+JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", "3"))
+JOBS_POLL_INTERVAL = float(os.getenv("JOBS_POLL_INTERVAL", "1"))
+JOBS_CALLBACK_ATTEMPTS = int(os.getenv("JOBS_CALLBACK_ATTEMPTS", "3"))
+# пауза перед повтором упавшей задачи: JOBS_RETRY_BACKOFF * 2^(попытка-1) секунд
+JOBS_RETRY_BACKOFF = float(os.getenv("JOBS_RETRY_BACKOFF", "2"))
+# хосты, на которые разрешён callback_url (http/https); пусто — webhook-и выключены
+JOBS_CALLBACK_ALLOWED_HOSTS = [host.lower() for host in os.getenv("JOBS_CALLBACK_ALLOWED_HOSTS", "").split(",") if host]
+
+# профилирование: X-Profile: 1 в запросе включает профилировщик (pyinstrument,
+# если установлен, иначе cProfile) — только при PROFILING_ENABLED=1;
+# файлы профилей пишутся в PROFILE_DIR, интервал выборки pyinstrument в секундах
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.001"))
+
+# цены моделей в долларах за 1M токенов: «модель=вход:выход» через запятую
+LLM_PRICES = {
+    model: tuple(float(price) for price in prices.split(":"))
+    for model, prices in (item.split("=") for item in os.getenv("LLM_PRICES", "gpt-4o-mini=0.15:0.6,gpt-4o=2.5:10").split(",") if item)
+}
+
+# бюджет промпта до отправки: контекст моделей в токенах («модель=токены» через запятую),
+# необязательный потолок токенов промпта и оценки стоимости вызова в $ (0 — без ограничения);
+# PROMPT_BUDGET_MODE: trim — обрезать резюме/описание вакансии до бюджета, reject — сразу 413;
+# подсчёты токенов кешируются по хешу текста
+LLM_CONTEXT_LIMITS = {
+    model: int(tokens)
+    for model, tokens in (item.split("=") for item in os.getenv("LLM_CONTEXT_LIMITS", "gpt-4o-mini=128000,gpt-4o=128000").split(",") if item)
+}
+LLM_MAX_PROMPT_TOKENS = int(os.getenv("LLM_MAX_PROMPT_TOKENS", "0"))
+LLM_MAX_REQUEST_COST = float(os.getenv("LLM_MAX_REQUEST_COST", "0"))
+PROMPT_BUDGET_MODE = os.getenv("PROMPT_BUDGET_MODE", "trim")
+TOKEN_COUNT_CACHE_SIZE = int(os.getenv("TOKEN_COUNT_CACHE_SIZE", "4096"))
+
+# map-reduce оценка длинных резюме: резюме длиннее EVALUATE_CHUNK_THRESHOLD токенов делится
+# на разделы до EVALUATE_CHUNK_TOKENS, разделы оцениваются параллельно (не больше
+# EVALUATE_CHUNK_CONCURRENCY на запрос), итоговый отчёт собирается из выжимок по разделам
+EVALUATE_CHUNK_THRESHOLD = int(os.getenv("EVALUATE_CHUNK_THRESHOLD", "3000"))
+EVALUATE_CHUNK_TOKENS = int(os.getenv("EVALUATE_CHUNK_TOKENS", "1500"))
+EVALUATE_CHUNK_CONCURRENCY = int(os.getenv("EVALUATE_CHUNK_CONCURRENCY", "4"))
+
+# хранилище результатов (вакансии, описания, оценки) в SQLite: повтор того же входа
+# отдаётся без вызова LLM; размер страницы списков по умолчанию и максимум
+STORE_ENABLED = os.getenv("STORE_ENABLED", "1") == "1"
+STORE_DB_PATH = os.getenv("STORE_DB_PATH", "store.db")
+STORE_PAGE_SIZE = int(os.getenv("STORE_PAGE_SIZE", "50"))
+STORE_MAX_PAGE_SIZE = int(os.getenv("STORE_MAX_PAGE_SIZE", "500"))
+
+# почти-дубликаты вакансий (MinHash + LSH): перестановки MinHash, полосы LSH, шингл в словах,
+# размер индекса; при сходстве от DEDUP_REUSE_THRESHOLD описание (generate, только при
+# CACHE_NONDETERMINISTIC=1) берётся готовым, от DEDUP_DIFF_THRESHOLD в LLM уходит прошлый
+# разбор вакансии и только изменения текста
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "1") == "1"
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+DEDUP_BANDS = int(os.getenv("DEDUP_BANDS", "32"))
+DEDUP_SHINGLE = int(os.getenv("DEDUP_SHINGLE", "3"))
+DEDUP_MAX_ENTRIES = int(os.getenv("DEDUP_MAX_ENTRIES", "5000"))
+DEDUP_REUSE_THRESHOLD = float(os.getenv("DEDUP_REUSE_THRESHOLD", "0.9"))
+DEDUP_DIFF_THRESHOLD = float(os.getenv("DEDUP_DIFF_THRESHOLD", "0.6"))
+
+# каскад моделей: маршрут по виду вызова («вид=модель>модель» через запятую) — сначала
+# первая (быстрая, дешёвая) модель, следующая — только если ответ не прошёл проверку;
+# вид без маршрута идёт в LLM_DEFAULT_MODEL. Проверка: у parse заполнены поля
+# ROUTER_PARSE_REQUIRED_FIELDS, у текстовых ответов — не короче ROUTER_MIN_CHARS («вид=символы»).
+# ROUTER_LOG_PATH — журнал решений (JSONL) для benchmarks/replay_router; ROUTER_EXPLORE —
+# доля прошедших проверку вызовов, для которых в фоне спрашиваются и следующие модели
+LLM_DEFAULT_MODEL = os.getenv("LLM_DEFAULT_MODEL", "gpt-4o-mini")
+LLM_ROUTES = {
+    kind: models.split(">")
+    for kind, models in (item.split("=") for item in os.getenv("LLM_ROUTES", "").split(",") if item)
+}
+ROUTER_PARSE_REQUIRED_FIELDS = os.getenv("ROUTER_PARSE_REQUIRED_FIELDS", "job_title,company,skills").split(",")
+ROUTER_MIN_CHARS = {
+    kind: int(chars)
+    for kind, chars in (item.split("=") for item in os.getenv("ROUTER_MIN_CHARS", "generate=200,evaluate=200").split(",") if item)
+}
+ROUTER_LOG_PATH = os.getenv("ROUTER_LOG_PATH", "")
+ROUTER_EXPLORE = float(os.getenv("ROUTER_EXPLORE", "0"))
+
+# локальная сверка навыков вакансии и резюме (автомат Ахо–Корасик по словарю с синонимами):
+# результат дописывается в промпт оценки, чтобы LLM не сверял навыки сам
+SKILLS_GAP_IN_PROMPT = os.getenv("SKILLS_GAP_IN_PROMPT", "1") == "1"
+
 #print ("OPENAI_API_KEY", OPENAI_API_KEY)
-#print ("OPENAI_API_BASE", OPENAI_API_BASE)
\ No newline at end of file
+#print ("OPENAI_API_BASE", OPENAI_API_BASE)
@@ -0,0 +1,56 @@
+import time
+from contextvars import ContextVar
+
+from starlette.datastructures import MutableHeaders
+
+_request_state: ContextVar[dict | None] = ContextVar("request_state", default=None)
+
+
+def request_state() -> dict:
+    """
+    Состояние текущего HTTP-запроса, общее для роутов и сервисов.
+    Вне запроса (тесты, скрипты) возвращает одноразовый словарь.
+    """
+    state = _request_state.get()
+    return state if state is not None else {"headers": {}}
+
+
+def set_response_header(name: str, value: str):
+    request_state()["headers"][name] = value
+
+
+class RequestStateMiddleware:
+    """
+    ASGI middleware: заводит состояние запроса и дописывает в ответ
+    заголовки, которые выставили сервисы (X-Cache и т.п.).
+    Заголовок X-Request-Timeout (секунды) задаёт дедлайн запроса для вызовов LLM.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = {"headers": {}}
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-timeout":
+                try:
+                    state["deadline"] = time.monotonic() + float(value)
+                except ValueError:
+                    pass
+        token = _request_state.set(state)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and state["headers"]:
+                headers = MutableHeaders(scope=message)
+                for name, value in state["headers"].items():
+                    headers[name] = value
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _request_state.reset(token)
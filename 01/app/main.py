@@ -1,6 +1,71 @@
-from fastapi import FastAPI
-from app.routes import vacancy
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from app.codec import FastJSONResponse
+from app.context import RequestStateMiddleware
+from app.profiling import TimingMiddleware
+from app.routes import jobs, metrics, store, vacancy
+from app.services.budget import PromptTooLarge
+from app.services.jobs import job_queue
+from app.services.limiter import LLMOverloaded
+from app.services.llm import llm_provider
+from app.services.resilience import DeadlineExceeded
+from app.services.store import vacancy_store
+from app.services.prompts import prompt_store
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # общий LLM клиент создаётся один раз и закрывается при остановке
+    llm_provider.client
+    # промпты base/*.md читаются один раз, дальше следим за mtime в фоне
+    await prompt_store.start()
+    # воркеры фоновых задач; незавершённые задачи прошлого запуска подхватываются из SQLite
+    job_queue.start()
+    yield
+    await job_queue.stop()
+    await prompt_store.stop()
+    await llm_provider.aclose()
+    vacancy_store.close()
+
+
+# ответы по умолчанию — через orjson (app.codec). FastAPI сериализует response_model
+# через pydantic-core только при классе по умолчанию, поэтому роуты возвращают модели
+# в FastJSONResponse: dumps() отдаёт модель тому же pydantic-core
+app = FastAPI(
+    title="FastAPI HW1: Vacancy Parser with OpenAI Proxy and Tests",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
+)
+
+# замеры фаз (Server-Timing) идут внутри состояния запроса: последний добавленный middleware — внешний
+app.add_middleware(TimingMiddleware)
+app.add_middleware(RequestStateMiddleware)
+
+
+@app.exception_handler(LLMOverloaded)
+async def llm_overloaded_handler(request: Request, exc: LLMOverloaded):
+    # быстрый отказ вместо бесконечной очереди к медленному upstream
+    return JSONResponse(
+        {"detail": str(exc)},
+        status_code=503,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(PromptTooLarge)
+async def prompt_too_large_handler(request: Request, exc: PromptTooLarge):
+    # бюджет проверяется локально — отказ без обращения к upstream
+    return JSONResponse({"detail": str(exc), "tokens": exc.tokens, "limit": exc.limit}, status_code=413)
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+    return JSONResponse({"detail": str(exc)}, status_code=504)
 
-app = FastAPI(title="FastAPI HW1: Vacancy Parser with OpenAI Proxy and Tests")
 
 app.include_router(vacancy.router)
+app.include_router(jobs.router)
+app.include_router(store.router)
+app.include_router(metrics.router)
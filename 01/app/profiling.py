@@ -0,0 +1,197 @@
+import cProfile
+import functools
+import importlib.util
+import inspect
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+
+from app.config import PROFILING_ENABLED, PROFILE_DIR, PROFILE_INTERVAL
+from app.context import request_state
+from app.metrics import registry
+
+phase_seconds = registry.histogram(
+    "request_phase_seconds",
+    "Фазы обработки запроса: validation, handler, serialize, prompt, cache, rules, rate_wait, slot_wait, llm, ttfb, generation, parse",
+)
+request_seconds = registry.histogram("http_request_seconds", "Длительность HTTP-запроса по маршруту и статусу")
+
+
+def record(phase: str, seconds: float):
+    """Добавляет длительность фазы в метрики и в Server-Timing текущего запроса."""
+    phase_seconds.observe(seconds, phase=phase)
+    timings = request_state().get("timings")
+    if timings is not None:
+        total, count = timings.get(phase, (0.0, 0))
+        timings[phase] = (total + seconds, count + 1)
+
+
+@contextmanager
+def span(phase: str):
+    """Замер фазы: with span("prompt"): ... Одноимённые фазы запроса суммируются."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - started)
+
+
+def server_timing(timings: dict[str, tuple[float, int]], total: float) -> str:
+    """Значение заголовка Server-Timing: фазы в миллисекундах, число замеров в desc."""
+    entries = []
+    for phase, (seconds, count) in timings.items():
+        entry = f"{phase};dur={seconds * 1000:.1f}"
+        if count > 1:
+            entry += f';desc="x{count}"'
+        entries.append(entry)
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def _enter_handler():
+    state = request_state()
+    now = time.perf_counter()
+    # от начала запроса до вызова обработчика: чтение тела, валидация, зависимости
+    if "started" in state:
+        record("validation", now - state["started"])
+    return now
+
+
+def _leave_handler(started: float):
+    now = time.perf_counter()
+    record("handler", now - started)
+    request_state()["handler_done"] = now
+
+
+def _timed(endpoint):
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            started = _enter_handler()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _leave_handler(started)
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            started = _enter_handler()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                _leave_handler(started)
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """
+    Маршрут с замером фаз: validation (до вызова обработчика), handler
+    и — в TimingMiddleware — serialize (от возврата обработчика до начала ответа).
+    Подключается как APIRouter(route_class=TimedRoute).
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _timed(endpoint), **kwargs)
+
+
+class RequestProfiler:
+    """
+    Профиль одного запроса: pyinstrument (сэмплирующий, .html), если установлен,
+    иначе cProfile (.prof, смотреть через pstats/snakeviz). cProfile видит весь
+    event loop, поэтому в профиль попадают и параллельные запросы.
+    Одновременно профилируется только один запрос.
+    """
+
+    _busy = threading.Lock()
+
+    def __init__(self, directory: str = PROFILE_DIR, interval: float = PROFILE_INTERVAL):
+        self.directory = directory
+        self.sampling = importlib.util.find_spec("pyinstrument") is not None
+        self.name = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}" + (".html" if self.sampling else ".prof")
+        if self.sampling:
+            from pyinstrument import Profiler
+
+            self._profiler = Profiler(interval=interval, async_mode="enabled")
+            self._profiler.start()
+        else:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    @classmethod
+    def start(cls, directory: str = PROFILE_DIR) -> "RequestProfiler | None":
+        if not cls._busy.acquire(blocking=False):
+            return None
+        try:
+            return cls(directory)
+        except Exception:
+            cls._busy.release()
+            raise
+
+    def stop(self) -> str:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, self.name)
+            if self.sampling:
+                self._profiler.stop()
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(self._profiler.output_html())
+            else:
+                self._profiler.disable()
+                self._profiler.dump_stats(path)
+            return path
+        finally:
+            self._busy.release()
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware: заводит замеры фаз запроса и отдаёт их в заголовке
+    Server-Timing, длительность запроса — в http_request_seconds.
+    При PROFILING_ENABLED заголовок X-Profile: 1 включает профилировщик,
+    имя файла профиля возвращается в заголовке X-Profile.
+    Должен стоять внутри RequestStateMiddleware.
+    """
+
+    def __init__(self, app, profiling: bool = PROFILING_ENABLED, profile_dir: str = PROFILE_DIR):
+        self.app = app
+        self.profiling = profiling
+        self.profile_dir = profile_dir
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = request_state()
+        state["timings"] = {}
+        started = state["started"] = time.perf_counter()
+        profiler = None
+        if self.profiling and (b"x-profile", b"1") in scope.get("headers", []):
+            profiler = RequestProfiler.start(self.profile_dir)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                now = time.perf_counter()
+                if "handler_done" in state:
+                    record("serialize", now - state["handler_done"])
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", server_timing(state["timings"], now - started))
+                if profiler is not None:
+                    headers["X-Profile"] = profiler.name
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            request_seconds.observe(time.perf_counter() - started, method=scope["method"], route=route, status=str(status))
+            if profiler is not None:
+                profiler.stop()
@@ -0,0 +1,13 @@
+from fastapi import APIRouter, HTTPException
+from app.services.jobs import job_queue
+
+router = APIRouter()
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Статус фоновой задачи: queued, running, done (с result) или failed (с error)."""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job.pop("payload")
+    return job
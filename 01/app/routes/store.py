@@ -0,0 +1,46 @@
+from fastapi import APIRouter, HTTPException, Query
+from app.codec import FastJSONResponse
+from app.config import STORE_PAGE_SIZE, STORE_MAX_PAGE_SIZE
+from app.profiling import TimedRoute
+from app.services.store import vacancy_store
+
+router = APIRouter(route_class=TimedRoute)
+
+# keyset-пагинация: следующая страница — ?after=<next> из ответа, без OFFSET;
+# страницы отдаются FastJSONResponse напрямую, мимо jsonable_encoder
+
+@router.get("/vacancies")
+async def list_vacancies(
+    company: str | None = None,
+    skill: str | None = None,
+    experience_level: str | None = None,
+    after: int = Query(0, ge=0, description="id последней записи предыдущей страницы"),
+    limit: int = Query(STORE_PAGE_SIZE, ge=1, le=STORE_MAX_PAGE_SIZE),
+):
+    """Сохранённые разобранные вакансии с фильтрами по компании, навыку и уровню."""
+    items, next_after = await vacancy_store.list_vacancies(company, skill, experience_level, after, limit)
+    return FastJSONResponse({"items": items, "next": next_after})
+
+@router.get("/vacancies/{vacancy_id}")
+async def get_vacancy(vacancy_id: int):
+    item = await vacancy_store.get_vacancy(vacancy_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Vacancy not found")
+    return item
+
+@router.get("/descriptions")
+async def list_descriptions(
+    after: int = Query(0, ge=0),
+    limit: int = Query(STORE_PAGE_SIZE, ge=1, le=STORE_MAX_PAGE_SIZE),
+):
+    items, next_after = await vacancy_store.list_descriptions(after, limit)
+    return FastJSONResponse({"items": items, "next": next_after})
+
+@router.get("/evaluations")
+async def list_evaluations(
+    vacancy: str | None = Query(None, description="текст вакансии: только оценки по ней"),
+    after: int = Query(0, ge=0),
+    limit: int = Query(STORE_PAGE_SIZE, ge=1, le=STORE_MAX_PAGE_SIZE),
+):
+    items, next_after = await vacancy_store.list_evaluations(vacancy, after, limit)
+    return FastJSONResponse({"items": items, "next": next_after})
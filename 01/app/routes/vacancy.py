@@ -1,14 +1,350 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
+import asyncio
+import json
+import time
+from typing import AsyncIterator
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.requests import ClientDisconnect
+from openai import AsyncOpenAI
+from pydantic import BaseModel, Field
+from app.codec import STR_DICT_ADAPTER, VACANCY_ADAPTER, FastJSONResponse, body_openapi, dumps, json_body
+from app.config import (
+    PARSE_BATCH_CONCURRENCY,
+    PARSE_BATCH_MAX_CONCURRENCY,
+    RANK_CONCURRENCY,
+    RANK_TOP_K,
+    PRESCREEN_KEEP_FRACTION,
+    RULES_CONFIDENCE_THRESHOLD,
+    RULES_REQUIRED_FIELDS,
+)
 from app.models.vacancy import Vacancy
-from app.services.vacancy import parse_vacancy
+from app.profiling import TimedRoute
+from app.services.batch import bounded_map, iter_json_array, iter_ndjson, primed
+from app.services.budget import PromptTooLarge
+from app.services.jobs import job_queue
+from app.services.limiter import LLMOverloaded, llm_limiter
+from app.services.llm import get_llm_client
+from app.services.prompts import prompt_store
+from app.services.prescreen import prescreen
+from app.services.resilience import DeadlineExceeded
+from app.services.ranking import rank_resumes
+from app.services.rules import extract_rules
+from app.services.skills import skills_gap
+from app.services.vacancy import (
+    parse_vacancy,
+    generate_vacancy_description,
+    evaluate_resume,
+    stream_vacancy_description,
+    stream_evaluate_resume,
+)
 
-router = APIRouter()
+# фазы validation/handler/serialize каждого роута попадают в Server-Timing
+router = APIRouter(route_class=TimedRoute)
 
 class VacancyRequest(BaseModel):
     description: str
 
+class RankRequest(BaseModel):
+    vacancy: str
+    resumes: list[str] = Field(..., min_length=1)
+    top_k: int = Field(RANK_TOP_K, ge=1)
+    concurrency: int = Field(RANK_CONCURRENCY, ge=1, le=PARSE_BATCH_MAX_CONCURRENCY)
+    # остановиться, если top_k не менялся столько оценок подряд
+    stable_after: int | None = Field(None, ge=1)
+    # локальный BM25-предотбор: какая доля резюме уходит в LLM
+    keep_fraction: float = Field(PRESCREEN_KEEP_FRACTION, gt=0, le=1)
+    # разобранная вакансия (/vacancy/parse): предотбор идёт по её skills/requirements
+    vacancy_profile: Vacancy | None = None
+
+class PrescreenRequest(BaseModel):
+    vacancy: str = ""
+    vacancy_profile: Vacancy | None = None
+    resumes: list[str] = Field(..., min_length=1)
+    keep_fraction: float = Field(PRESCREEN_KEEP_FRACTION, gt=0, le=1)
+    min_keep: int = Field(1, ge=1)
+
+class SkillsGapRequest(BaseModel):
+    vacancy: str = ""
+    vacancy_profile: Vacancy | None = None
+    resume: str
+
 @router.post("/vacancy/parse")
-def vacancy_parse(request: VacancyRequest):
-    result = parse_vacancy(request.description)
-    return result
+async def vacancy_parse(
+    request: VacancyRequest,
+    client: AsyncOpenAI = Depends(get_llm_client)
+):
+    result = await parse_vacancy(request.description, client)
+    return FastJSONResponse(result)
+
+@router.post("/vacancy/parse/rules")
+def vacancy_parse_rules(request: VacancyRequest):
+    """Разбор только правилами, без LLM: поля, уверенность и поля, для которых нужен LLM."""
+    rules = extract_rules(request.description)
+    return {
+        "vacancy": rules.to_vacancy(),
+        "confidence": rules.confidence,
+        "llm_fields": rules.missing(RULES_REQUIRED_FIELDS, RULES_CONFIDENCE_THRESHOLD),
+    }
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    Стриминг ответа, пока ещё читается тело запроса (NDJSON на входе и на выходе).
+    Обычный StreamingResponse слушает http.disconnect через receive() и тем самым
+    съедает чанки тела; здесь отключение клиента видно по обрыву чтения/записи.
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+def batch_item_description(item) -> str:
+    # элемент пакета: строка или {"description": "..."}
+    if isinstance(item, Exception):
+        raise item
+    if isinstance(item, dict):
+        item = item.get("description")
+    if not isinstance(item, str):
+        raise ValueError("Batch item must be a string or an object with 'description'")
+    return item
+
+@router.post(
+    "/vacancy/parse/batch",
+    openapi_extra={"requestBody": {"content": {
+        "application/json": {"schema": {"type": "array", "items": {"type": "string"}}},
+        "application/x-ndjson": {"schema": {"type": "string"}},
+    }}},
+)
+async def vacancy_parse_batch(
+    request: Request,
+    concurrency: int = Query(PARSE_BATCH_CONCURRENCY, ge=1, le=PARSE_BATCH_MAX_CONCURRENCY),
+    client: AsyncOpenAI = Depends(get_llm_client)
+):
+    """
+    Пакетный разбор вакансий. Тело — JSON-массив или NDJSON-поток (одна вакансия на строку).
+    Ответ — NDJSON: {"index": i, "result": Vacancy | parse_error} по мере готовности.
+    """
+    llm_limiter.check()
+    if request.headers.get("content-type", "").startswith(("application/x-ndjson", "application/jsonl")):
+        items = iter_ndjson(request.stream())
+    else:
+        # массив тоже читается потоком; первый элемент ждём здесь, чтобы не-массив получил 400
+        try:
+            items = await primed(iter_json_array(request.stream()))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+
+    async def parse_item(item):
+        return await parse_vacancy(batch_item_description(item), client)
+
+    async def lines():
+        async for index, result in bounded_map(items, parse_item, concurrency):
+            if isinstance(result, Vacancy):
+                # модель сериализуется pydantic-core сразу в байты, без промежуточного dict
+                yield b'{"index":%d,"result":%s}\n' % (index, VACANCY_ADAPTER.dump_json(result))
+                continue
+            if isinstance(result, Exception):
+                result = {"parse_error": True, "error_message": str(result), "raw_output": None}
+            yield dumps({"index": index, "result": result}) + b"\n"
+
+    return DuplexStreamingResponse(lines(), media_type="application/x-ndjson")
+
+@router.post("/vacancy/rank")
+async def vacancy_rank(
+    request: RankRequest,
+    client: AsyncOpenAI = Depends(get_llm_client)
+):
+    """
+    Ранжирование N резюме под одну вакансию.
+    Ответ — NDJSON: результаты по мере готовности, последней строкой — шортлист.
+    """
+    llm_limiter.check()
+    events = rank_resumes(
+        request.vacancy,
+        request.resumes,
+        client,
+        top_k=request.top_k,
+        concurrency=request.concurrency,
+        stable_after=request.stable_after,
+        keep_fraction=request.keep_fraction,
+        vacancy_profile=request.vacancy_profile,
+    )
+
+    async def lines():
+        async for event in events:
+            yield dumps(event) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@router.post("/vacancy/prescreen")
+def vacancy_prescreen(request: PrescreenRequest):
+    """
+    Локальный отбор резюме по BM25 без вызовов LLM.
+    """
+    if not request.vacancy and request.vacancy_profile is None:
+        raise HTTPException(status_code=400, detail="Either 'vacancy' or 'vacancy_profile' is required")
+    started = time.perf_counter()
+    result = prescreen(request.vacancy_profile or request.vacancy, request.resumes, request.keep_fraction, request.min_keep)
+    return {
+        "keep": result.keep,
+        "scores": result.scores,
+        "llm_calls_saved": result.dropped,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+@router.post("/vacancy/skills-gap")
+def vacancy_skills_gap(request: SkillsGapRequest):
+    """
+    Какие навыки вакансии есть в резюме (с позициями в тексте) и каких нет — без LLM.
+    """
+    if not request.vacancy and request.vacancy_profile is None:
+        raise HTTPException(status_code=400, detail="Either 'vacancy' or 'vacancy_profile' is required")
+    started = time.perf_counter()
+    result = skills_gap(request.vacancy_profile or request.vacancy, request.resume)
+    return {**result.to_dict(), "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)}
+
+async def submit_job(kind: str, payload: dict, callback_url: str | None) -> JSONResponse:
+    if callback_url is not None:
+        try:
+            job_queue.check_callback_url(callback_url)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    job_id = await job_queue.submit(kind, payload, callback_url)
+    return JSONResponse(
+        {"job_id": job_id, "status": "queued"},
+        status_code=202,
+        headers={"Location": f"/jobs/{job_id}"},
+    )
+
+async def generate_job(payload: dict) -> dict:
+    prompt = prompt_store.get("system_vacancy")
+    description = await generate_vacancy_description(payload["vacancy_data"], get_llm_client(), prompt)
+    return {"vacancy_description": description, "prompt_version": prompt.version}
+
+async def evaluate_job(payload: dict) -> dict:
+    prompt = prompt_store.get("system_evaluate")
+    result = await evaluate_resume(payload["vacancy"], payload["resume"], get_llm_client(), prompt)
+    return {"evaluation": result, "prompt_version": prompt.version}
+
+job_queue.register("generate", generate_job)
+job_queue.register("evaluate", evaluate_job)
+
+@router.post("/vacancy/generate", openapi_extra=body_openapi(STR_DICT_ADAPTER))
+async def vacancy_generate(
+    response: Response,
+    vacancy_data: dict[str, str] = Depends(json_body(STR_DICT_ADAPTER)),
+    async_job: bool = Query(False, alias="async", description="вернуть id фоновой задачи (202) вместо ожидания ответа LLM"),
+    callback_url: str | None = Query(None, description="куда отправить POST с результатом фоновой задачи"),
+    client: AsyncOpenAI = Depends(get_llm_client)
+):
+    if async_job:
+        return await submit_job("generate", {"vacancy_data": vacancy_data}, callback_url)
+    prompt = prompt_store.get("system_vacancy")
+    description = await generate_vacancy_description(vacancy_data, client, prompt)
+    response.headers["X-Prompt-Version"] = prompt.version
+    return {"vacancy_description": description}
+
+@router.post("/vacancy/evaluate")
+async def vacancy_evaluate(
+    response: Response,
+    vacancy: str = Body(..., embed=True),
+    resume: str = Body(..., embed=True),
+    async_job: bool = Query(False, alias="async", description="вернуть id фоновой задачи (202) вместо ожидания ответа LLM"),
+    callback_url: str | None = Query(None, description="куда отправить POST с результатом фоновой задачи"),
+    client: AsyncOpenAI = Depends(get_llm_client)
+):
+    if async_job:
+        return await submit_job("evaluate", {"vacancy": vacancy, "resume": resume}, callback_url)
+    prompt = prompt_store.get("system_evaluate")
+    result = await evaluate_resume(vacancy, resume, client, prompt)
+    response.headers["X-Prompt-Version"] = prompt.version
+    return {"evaluation": result}
+
+
+async def sse_events(request: Request, tokens: AsyncIterator[str]):
+    """Server-Sent Events: data: {"token": ...} на каждый токен, в конце event: done."""
+    try:
+        async for token in tokens:
+            if await request.is_disconnected():
+                break
+            yield f"data: {json.dumps({'token': token}, ensure_ascii=False)}\n\n"
+        else:
+            yield "event: done\ndata: {}\n\n"
+    except Exception as e:
+        yield f"event: error\ndata: {json.dumps({'error': str(e)}, ensure_ascii=False)}\n\n"
+    finally:
+        # закрываем генератор сервиса — он закроет поток к LLM
+        await tokens.aclose()
+
+def sse_response(request: Request, tokens: AsyncIterator[str], prompt_version: str) -> StreamingResponse:
+    # после начала потока статус уже не поменять — перегрузку проверяем заранее
+    llm_limiter.check()
+    return StreamingResponse(
+        sse_events(request, tokens),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Prompt-Version": prompt_version},
+    )
+
+@router.post("/vacancy/generate/stream", openapi_extra=body_openapi(STR_DICT_ADAPTER))
+async def vacancy_generate_stream(
+    request: Request,
+    vacancy_data: dict[str, str] = Depends(json_body(STR_DICT_ADAPTER)),
+    client: AsyncOpenAI = Depends(get_llm_client)
+):
+    prompt = prompt_store.get("system_vacancy")
+    return sse_response(request, stream_vacancy_description(vacancy_data, client, prompt), prompt.version)
+
+@router.post("/vacancy/evaluate/stream")
+async def vacancy_evaluate_stream(
+    request: Request,
+    vacancy: str = Body(..., embed=True),
+    resume: str = Body(..., embed=True),
+    client: AsyncOpenAI = Depends(get_llm_client)
+):
+    prompt = prompt_store.get("system_evaluate")
+    return sse_response(request, stream_evaluate_resume(vacancy, resume, client, prompt), prompt.version)
+
+PARSE_STREAM_ERROR_STATUS = {LLMOverloaded: 503, PromptTooLarge: 413, DeadlineExceeded: 504}
+
+async def parse_events(description: str, client: AsyncOpenAI):
+    """
+    SSE для разбора вакансии: event: field на каждое готовое поле Vacancy,
+    в конце event: result с итогом parse_vacancy (или словарём parse_error).
+    """
+    fields: asyncio.Queue = asyncio.Queue()
+    task = asyncio.ensure_future(
+        parse_vacancy(description, client, on_field=lambda name, value: fields.put_nowait((name, value)))
+    )
+    task.add_done_callback(lambda _: fields.put_nowait(None))
+    try:
+        while (field := await fields.get()) is not None:
+            name, value = field
+            yield f"event: field\ndata: {json.dumps({'name': name, 'value': value}, ensure_ascii=False)}\n\n"
+        try:
+            result = task.result()
+        except (LLMOverloaded, PromptTooLarge, DeadlineExceeded) as e:
+            # статус ответа уже 200 — код ошибки, как у обычного /vacancy/parse, передаём в событии
+            error = {"error": str(e), "status": PARSE_STREAM_ERROR_STATUS[type(e)]}
+            yield f"event: error\ndata: {json.dumps(error, ensure_ascii=False)}\n\n"
+            return
+        if isinstance(result, Vacancy):
+            result = result.model_dump()
+        yield f"event: result\ndata: {json.dumps(result, ensure_ascii=False)}\n\n"
+    finally:
+        # клиент ушёл — отменяем запрос к LLM
+        task.cancel()
+
+@router.post("/vacancy/parse/stream")
+async def vacancy_parse_stream(
+    request: VacancyRequest,
+    client: AsyncOpenAI = Depends(get_llm_client)
+):
+    llm_limiter.check()
+    return StreamingResponse(
+        parse_events(request.description, client),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
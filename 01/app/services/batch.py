@@ -0,0 +1,183 @@
+import asyncio
+import re
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable
+
+from app.codec import loads
+
+_DONE = object()
+# разборщик массива: re за один вызов проглатывает всё до следующей скобки/запятой,
+# включая строки целиком, и захватывает этот байт; незаконченная строка — захваченная «"»
+_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+_TOKENS = re.compile(rb'(?:[^"\[\]{},]+|' + _STRING + rb')*+(.)', re.DOTALL)
+_NESTED_TOKENS = re.compile(rb'(?:[^"\[\]{}]+|' + _STRING + rb')*+(.)', re.DOTALL)
+_CLOSING = {ord("]"): ord("["), ord("}"): ord("{")}
+
+
+async def bounded_map(
+    items: AsyncIterable[Any],
+    fn: Callable[[Any], Awaitable[Any]],
+    concurrency: int,
+) -> AsyncIterator[tuple[int, Any]]:
+    """
+    Применяет fn к элементам не более чем в `concurrency` параллельных задачах
+    и отдаёт (index, result) по мере готовности, а не в исходном порядке.
+    Входной поток читается лениво: в памяти не больше 2 * concurrency элементов.
+    Исключение fn для элемента возвращается как результат и не прерывает остальных.
+    """
+    pending: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def feed():
+        index = 0
+        cancelled = False
+        try:
+            async for item in items:
+                await pending.put((index, item))
+                index += 1
+        except asyncio.CancelledError:
+            # потребитель ушёл: воркеры отменяются снаружи, а место в полной очереди
+            # уже никто не освободит — ждать его здесь значит зависнуть навсегда
+            cancelled = True
+            raise
+        finally:
+            if not cancelled:
+                for _ in range(concurrency):
+                    await pending.put(_DONE)
+
+    async def worker():
+        while (job := await pending.get()) is not _DONE:
+            index, item = job
+            try:
+                result = await fn(item)
+            except Exception as e:
+                result = e
+            await results.put((index, result))
+        await results.put(_DONE)
+
+    tasks = [asyncio.create_task(feed())] + [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        running = concurrency
+        while running:
+            item = await results.get()
+            if item is _DONE:
+                running -= 1
+                continue
+            yield item
+        # ошибка чтения входного потока (например, разрыв соединения)
+        await tasks[0]
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def iter_ndjson(chunks: AsyncIterable[bytes]) -> AsyncIterator[Any]:
+    """Разбирает NDJSON по мере поступления байтов; битая строка отдаётся как ValueError."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _loads(line)
+    if buffer.strip():
+        yield _loads(buffer)
+
+
+def _loads(line: bytes, kind: str = "NDJSON line") -> Any:
+    try:
+        return loads(line)
+    except ValueError as e:
+        return ValueError(f"Invalid {kind}: {e}")
+
+
+async def iter_json_array(chunks: AsyncIterable[bytes]) -> AsyncIterator[Any]:
+    """
+    Отдаёт элементы JSON-массива по мере поступления байтов, не буферизуя тело:
+    в памяти только текущий элемент. Сканер находит границы элементов верхнего
+    уровня (запятые вне строк и вложенных скобок), каждый элемент разбирается
+    отдельно; битый элемент отдаётся как ValueError, как строка в iter_ndjson.
+    Если тело — не массив или массив оборван, поднимается ValueError.
+    """
+    buffer = b""
+    scanned = start = count = 0
+    stack: list[int] = []
+    opened = closed = False
+    async for chunk in chunks:
+        if closed:
+            if chunk.strip():
+                raise ValueError("Unexpected data after JSON array")
+            continue
+        buffer += chunk
+        pos = scanned
+        while True:
+            # внутри элемента запятые не нужны — regex пропускает их сам
+            match = (_TOKENS if len(stack) <= 1 else _NESTED_TOKENS).match(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            token = match.start(1)
+            ch = buffer[token]
+            if ch == 0x22:
+                # строка не закончилась в этом чанке — дочитаем и просканируем её заново
+                pos = token
+                break
+            pos = token + 1
+            if ch in (0x5B, 0x7B):  # [ {
+                if not stack:
+                    if ch != 0x5B or buffer[:token].strip():
+                        raise ValueError("Body must be a JSON array")
+                    opened = True
+                    start = pos
+                stack.append(ch)
+            elif ch in _CLOSING:
+                if not stack or stack.pop() != _CLOSING[ch]:
+                    raise ValueError("Mismatched brackets in JSON array")
+                if not stack:
+                    element = buffer[start:token]
+                    # пустой массив []; «[1,]» — битый последний элемент
+                    if element.strip() or count:
+                        yield _loads(element, "JSON array item")
+                    closed = True
+                    if buffer[pos:].strip():
+                        raise ValueError("Unexpected data after JSON array")
+                    break
+            else:  # запятая между элементами верхнего уровня
+                yield _loads(buffer[start:token], "JSON array item")
+                start = pos
+                count += 1
+        if not opened and buffer.strip() and not buffer.lstrip().startswith(b"["):
+            raise ValueError("Body must be a JSON array")
+        if closed:
+            buffer = b""
+            continue
+        # уже разобранные элементы больше не нужны: сдвигаем буфер к началу текущего
+        cut = start if opened else 0
+        buffer = buffer[cut:]
+        scanned = pos - cut
+        start -= cut
+    if not closed:
+        raise ValueError("Body must be a JSON array" if not opened else "Unterminated JSON array")
+
+
+async def iter_list(items: list) -> AsyncIterator[Any]:
+    for item in items:
+        yield item
+
+
+async def primed(items: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    """
+    Читает первый элемент сразу — ошибка разбора начала тела видна до начала
+    ответа — и возвращает поток целиком, вместе с этим элементом.
+    """
+    try:
+        first = await anext(items)
+    except StopAsyncIteration:
+        return iter_list([])
+
+    async def chained():
+        yield first
+        async for item in items:
+            yield item
+
+    return chained()
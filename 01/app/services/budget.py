@@ -0,0 +1,205 @@
+import hashlib
+import importlib.util
+import logging
+import math
+from collections import OrderedDict
+from typing import Callable
+
+from app.config import (
+    LLM_CONTEXT_LIMITS,
+    LLM_MAX_PROMPT_TOKENS,
+    LLM_MAX_REQUEST_COST,
+    PROMPT_BUDGET_MODE,
+    TOKEN_COUNT_CACHE_SIZE,
+)
+from app.context import request_state, set_response_header
+from app.metrics import registry
+from app.services.usage import model_prices, model_setting, usage_cost
+
+logger = logging.getLogger(__name__)
+
+TRIM_MARKER = "\n[…текст обрезан по бюджету токенов]"
+# служебные токены формата chat на каждое сообщение
+MESSAGE_OVERHEAD = 4
+
+prompt_tokens = registry.histogram(
+    "llm_prompt_tokens", "Токены промпта по локальному подсчёту до отправки",
+    buckets=(100, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000),
+)
+prompt_rejected = registry.counter("llm_prompt_rejected_total", "Промпты сверх бюджета, отклонённые до вызова LLM (reason)")
+prompt_trimmed = registry.counter("llm_prompt_trimmed_total", "Промпты, обрезанные до бюджета")
+
+
+class PromptTooLarge(Exception):
+    """Промпт не укладывается в контекст модели или лимит стоимости — 413 без вызова LLM."""
+
+    def __init__(self, tokens: int, limit: int, reason: str):
+        super().__init__(f"Prompt has {tokens} tokens, the {reason} budget allows {limit}")
+        self.tokens = tokens
+        self.limit = limit
+        self.reason = reason
+
+
+def approx_tokens(text: str) -> int:
+    """
+    Оценка без токенизатора: ~4 символа ASCII на токен, кириллица и прочее
+    не-ASCII дробится мельче — ~2.5 символа на токен.
+    """
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return ascii_chars // 4 + math.ceil((len(text) - ascii_chars) / 2.5)
+
+
+class TokenCounter:
+    """
+    Подсчёт токенов текста: токенизатор модели (tiktoken, если установлен)
+    с LRU-кешем по хешу текста, иначе approx_tokens — она дешевле самого хеша.
+    """
+
+    def __init__(self, encoding=None, cache_size: int = TOKEN_COUNT_CACHE_SIZE):
+        self.encoding = encoding
+        self.cache_size = cache_size
+        self._counts: OrderedDict[bytes, int] = OrderedDict()
+        self.hits = 0
+
+    @property
+    def exact(self) -> bool:
+        return self.encoding is not None
+
+    @classmethod
+    def for_model(cls, model: str) -> "TokenCounter":
+        if importlib.util.find_spec("tiktoken") is None:
+            # бюджет и квота держатся, но по оценке: при плотном тексте промпт может выйти длиннее
+            logger.warning("tiktoken is not installed: prompt tokens for %s are estimated from characters", model)
+            return cls()
+        import tiktoken
+
+        try:
+            return cls(tiktoken.encoding_for_model(model))
+        except KeyError:
+            return cls(tiktoken.get_encoding("o200k_base"))
+
+    def count(self, text: str) -> int:
+        if self.encoding is None:
+            return approx_tokens(text)
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        count = self._counts.get(key)
+        if count is not None:
+            self.hits += 1
+            self._counts.move_to_end(key)
+            return count
+        count = len(self.encoding.encode(text))
+        self._counts[key] = count
+        if len(self._counts) > self.cache_size:
+            self._counts.popitem(last=False)
+        return count
+
+    def truncate(self, text: str, tokens: int) -> str:
+        """Начало текста не длиннее tokens токенов."""
+        if tokens <= 0:
+            return ""
+        if self.encoding is not None:
+            return self.encoding.decode(self.encoding.encode(text)[:tokens])
+        total = approx_tokens(text)
+        if total <= tokens:
+            return text
+        keep = len(text) * tokens // total
+        while keep and approx_tokens(text[:keep]) > tokens:
+            keep = keep * 19 // 20
+        return text[:keep]
+
+
+_counters: dict[str, TokenCounter] = {}
+
+
+def token_counter(model: str) -> TokenCounter:
+    counter = _counters.get(model)
+    if counter is None:
+        counter = _counters[model] = TokenCounter.for_model(model)
+    return counter
+
+
+def count_messages(messages: list[dict], model: str | None = None) -> int:
+    """Токены промпта из сообщений chat; без модели — оценкой approx_tokens."""
+    count = token_counter(model).count if model is not None else approx_tokens
+    return sum(count(str(m.get("content", ""))) + MESSAGE_OVERHEAD for m in messages)
+
+
+class PromptBudget:
+    """
+    Проверка промпта до отправки в LLM. Бюджет токенов промпта — минимум из
+    контекста модели за вычетом max_tokens ответа, LLM_MAX_PROMPT_TOKENS и
+    лимита стоимости LLM_MAX_REQUEST_COST (при ответе длиной max_tokens).
+    Сверх бюджета в режиме trim обрезается переменная часть промпта (резюме,
+    описание вакансии), в режиме reject — PromptTooLarge.
+    Токены и оценка стоимости запроса — в заголовках X-Prompt-Tokens и X-Estimated-Cost;
+    X-Prompt-Tokens-Estimated: 1 — токены посчитаны без токенизатора (approx_tokens).
+    """
+
+    def __init__(
+        self,
+        context_limits: dict[str, int] = LLM_CONTEXT_LIMITS,
+        max_prompt_tokens: int = LLM_MAX_PROMPT_TOKENS,
+        max_cost: float = LLM_MAX_REQUEST_COST,
+        mode: str = PROMPT_BUDGET_MODE,
+    ):
+        self.context_limits = context_limits
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_cost = max_cost
+        self.mode = mode
+
+    def limit(self, model: str, max_tokens: int) -> tuple[int, str] | None:
+        """Допустимые токены промпта и ограничение, которое их задаёт; None — без ограничений."""
+        limits = []
+        context = model_setting(self.context_limits, model)
+        if context:
+            limits.append((context - max_tokens, "context"))
+        if self.max_prompt_tokens:
+            limits.append((self.max_prompt_tokens, "prompt_tokens"))
+        prices = model_prices(model)
+        if self.max_cost and prices:
+            limits.append((int((self.max_cost * 1_000_000 - max_tokens * prices[1]) / prices[0]), "cost"))
+        return min(limits) if limits else None
+
+    def fit(self, build: Callable[[str], list[dict]], text: str, model: str, max_tokens: int) -> list[dict]:
+        """
+        Сообщения build(text), уложенные в бюджет: в режиме trim text
+        обрезается на число лишних токенов (с пометкой TRIM_MARKER).
+        """
+        messages = build(text)
+        tokens = count_messages(messages, model)
+        limit = self.limit(model, max_tokens)
+        if limit is not None and tokens > limit[0] and self.mode == "trim" and text:
+            counter = token_counter(model)
+            keep = counter.count(text) - (tokens - limit[0]) - counter.count(TRIM_MARKER)
+            # границы токенов после обрезки могут сдвинуться — дорезаем
+            while keep > 0 and tokens > limit[0]:
+                messages = build(counter.truncate(text, keep) + TRIM_MARKER)
+                tokens = count_messages(messages, model)
+                keep -= max(1, tokens - limit[0])
+            if tokens <= limit[0]:
+                prompt_trimmed.inc()
+                set_response_header("X-Prompt-Trimmed", "1")
+        if limit is not None and tokens > limit[0]:
+            prompt_rejected.inc(reason=limit[1])
+            raise PromptTooLarge(tokens, limit[0], limit[1])
+        self._report(model, tokens, max_tokens)
+        return messages
+
+    def check(self, messages: list[dict], model: str, max_tokens: int) -> list[dict]:
+        """Только проверка, без обрезки."""
+        return self.fit(lambda _: messages, "", model, max_tokens)
+
+    def _report(self, model: str, tokens: int, max_tokens: int):
+        prompt_tokens.observe(tokens)
+        # оценка сверху: ответ считаем длиной max_tokens
+        cost = usage_cost(model, tokens, max_tokens) or 0.0
+        totals = request_state().setdefault("budget", {"tokens": 0, "cost": 0.0})
+        totals["tokens"] += tokens
+        totals["cost"] += cost
+        set_response_header("X-Prompt-Tokens", str(totals["tokens"]))
+        set_response_header("X-Estimated-Cost", f"{totals['cost']:.6f}")
+        if not token_counter(model).exact:
+            set_response_header("X-Prompt-Tokens-Estimated", "1")
+
+
+prompt_budget = PromptBudget()
@@ -0,0 +1,202 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from app.config import (
+    CACHE_ENABLED,
+    CACHE_MAX_ENTRIES,
+    CACHE_MAX_BYTES,
+    CACHE_TTL,
+    CACHE_SQLITE_PATH,
+    CACHE_NONDETERMINISTIC,
+)
+from app.context import request_state, set_response_header
+from app.profiling import span
+
+
+def canonicalize(value) -> str:
+    """
+    Нормализует вход для ключа кеша: Unicode NFKC, схлопнутые пробелы,
+    словари — с отсортированными ключами.
+    """
+    if isinstance(value, str):
+        return " ".join(unicodedata.normalize("NFKC", value).split())
+    if isinstance(value, dict):
+        return json.dumps({canonicalize(k): canonicalize(v) for k, v in value.items()}, sort_keys=True, ensure_ascii=False)
+    if isinstance(value, (list, tuple)):
+        return json.dumps([canonicalize(v) for v in value], ensure_ascii=False)
+    return json.dumps(value)
+
+
+class MemoryTier:
+    """LRU в памяти процесса с TTL и ограничением по числу записей и байтам."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES, ttl: float = CACHE_TTL):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._items: OrderedDict[str, tuple[str, float, int]] = OrderedDict()
+        self.size_bytes = 0
+
+    def get(self, key: str) -> str | None:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        value, expires_at, _ = item
+        if expires_at < time.monotonic():
+            self._pop(key)
+            return None
+        self._items.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._items:
+            self._pop(key)
+        self._items[key] = (value, time.monotonic() + self.ttl, size)
+        self.size_bytes += size
+        while len(self._items) > self.max_entries or self.size_bytes > self.max_bytes:
+            self._pop(next(iter(self._items)))
+
+    def _pop(self, key: str):
+        _, _, size = self._items.pop(key)
+        self.size_bytes -= size
+
+    def clear(self):
+        self._items.clear()
+        self.size_bytes = 0
+
+    def __len__(self):
+        return len(self._items)
+
+
+class SQLiteTier:
+    """Постоянный уровень кеша в SQLite; запросы выполняются вне event loop."""
+
+    def __init__(self, path: str, ttl: float = CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _get(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM completions WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def _set(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + self.ttl),
+            )
+            self._conn.commit()
+
+    async def get(self, key: str) -> str | None:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: str):
+        await asyncio.to_thread(self._set, key, value)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM completions")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CompletionCache:
+    """
+    Кеш ответов LLM. Ключ — канонизированный вход, версия system-промпта,
+    модель и temperature. По умолчанию кешируются только детерминированные
+    вызовы (temperature=0). Статус HIT/MISS/BYPASS попадает в заголовок X-Cache.
+    """
+
+    def __init__(
+        self,
+        memory: MemoryTier | None = None,
+        persistent: SQLiteTier | None = None,
+        enabled: bool = True,
+        cache_nondeterministic: bool = False,
+    ):
+        self.memory = memory if memory is not None else MemoryTier()
+        self.persistent = persistent
+        self.enabled = enabled
+        self.cache_nondeterministic = cache_nondeterministic
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(*, input, prompt_version: str, model: str, temperature: float) -> str:
+        raw = "\x1f".join([canonicalize(input), prompt_version, model, repr(float(temperature))])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def cacheable(self, temperature: float) -> bool:
+        return self.enabled and (temperature == 0 or self.cache_nondeterministic)
+
+    async def get(self, key: str, temperature: float) -> str | None:
+        if not self.cacheable(temperature):
+            self._record("BYPASS")
+            return None
+        value = self.memory.get(key)
+        if value is None and self.persistent is not None:
+            with span("cache"):
+                value = await self.persistent.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        if value is None:
+            self.misses += 1
+            self._record("MISS")
+        else:
+            self.hits += 1
+            self._record("HIT")
+        return value
+
+    async def set(self, key: str, value: str, temperature: float):
+        if not self.cacheable(temperature):
+            return
+        self.memory.set(key, value)
+        if self.persistent is not None:
+            await self.persistent.set(key, value)
+
+    def clear(self):
+        self.memory.clear()
+        if self.persistent is not None:
+            self.persistent.clear()
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def _record(status: str):
+        # несколько вызовов LLM в одном запросе: HIT только если попали все
+        statuses = request_state().setdefault("cache", [])
+        statuses.append(status)
+        if "MISS" in statuses:
+            summary = "MISS"
+        elif "HIT" in statuses:
+            summary = "HIT"
+        else:
+            summary = "BYPASS"
+        set_response_header("X-Cache", summary)
+
+
+completion_cache = CompletionCache(
+    persistent=SQLiteTier(CACHE_SQLITE_PATH) if CACHE_SQLITE_PATH else None,
+    enabled=CACHE_ENABLED,
+    cache_nondeterministic=CACHE_NONDETERMINISTIC,
+)
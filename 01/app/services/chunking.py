@@ -0,0 +1,99 @@
+import re
+from typing import Callable
+
+# заголовки разделов резюме: «Опыт работы», «EDUCATION», «## Навыки», «Проекты:»
+SECTION_NAMES = (
+    "опыт работы", "опыт", "образование", "навыки", "ключевые навыки", "о себе", "проекты",
+    "сертификаты", "курсы", "языки", "достижения", "контакты", "дополнительная информация",
+    "experience", "work experience", "education", "skills", "summary", "about", "projects",
+    "certifications", "courses", "languages", "achievements", "contacts",
+)
+_HEADING_RE = re.compile(
+    r"^(?:#{1,6}\s+.+|(?:" + "|".join(re.escape(name) for name in SECTION_NAMES) + r")\s*:?"
+    r"|[^\W\d_][^.!?:]{0,58}:)$",
+    re.IGNORECASE,
+)
+_CAPS_HEADING_RE = re.compile(r"^[A-ZА-ЯЁ][A-ZА-ЯЁ ]{3,}$")
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SENTENCE_RE = re.compile(r"(?<=[.!?;])\s+")
+
+
+def is_heading(line: str) -> bool:
+    line = line.strip()
+    if not line or len(line) > 60:
+        return False
+    # «ОПЫТ РАБОТЫ» — заголовок, даже если названия нет в SECTION_NAMES
+    return _HEADING_RE.match(line) is not None or _CAPS_HEADING_RE.match(line) is not None
+
+
+def split_sections(text: str) -> list[str]:
+    """Делит текст на разделы по строкам-заголовкам; заголовок остаётся в начале раздела."""
+    sections: list[list[str]] = [[]]
+    for line in text.splitlines():
+        if is_heading(line) and any(part.strip() for part in sections[-1]):
+            sections.append([])
+        sections[-1].append(line)
+    return [joined for lines in sections if (joined := "\n".join(lines).strip())]
+
+
+def _pack(parts: list[str], max_tokens: int, count: Callable[[str], int], separator: str) -> list[list[str]]:
+    """Жадно собирает подряд идущие части в группы не длиннее max_tokens."""
+    groups: list[list[str]] = []
+    current: list[str] = []
+    for part in parts:
+        if current and count(separator.join(current + [part])) > max_tokens:
+            groups.append(current)
+            current = []
+        current.append(part)
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _split(text: str, max_tokens: int, count: Callable[[str], int]) -> list[str]:
+    # абзацы, затем строки, затем предложения; предложение длиннее max_tokens
+    # остаётся целым — его обрежет бюджет промпта
+    for pattern, separator in ((_PARAGRAPH_RE, "\n\n"), (re.compile(r"\n"), "\n"), (_SENTENCE_RE, " ")):
+        parts = [part for part in pattern.split(text) if part.strip()]
+        if len(parts) > 1:
+            break
+    else:
+        return [text]
+    chunks = []
+    for group in _pack(parts, max_tokens, count, separator):
+        if len(group) == 1 and count(group[0]) > max_tokens:
+            chunks.extend(_split(group[0], max_tokens, count))
+        else:
+            chunks.append(separator.join(group))
+    return chunks
+
+
+def chunk_text(text: str, max_tokens: int, count: Callable[[str], int], min_tokens: int | None = None) -> list[str]:
+    """
+    Чанки для map-reduce оценки: каждый раздел — отдельный чанк, раздел
+    длиннее max_tokens делится по абзацам, строкам и предложениям. Короткие разделы
+    (меньше min_tokens, по умолчанию четверть max_tokens) присоединяются
+    к следующему. Граница чанков зависит только от соседних разделов — правка
+    одного раздела меняет только его чанки, остальные берутся из кеша.
+    """
+    if min_tokens is None:
+        min_tokens = max_tokens // 4
+    chunks = []
+    carry = ""
+    for section in split_sections(text):
+        if carry and count(carry) + count(section) <= max_tokens:
+            section, carry = carry + "\n\n" + section, ""
+        elif carry:
+            chunks.append(carry)
+            carry = ""
+        size = count(section)
+        if size < min_tokens:
+            carry = section
+            continue
+        if size <= max_tokens:
+            chunks.append(section)
+            continue
+        chunks.extend(_split(section, max_tokens, count))
+    if carry:
+        chunks.append(carry)
+    return chunks
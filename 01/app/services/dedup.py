@@ -0,0 +1,134 @@
+import re
+import zlib
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+
+from app.config import DEDUP_BANDS, DEDUP_MAX_ENTRIES, DEDUP_NUM_PERM, DEDUP_SHINGLE
+from app.metrics import registry
+
+_WORD_RE = re.compile(r"\w+")
+# нечётный множитель для смешивания хешей слов в хеш шингла
+_SHINGLE_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+index_size = registry.gauge("near_dup_index_size", "Записей в индексе почти-дубликатов (kind)")
+index_evictions = registry.counter("near_dup_evictions_total", "Записи, вытесненные из индекса почти-дубликатов (kind)")
+
+
+class MinHasher:
+    """
+    MinHash-подпись текста по словесным шинглам. Шинглы хешируются векторно,
+    num_perm хеш-функций вида (a·x + b) >> 32 (multiply-shift по модулю 2^64)
+    считаются одной операцией NumPy над матрицей num_perm × шинглы.
+    """
+
+    def __init__(self, num_perm: int = DEDUP_NUM_PERM, shingle: int = DEDUP_SHINGLE, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle = shingle
+        self.a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> np.ndarray:
+        """Хеши уникальных шинглов: слово хешируется crc32, шингл — смесь хешей k слов подряд."""
+        words = _WORD_RE.findall(text.casefold())
+        if not words:
+            return np.empty(0, dtype=np.uint64)
+        hashes = np.fromiter((zlib.crc32(word.encode("utf-8")) for word in words), dtype=np.uint64, count=len(words))
+        k = min(self.shingle, len(words))
+        mixed = np.zeros(len(words) - k + 1, dtype=np.uint64)
+        for offset in range(k):
+            mixed = mixed * _SHINGLE_MIX + hashes[offset:len(hashes) - k + 1 + offset]
+        return np.unique(mixed)
+
+    def signature(self, text: str) -> np.ndarray | None:
+        """Подпись из num_perm значений uint32; None — в тексте нет слов."""
+        hashes = self.shingles(text)
+        if not len(hashes):
+            return None
+        # переполнение uint64 здесь и есть взятие по модулю 2^64
+        mixed = self.a[:, None] * hashes[None, :] + self.b[:, None]
+        return (mixed >> np.uint64(32)).min(axis=1).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """
+    LSH-индекс MinHash-подписей: подпись режется на bands полос, тексты
+    с совпавшей полосой — кандидаты, их сходство по Жаккару оценивается
+    долей совпавших значений подписи. С 128 перестановками и 32 полосами
+    пара со сходством 0.6 попадает в кандидаты с вероятностью ~99%.
+    Индекс ограничен max_entries, вытесняется давно не использованная запись.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        hasher: MinHasher | None = None,
+        bands: int = DEDUP_BANDS,
+        max_entries: int = DEDUP_MAX_ENTRIES,
+    ):
+        self.kind = kind
+        self.hasher = hasher or MinHasher()
+        self.bands = bands
+        self.rows = self.hasher.num_perm // bands
+        self.max_entries = max_entries
+        self._entries: OrderedDict[int, tuple[np.ndarray, Any]] = OrderedDict()
+        self._buckets: list[dict[bytes, set[int]]] = [{} for _ in range(bands)]
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _band_keys(self, signature: np.ndarray) -> list[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def add(self, text: str, value: Any):
+        signature = self.hasher.signature(text)
+        if signature is None:
+            return
+        entry_id = self._next_id
+        self._next_id += 1
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            band.setdefault(key, set()).add(entry_id)
+        self._entries[entry_id] = (signature, value)
+        while len(self._entries) > self.max_entries:
+            self._evict()
+        index_size.set(len(self._entries), kind=self.kind)
+
+    def _evict(self):
+        entry_id, (signature, _) = self._entries.popitem(last=False)
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            ids = band[key]
+            ids.discard(entry_id)
+            if not ids:
+                del band[key]
+        index_evictions.inc(kind=self.kind)
+
+    def query(self, text: str, threshold: float) -> tuple[float, Any] | None:
+        """Самая похожая запись со сходством не ниже threshold: (сходство, value)."""
+        signature = self.hasher.signature(text)
+        if signature is None:
+            return None
+        candidates = set()
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(band.get(key, ()))
+        if not candidates:
+            return None
+        ids = list(candidates)
+        similarity = (np.stack([self._entries[i][0] for i in ids]) == signature).mean(axis=1)
+        best = int(similarity.argmax())
+        if similarity[best] < threshold:
+            return None
+        self._entries.move_to_end(ids[best])
+        return float(similarity[best]), self._entries[ids[best]][1]
+
+    def clear(self):
+        self._entries.clear()
+        self._buckets = [{} for _ in range(self.bands)]
+        index_size.set(0, kind=self.kind)
+
+
+# разобранные вакансии: (текст описания, Vacancy); описания: (версия промпта, текст)
+parse_index = NearDuplicateIndex("parse")
+generate_index = NearDuplicateIndex("generate")
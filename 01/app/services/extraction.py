@@ -0,0 +1,267 @@
+import json
+import time
+from types import SimpleNamespace
+from typing import Any, Callable
+
+from openai import AsyncOpenAI
+from pydantic import TypeAdapter, ValidationError
+
+from app.config import LLM_MAX_TOKENS
+from app.metrics import registry
+from app.models.vacancy import Vacancy
+from app.profiling import record, span
+from app.services.budget import count_messages, token_counter
+from app.services.limiter import llm_limiter
+from app.services.ratelimit import rate_scheduler
+from app.services.resilience import llm_resilience
+
+FENCE = "```json"
+
+REPAIR_PROMPT = (
+    "Your previous answer is not valid JSON for the required schema.\n"
+    "Error: {error}\n\n"
+    "Return only the corrected JSON object, without explanations or code fences."
+)
+
+parse_seconds = registry.histogram("vacancy_parse_seconds", "Длительность извлечения Vacancy из ответа LLM")
+parse_repairs = registry.counter("vacancy_parse_repairs_total", "Повторные запросы на исправление JSON")
+parse_truncated = registry.counter("vacancy_parse_truncated_total", "Ответы LLM, оборванные до конца JSON")
+parse_aborted = registry.counter("vacancy_parse_aborted_total", "Потоки, прерванные на первой синтаксической ошибке")
+
+
+def strict_json_schema(model) -> dict:
+    """
+    JSON Schema модели для response_format в strict-режиме OpenAI:
+    все поля обязательны (Optional остаётся nullable), без default и лишних свойств.
+    """
+    schema = model.model_json_schema()
+    properties = {}
+    for name, prop in schema["properties"].items():
+        prop = {k: v for k, v in prop.items() if k not in ("default", "title")}
+        properties[name] = prop
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+VACANCY_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "vacancy", "schema": strict_json_schema(Vacancy), "strict": True},
+}
+
+_FIELD_ADAPTERS = {name: TypeAdapter(field.annotation) for name, field in Vacancy.model_fields.items()}
+
+
+class ExtractionError(ValueError):
+    def __init__(self, message: str, raw_output: str | None, truncated: bool = False):
+        super().__init__(message)
+        self.raw_output = raw_output
+        self.truncated = truncated
+
+
+class IncrementalJSONObject:
+    """
+    Потоковый разбор JSON-объекта верхнего уровня.
+    feed() принимает очередной кусок текста и возвращает поля, значения
+    которых уже закончились, — их можно отдавать клиенту до конца ответа.
+    Синтаксическая ошибка видна сразу, а не после получения всего ответа.
+    Допускается обёртка ```json ... ```.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.prefix = ""
+        self.started = False
+        self.complete = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = 0
+
+    def feed(self, chunk: str) -> list[tuple[str, Any]]:
+        fields = []
+        for char in chunk:
+            if self.complete:
+                if not char.isspace() and char != "`":
+                    raise json.JSONDecodeError("Extra data", self.text + char, len(self.text))
+                continue
+            if not self.started:
+                if char == "{":
+                    self.started = True
+                    self._depth = 1
+                    self.text = "{"
+                    self._member_start = 1
+                    continue
+                self.prefix += char
+                if not FENCE.startswith(self.prefix.strip()):
+                    raise json.JSONDecodeError("Expecting value", self.prefix, len(self.prefix) - 1)
+                continue
+
+            self.text += char
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    fields.extend(self._close_member(len(self.text) - 1))
+                    self.complete = True
+            elif char == "," and self._depth == 1:
+                fields.extend(self._close_member(len(self.text) - 1))
+                self._member_start = len(self.text)
+        return fields
+
+    def _close_member(self, end: int) -> list[tuple[str, Any]]:
+        member = self.text[self._member_start:end]
+        if not member.strip():
+            return []
+        # json.loads бросит JSONDecodeError на битом поле — это и есть ранняя диагностика
+        return list(json.loads("{" + member + "}").items())
+
+
+def validate_field(name: str, value: Any) -> Any:
+    adapter = _FIELD_ADAPTERS.get(name)
+    return adapter.validate_python(value) if adapter else value
+
+
+def estimated_usage(messages: list[dict], model: str, output: str) -> SimpleNamespace:
+    """usage по подсчёту токенов — когда в потоке не было чанка с usage."""
+    prompt = count_messages(messages, model)
+    completion = token_counter(model).count(output) if output else 0
+    return SimpleNamespace(prompt_tokens=prompt, completion_tokens=completion, total_tokens=prompt + completion)
+
+
+async def _stream_json(
+    client: AsyncOpenAI,
+    model: str,
+    messages: list[dict],
+    on_field: Callable[[str, Any], None] | None,
+) -> str:
+    """Потоковый запрос; поля отдаются в on_field по мере готовности."""
+    parser = IncrementalJSONObject()
+    finish_reason = None
+    async with rate_scheduler.reserve(messages, LLM_MAX_TOKENS, model) as reservation, llm_limiter.slot("parse_stream"):
+        started = time.perf_counter()
+        first_token = None
+        stream = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=0,
+            max_tokens=LLM_MAX_TOKENS,
+            response_format=VACANCY_RESPONSE_FORMAT,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        usage = None
+        try:
+            async for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                    reservation.settle(usage)
+                if parser.complete:
+                    # объект уже собран: дочитываем хвост потока ради чанка с usage,
+                    # но если модель продолжает писать — обрываем и не платим за остаток
+                    if usage is not None or (chunk.choices and (chunk.choices[0].delta.content or "").strip()):
+                        break
+                    continue
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                finish_reason = getattr(choice, "finish_reason", None) or finish_reason
+                if not choice.delta.content:
+                    continue
+                if first_token is None:
+                    first_token = time.perf_counter()
+                    record("ttfb", first_token - started)
+                try:
+                    fields = [(name, validate_field(name, value)) for name, value in parser.feed(choice.delta.content)]
+                except ValueError as e:
+                    # битый JSON или поле не того типа: дальше читать бессмысленно,
+                    # обрываем поток и не платим за остаток
+                    parse_aborted.inc()
+                    raise ExtractionError(str(e), parser.prefix + parser.text) from e
+                if on_field is not None:
+                    for name, value in fields:
+                        on_field(name, value)
+        finally:
+            await stream.close()
+            if usage is None:
+                # поток оборван или upstream не прислал usage: сверяем резерв по подсчёту
+                reservation.settle(estimated_usage(messages, model, parser.prefix + parser.text))
+            if first_token is not None:
+                record("generation", time.perf_counter() - first_token)
+
+    raw = parser.prefix + parser.text
+    if not parser.complete:
+        parse_truncated.inc()
+        reason = "finish_reason=length" if finish_reason == "length" else "stream ended"
+        raise ExtractionError(f"Truncated JSON ({reason})", raw, truncated=True)
+    return parser.text
+
+
+async def extract_vacancy_json(
+    client: AsyncOpenAI,
+    model: str,
+    prompt: str,
+    on_field: Callable[[str, Any], None] | None = None,
+) -> str:
+    """
+    Извлекает Vacancy из ответа LLM и возвращает проверенный JSON.
+    Ответ запрашивается по JSON Schema модели и разбирается по мере поступления.
+    При битом, оборванном или невалидном ответе делается одна попытка исправления.
+    """
+    started = time.perf_counter()
+    messages = [{"role": "user", "content": prompt}]
+    try:
+        # временный сбой посреди потока — поток запрашивается заново, поля в on_field могут прийти повторно
+        content = await llm_resilience.call("parse_stream", lambda: _stream_json(client, model, messages, on_field))
+        with span("parse"):
+            Vacancy.model_validate_json(content)
+        parse_seconds.observe(time.perf_counter() - started, outcome="ok")
+        return content
+    except ExtractionError as e:
+        raw, error = e.raw_output, str(e)
+    except ValidationError as e:
+        raw, error = content, str(e)
+
+    parse_repairs.inc()
+    messages = messages + [
+        {"role": "assistant", "content": raw or ""},
+        {"role": "user", "content": REPAIR_PROMPT.format(error=error)},
+    ]
+
+    async def attempt():
+        async with rate_scheduler.reserve(messages, LLM_MAX_TOKENS, model) as reservation, llm_limiter.slot("parse"):
+            with span("llm"):
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=0,
+                    max_tokens=LLM_MAX_TOKENS,
+                    response_format=VACANCY_RESPONSE_FORMAT
+                )
+            reservation.settle(getattr(response, "usage", None))
+        return response
+
+    response = await llm_resilience.call("parse", attempt, hedge=True)
+    content = response.choices[0].message.content.strip().strip("`").removeprefix("json").strip()
+    try:
+        with span("parse"):
+            Vacancy.model_validate(json.loads(content))
+    except (ValueError, ValidationError) as e:
+        parse_seconds.observe(time.perf_counter() - started, outcome="error")
+        raise ExtractionError(str(e), content) from e
+    parse_seconds.observe(time.perf_counter() - started, outcome="repaired")
+    return content
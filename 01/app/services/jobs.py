@@ -0,0 +1,314 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.config import (
+    JOBS_DB_PATH,
+    JOBS_WORKERS,
+    JOBS_LEASE,
+    JOBS_MAX_ATTEMPTS,
+    JOBS_POLL_INTERVAL,
+    JOBS_CALLBACK_ATTEMPTS,
+    JOBS_CALLBACK_ALLOWED_HOSTS,
+    JOBS_RETRY_BACKOFF,
+)
+from app.metrics import registry
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+jobs_total = registry.counter("jobs_total", "Фоновые задачи по итоговому статусу (done, failed)")
+jobs_queued = registry.gauge("jobs_queued", "Фоновые задачи в очереди")
+jobs_seconds = registry.histogram("job_seconds", "Длительность выполнения фоновой задачи")
+job_callbacks = registry.counter("job_callbacks_total", "Webhook-уведомления о задачах по результату (ok, failed, rejected)")
+
+_COLUMNS = "id, kind, status, payload, result, error, callback_url, callback_status, attempts, created_at, updated_at"
+
+
+class JobStore:
+    """
+    Очередь задач в SQLite. Взятая в работу задача получает аренду (lease_until):
+    воркер продлевает её, пока работает, а задачу с истёкшей арендой
+    (процесс упал или был перезапущен) снова берёт любой воркер.
+    У задачи в очереди lease_until — время, раньше которого её не брать (пауза перед повтором).
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                callback_url TEXT,
+                callback_status TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_until REAL NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)")
+        self._conn.commit()
+
+    def _row(self, row: sqlite3.Row | None) -> dict | None:
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def add(self, kind: str, payload: dict, callback_url: str | None = None) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, status, payload, callback_url, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, json.dumps(payload, ensure_ascii=False), callback_url, now, now),
+            )
+            self._conn.commit()
+        return job_id
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row)
+
+    def claim(self, lease: float) -> dict | None:
+        """Берёт самую старую готовую задачу: в очереди или с истёкшей арендой."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"""UPDATE jobs SET status = ?, attempts = attempts + 1, lease_until = ?, updated_at = ?
+                    WHERE id = (
+                        SELECT id FROM jobs
+                        WHERE status IN (?, ?) AND lease_until < ?
+                        ORDER BY created_at LIMIT 1
+                    )
+                    RETURNING {_COLUMNS}""",
+                (RUNNING, now + lease, now, QUEUED, RUNNING, now),
+            ).fetchone()
+            self._conn.commit()
+        return self._row(row)
+
+    def renew(self, job_id: str, lease: float):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND status = ?", (time.time() + lease, job_id, RUNNING)
+            )
+            self._conn.commit()
+
+    def finish(self, job_id: str, status: str, result: Any = None, error: str | None = None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, lease_until = 0, updated_at = ? WHERE id = ?",
+                (status, json.dumps(result, ensure_ascii=False) if result is not None else None, error, time.time(), job_id),
+            )
+            self._conn.commit()
+
+    def requeue(self, job_id: str, error: str, count_attempt: bool = True, delay: float = 0):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, attempts = attempts - ?, lease_until = ?, updated_at = ? WHERE id = ?",
+                (QUEUED, error, 0 if count_attempt else 1, now + delay if delay else 0, now, job_id),
+            )
+            self._conn.commit()
+
+    def set_callback_status(self, job_id: str, status: str):
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET callback_status = ? WHERE id = ?", (status, job_id))
+            self._conn.commit()
+
+    def count(self, status: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+Handler = Callable[[dict], Awaitable[Any]]
+
+
+class JobQueue:
+    """
+    Фоновое выполнение долгих вызовов LLM: POST сразу возвращает id задачи,
+    пул из `workers` asyncio-задач берёт задачи из SQLite, результат
+    читается через GET /jobs/{id} или приходит POST-ом на callback_url
+    (только http/https и только на хосты из callback_hosts).
+    Задача, упавшая с исключением, повторяется до max_attempts раз
+    с паузой retry_backoff * 2^(попытка-1) секунд.
+    """
+
+    def __init__(
+        self,
+        path: str = JOBS_DB_PATH,
+        workers: int = JOBS_WORKERS,
+        lease: float = JOBS_LEASE,
+        max_attempts: int = JOBS_MAX_ATTEMPTS,
+        poll_interval: float = JOBS_POLL_INTERVAL,
+        callback_attempts: int = JOBS_CALLBACK_ATTEMPTS,
+        callback_hosts: list[str] = JOBS_CALLBACK_ALLOWED_HOSTS,
+        retry_backoff: float = JOBS_RETRY_BACKOFF,
+    ):
+        self.path = path
+        self.workers = workers
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.callback_attempts = callback_attempts
+        self.callback_hosts = {host.lower() for host in callback_hosts}
+        self.retry_backoff = retry_backoff
+        self.handlers: dict[str, Handler] = {}
+        self._store: JobStore | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: asyncio.Event | None = None
+        self._http: httpx.AsyncClient | None = None
+
+    @property
+    def store(self) -> JobStore:
+        # открываем лениво: TestClient без lifespan тоже может ставить задачи
+        if self._store is None:
+            self._store = JobStore(self.path)
+        return self._store
+
+    def register(self, kind: str, handler: Handler):
+        self.handlers[kind] = handler
+
+    def check_callback_url(self, url: str):
+        """ValueError, если на url нельзя слать webhook: чужой хост (SSRF во внутреннюю сеть) или не http(s)."""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError("callback_url must use http or https")
+        if (parts.hostname or "") not in self.callback_hosts:
+            raise ValueError(f"callback_url host '{parts.hostname}' is not allowed")
+
+    async def submit(self, kind: str, payload: dict, callback_url: str | None = None) -> str:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind '{kind}'")
+        if callback_url is not None:
+            self.check_callback_url(callback_url)
+        job_id = await asyncio.to_thread(self.store.add, kind, payload, callback_url)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    async def get(self, job_id: str) -> dict | None:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def _keep_lease(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            await asyncio.to_thread(self.store.renew, job_id, self.lease)
+
+    async def run_once(self) -> bool:
+        """Выполняет одну задачу из очереди; False, если очередь пуста."""
+        job = await asyncio.to_thread(self.store.claim, self.lease)
+        if job is None:
+            return False
+        started = time.perf_counter()
+        keeper = asyncio.create_task(self._keep_lease(job["id"]))
+        try:
+            handler = self.handlers[job["kind"]]
+            result = await handler(job["payload"])
+        except asyncio.CancelledError:
+            # остановка приложения: задача сразу возвращается в очередь, попытка не считается
+            self.store.requeue(job["id"], "interrupted", count_attempt=False)
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if job["attempts"] < self.max_attempts:
+                # пауза перед повтором: сбой выше по цепочке обычно не проходит мгновенно
+                delay = self.retry_backoff * 2 ** (job["attempts"] - 1)
+                await asyncio.to_thread(self.store.requeue, job["id"], error, True, delay)
+                return True
+            await asyncio.to_thread(self.store.finish, job["id"], FAILED, None, error)
+            jobs_total.inc(status=FAILED)
+        else:
+            await asyncio.to_thread(self.store.finish, job["id"], DONE, result)
+            jobs_total.inc(status=DONE)
+        finally:
+            keeper.cancel()
+            jobs_seconds.observe(time.perf_counter() - started, kind=job["kind"])
+
+        if job["callback_url"]:
+            await self._notify(job["id"], job["callback_url"])
+        return True
+
+    async def _notify(self, job_id: str, url: str):
+        """Webhook: POST с задачей на callback_url, несколько попыток с паузой."""
+        try:
+            # список хостов мог сузиться, пока задача ждала в очереди
+            self.check_callback_url(url)
+        except ValueError:
+            job_callbacks.inc(result="rejected")
+            await asyncio.to_thread(self.store.set_callback_status, job_id, "rejected")
+            return
+        job = await self.get(job_id)
+        body = {key: job[key] for key in ("id", "kind", "status", "result", "error")}
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=10)
+        for attempt in range(self.callback_attempts):
+            try:
+                response = await self._http.post(url, json=body)
+                if response.status_code < 400:
+                    job_callbacks.inc(result="ok")
+                    await asyncio.to_thread(self.store.set_callback_status, job_id, "ok")
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(2 ** attempt)
+        job_callbacks.inc(result="failed")
+        await asyncio.to_thread(self.store.set_callback_status, job_id, "failed")
+
+    async def _worker(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                if await self.run_once():
+                    continue
+                jobs_queued.set(await asyncio.to_thread(self.store.count, QUEUED))
+            except Exception:
+                # сбой самой очереди (SQLite) не должен убивать воркер
+                await asyncio.sleep(self.poll_interval)
+                continue
+            # ждём новую задачу или истечения чужой аренды (другой процесс упал)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._tasks or self.workers <= 0:
+            return
+        self._wakeup = asyncio.Event()
+        # при старте работа, брошенная прошлым процессом, подхватится по истечении аренды
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._wakeup = None
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+job_queue = JobQueue()
@@ -0,0 +1,167 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+import openai
+
+from app.config import (
+    LLM_LIMIT_INITIAL,
+    LLM_LIMIT_MIN,
+    LLM_LIMIT_MAX,
+    LLM_LIMIT_BACKOFF,
+    LLM_LIMIT_LATENCY_TOLERANCE,
+    LLM_QUEUE_SIZE,
+    LLM_QUEUE_TIMEOUT,
+)
+from app.metrics import registry
+from app.profiling import span
+
+# ответы, по которым видно, что upstream перегружен
+OVERLOAD_ERRORS = (
+    openai.RateLimitError,
+    openai.InternalServerError,
+    openai.APITimeoutError,
+    asyncio.TimeoutError,
+)
+
+limit_gauge = registry.gauge("llm_concurrency_limit", "Текущий адаптивный лимит одновременных вызовов LLM")
+inflight_gauge = registry.gauge("llm_inflight", "Вызовы LLM в работе")
+queue_gauge = registry.gauge("llm_queue_depth", "Запросы в очереди к LLM")
+shed_total = registry.counter("llm_shed_total", "Запросы, отклонённые без вызова LLM (queue_full, queue_timeout)")
+
+
+class LLMOverloaded(Exception):
+    """Очередь к LLM переполнена или ожидание слота истекло — отвечаем 503."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"LLM is overloaded ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdaptiveLimiter:
+    """
+    AIMD-лимит одновременных вызовов LLM с ограниченной очередью.
+
+    Успешный вызов при загрузке не меньше половины лимита увеличивает лимит
+    на 1/limit (примерно +1 за «окно» из limit вызовов). Ошибка перегрузки
+    (429, 5xx, таймаут) или задержка больше LLM_LIMIT_LATENCY_TOLERANCE
+    базовой уменьшает лимит в LLM_LIMIT_BACKOFF раз. Базовая задержка
+    считается отдельно для каждого вида вызова (parse, generate, ...):
+    минимум, который медленно подтягивается к текущим значениям.
+
+    Сверх лимита запросы ждут в очереди не дольше queue_timeout;
+    если в очереди уже queue_size запросов, новый сразу получает LLMOverloaded.
+    """
+
+    def __init__(
+        self,
+        initial: float = LLM_LIMIT_INITIAL,
+        min_limit: int = LLM_LIMIT_MIN,
+        max_limit: int = LLM_LIMIT_MAX,
+        backoff: float = LLM_LIMIT_BACKOFF,
+        latency_tolerance: float = LLM_LIMIT_LATENCY_TOLERANCE,
+        queue_size: int = LLM_QUEUE_SIZE,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT,
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.inflight = 0
+        self.shed = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._baseline: dict[str, float] = {}
+        self._latency = 1.0
+        self._publish()
+
+    def _publish(self):
+        limit_gauge.set(math.floor(self.limit))
+        inflight_gauge.set(self.inflight)
+        queue_gauge.set(len(self._waiters))
+
+    def retry_after(self) -> int:
+        # сколько примерно ждать, пока рассосётся очередь
+        return max(1, math.ceil(self._latency * (len(self._waiters) + 1) / max(1, math.floor(self.limit))))
+
+    def _shed(self, reason: str):
+        self.shed += 1
+        shed_total.inc(reason=reason)
+        raise LLMOverloaded(reason, self.retry_after())
+
+    def check(self):
+        """Быстрая проверка без ожидания: для потоковых ответов, где 503 можно отдать только до начала потока."""
+        if self.inflight >= math.floor(self.limit) and len(self._waiters) >= self.queue_size:
+            self._shed("queue_full")
+
+    async def _acquire(self):
+        if self.inflight < math.floor(self.limit) and not self._waiters:
+            self.inflight += 1
+            return
+        if len(self._waiters) >= self.queue_size:
+            self._shed("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._publish()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # слот успели выдать одновременно с отменой — возвращаем его
+                self._release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+                self._publish()
+            if isinstance(e, asyncio.TimeoutError):
+                self._shed("queue_timeout")
+            raise
+
+    def _release(self):
+        self.inflight -= 1
+        # очередь живёт в порядке поступления
+        while self._waiters and self.inflight < math.floor(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.inflight += 1
+                waiter.set_result(None)
+        self._publish()
+
+    def on_success(self, kind: str, latency: float):
+        self._latency = 0.9 * self._latency + 0.1 * latency
+        baseline = self._baseline.get(kind, latency)
+        self._baseline[kind] = min(latency, 0.95 * baseline + 0.05 * latency)
+        if latency > self.latency_tolerance * baseline:
+            self.on_overload()
+        elif self.inflight >= self.limit / 2:
+            # растём, только если лимит действительно упирается в нагрузку
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def on_overload(self):
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+
+    @asynccontextmanager
+    async def slot(self, kind: str):
+        """Слот на один вызов LLM (для потоков — на всё время чтения)."""
+        with span("slot_wait"):
+            await self._acquire()
+        self._publish()
+        started = time.perf_counter()
+        try:
+            yield
+        except OVERLOAD_ERRORS:
+            self.on_overload()
+            raise
+        else:
+            self.on_success(kind, time.perf_counter() - started)
+        finally:
+            self._release()
+
+
+llm_limiter = AdaptiveLimiter()
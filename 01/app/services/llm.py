@@ -0,0 +1,78 @@
+import importlib.util
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from app.config import (
+    OPENAI_API_KEY,
+    OPENAI_API_BASE,
+    OPENAI_MAX_CONNECTIONS,
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+    OPENAI_KEEPALIVE_EXPIRY,
+    OPENAI_HTTP2,
+    OPENAI_TIMEOUT,
+)
+from app.services.ratelimit import rate_scheduler
+
+
+class LLMClientProvider:
+    """
+    Один AsyncOpenAI клиент на всё приложение.
+    Соединения (и TLS-сессии) переиспользуются между запросами,
+    клиент закрывается при остановке приложения.
+    """
+
+    def __init__(
+        self,
+        api_key: str | None = OPENAI_API_KEY,
+        base_url: str | None = OPENAI_API_BASE,
+        max_connections: int = OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections: int = OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = OPENAI_KEEPALIVE_EXPIRY,
+        http2: bool = OPENAI_HTTP2,
+        timeout: float = OPENAI_TIMEOUT,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        # HTTP/2 включаем только если установлен пакет h2 (pip install httpx[http2])
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        self.timeout = timeout
+        self._client: AsyncOpenAI | None = None
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        # создаём лениво: TestClient без lifespan тоже получит клиента
+        if self._client is None:
+            http_client = DefaultAsyncHttpxClient(
+                limits=self.limits,
+                http2=self.http2,
+                timeout=self.timeout,
+                # квоты и остатки из x-ratelimit-* подстраивают планировщик
+                event_hooks={"response": [rate_scheduler.on_response]},
+            )
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                http_client=http_client,
+                # повторы делает app.services.resilience (с дедлайнами и бюджетом)
+                max_retries=0,
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+llm_provider = LLMClientProvider()
+
+
+def get_llm_client() -> AsyncOpenAI:
+    """Зависимость FastAPI: общий AsyncOpenAI клиент."""
+    return llm_provider.client
@@ -0,0 +1,101 @@
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from app.models.vacancy import Vacancy
+
+_TOKEN_RE = re.compile(r"[\w+#]+(?:\.[\w+#]+)*")
+
+# грубый стемминг для русского: «разработка» и «разработчик» дают один терм
+RU_STEM_LENGTH = 6
+_RU_STEM_RE = re.compile(r"\b([а-яё]{%d})[а-яё]+" % RU_STEM_LENGTH)
+
+
+def tokenize(text: str) -> list[str]:
+    # стемминг и разбиение — по одному проходу регулярного выражения на весь текст
+    return _TOKEN_RE.findall(_RU_STEM_RE.sub(r"\1", text.lower()))
+
+
+class BM25Index:
+    """
+    BM25 по коллекции резюме. Веса терм/документ считаются один раз
+    в разреженную матрицу, оценка запроса — одно произведение матрицы на вектор.
+    """
+
+    def __init__(self, documents: list[str], k1: float = 1.5, b: float = 0.75):
+        self.vocabulary: dict[str, int] = {}
+        indptr, indices, counts = [0], [], []
+        for document in documents:
+            for term, count in Counter(tokenize(document)).items():
+                indices.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                counts.append(count)
+            indptr.append(len(indices))
+
+        n_docs, n_terms = len(documents), len(self.vocabulary)
+        indices = np.asarray(indices, dtype=np.int32)
+        tf = np.asarray(counts, dtype=np.float32)
+        row_nnz = np.diff(indptr)
+
+        doc_len = np.bincount(np.repeat(np.arange(n_docs), row_nnz), weights=tf, minlength=n_docs)
+        avgdl = doc_len.mean() if n_docs and doc_len.mean() > 0 else 1.0
+        df = np.bincount(indices, minlength=n_terms)
+        self.idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        norm = np.repeat(k1 * (1 - b + b * doc_len / avgdl), row_nnz)
+        weights = tf * (k1 + 1) / (tf + norm) * self.idf[indices]
+        self.weights = csr_matrix((weights, indices, indptr), shape=(n_docs, n_terms))
+
+    def score(self, query: dict[str, float]) -> np.ndarray:
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for term, weight in query.items():
+            term_id = self.vocabulary.get(term)
+            if term_id is not None:
+                vector[term_id] += weight
+        return self.weights @ vector
+
+
+def vacancy_query(vacancy: Vacancy | str) -> dict[str, float]:
+    """
+    Термы запроса: навыки весят вдвое больше требований и названия должности.
+    Если структурированной вакансии нет, используется весь текст.
+    """
+    if isinstance(vacancy, str):
+        return {term: 1.0 for term in tokenize(vacancy)}
+    query: dict[str, float] = {}
+    for text, weight in [(vacancy.job_title, 1.0)] + [(s, 2.0) for s in vacancy.skills] + [(r, 1.0) for r in vacancy.requirements]:
+        for term in tokenize(text or ""):
+            query[term] = max(query.get(term, 0.0), weight)
+    return query
+
+
+@dataclass
+class PrescreenResult:
+    keep: list[int]
+    # BM25 каждого резюме; None — отбор выключен (keep_fraction >= 1) и индекс не строился
+    scores: list[float] | None
+    total: int
+
+    @property
+    def dropped(self) -> int:
+        return self.total - len(self.keep)
+
+
+def prescreen(vacancy: Vacancy | str, resumes: list[str], keep_fraction: float, min_keep: int = 1) -> PrescreenResult:
+    """
+    Локальный отбор резюме без LLM: в LLM уходит только доля keep_fraction
+    лучших по BM25, резюме без единого общего терма с вакансией отсекаются.
+    Меньше min_keep не остаётся никогда. Индексы возвращаются в исходном порядке.
+    При keep_fraction >= 1 остаются все резюме, индекс не строится и scores = None.
+    """
+    if keep_fraction >= 1:
+        return PrescreenResult(keep=list(range(len(resumes))), scores=None, total=len(resumes))
+    scores = BM25Index(resumes).score(vacancy_query(vacancy))
+    keep_count = math.ceil(len(resumes) * keep_fraction)
+    keep_count = min(keep_count, int(np.count_nonzero(scores > 0)))
+    keep_count = min(len(resumes), max(min_keep, keep_count))
+    keep = sorted(np.argsort(-scores, kind="stable")[:keep_count].tolist())
+    return PrescreenResult(keep=keep, scores=scores.tolist(), total=len(resumes))
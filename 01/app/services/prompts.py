@@ -0,0 +1,103 @@
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.config import PROMPTS_DIR, PROMPTS_RELOAD_INTERVAL
+
+
+@dataclass(frozen=True)
+class Prompt:
+    name: str
+    text: str
+    version: str
+    mtime_ns: int
+
+
+def prompt_version(text: str) -> str:
+    """Короткий хеш содержимого промпта — по нему ключуются ответы и кеши."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+
+class PromptStore:
+    """
+    Системные промпты base/*.md в памяти.
+    Файлы читаются один раз, изменения подхватываются фоновой проверкой mtime
+    (stat и чтение выполняются в отдельном потоке, event loop не блокируется).
+    """
+
+    def __init__(self, base_dir: str = PROMPTS_DIR, reload_interval: float = PROMPTS_RELOAD_INTERVAL):
+        self.base_dir = Path(base_dir)
+        self.reload_interval = reload_interval
+        self._prompts: dict[str, Prompt] = {}
+        self._loaded = False
+        self._task: asyncio.Task | None = None
+
+    def _read(self, path: Path) -> Prompt:
+        mtime_ns = path.stat().st_mtime_ns
+        text = path.read_text(encoding="utf-8")
+        return Prompt(name=path.stem, text=text, version=prompt_version(text), mtime_ns=mtime_ns)
+
+    def _scan(self) -> list[str]:
+        # возвращает имена изменившихся промптов
+        changed = []
+        found = set()
+        for path in sorted(self.base_dir.glob("*.md")):
+            found.add(path.stem)
+            current = self._prompts.get(path.stem)
+            if current is not None and current.mtime_ns == path.stat().st_mtime_ns:
+                continue
+            prompt = self._read(path)
+            if current is None or current.version != prompt.version:
+                changed.append(prompt.name)
+            self._prompts[prompt.name] = prompt
+        for name in set(self._prompts) - found:
+            del self._prompts[name]
+            changed.append(name)
+        self._loaded = True
+        return changed
+
+    def load(self) -> None:
+        self._scan()
+
+    async def refresh(self) -> list[str]:
+        return await asyncio.to_thread(self._scan)
+
+    def get(self, name: str) -> Prompt:
+        if not self._loaded:
+            self.load()
+        try:
+            return self._prompts[name]
+        except KeyError:
+            raise KeyError(f"Prompt '{name}' not found in {self.base_dir}") from None
+
+    def versions(self) -> dict[str, str]:
+        if not self._loaded:
+            self.load()
+        return {name: prompt.version for name, prompt in self._prompts.items()}
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await self.refresh()
+            except OSError:
+                # файл могут переписывать прямо сейчас — попробуем в следующий раз
+                pass
+
+    async def start(self):
+        await asyncio.to_thread(self.load)
+        if self.reload_interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+prompt_store = PromptStore()
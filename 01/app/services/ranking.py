@@ -0,0 +1,119 @@
+import asyncio
+import re
+from contextlib import aclosing
+from typing import AsyncIterator
+
+from openai import AsyncOpenAI
+
+from app.metrics import registry
+from app.models.vacancy import Vacancy
+from app.services.batch import bounded_map, iter_list
+from app.services.prescreen import prescreen
+from app.services.prompts import prompt_store
+from app.services.vacancy import evaluate_resume
+
+MAX_SCORE = 10
+
+# итоговая строка, которую требует base/system_evaluate.md: «SCORE: 7»
+# (модели иногда выделяют её жирным или дописывают «/10»)
+_SCORE_LINE = re.compile(r"^[ \t*]*SCORE[ \t*]*:[ \t*]*(\d+(?:[.,]\d+)?)[ \t]*(?:/[ \t]*10)?[ \t*]*$", re.MULTILINE)
+
+
+def extract_score(report: str) -> float | None:
+    """
+    Оценка 1–10 из строки «SCORE: N» отчета evaluate_resume (берётся последняя).
+    Оценки в свободном тексте отчета не разбираются: «3 из 10 требований» — не оценка.
+    """
+    matches = _SCORE_LINE.findall(report)
+    if not matches:
+        return None
+    score = float(matches[-1].replace(",", "."))
+    return score if 1 <= score <= MAX_SCORE else None
+
+
+llm_calls_saved = registry.counter("rank_llm_calls_saved_total", "Оценки резюме, не отправленные в LLM (предотбор и ранняя остановка)")
+
+
+def _sort_key(item: dict):
+    # без оценки — в конец, при равенстве — порядок в запросе
+    return (item["score"] is None, -(item["score"] or 0), item["index"])
+
+
+async def rank_resumes(
+    vacancy_text: str,
+    resumes: list[str],
+    client: AsyncOpenAI,
+    top_k: int,
+    concurrency: int,
+    stable_after: int | None = None,
+    keep_fraction: float = 1.0,
+    vacancy_profile: Vacancy | None = None,
+) -> AsyncIterator[dict]:
+    """
+    Оценивает резюме против одной вакансии параллельно (не больше `concurrency`
+    вызовов LLM) и отдаёт события по мере готовности:
+      {"type": "result", ...} — на каждое оценённое резюме;
+      {"type": "shortlist", ...} — в конце, top_k лучших по убыванию оценки.
+
+    Ранняя остановка: если top_k резюме уже получили максимальную оценку,
+    или состав top_k не менялся `stable_after` оценок подряд, оставшиеся
+    резюме не оцениваются (их вызовы LLM отменяются).
+
+    При keep_fraction < 1 резюме сначала отбираются локальным BM25-индексом
+    по навыкам/требованиям vacancy_profile (или по тексту вакансии).
+    """
+    # один и тот же system-промпт на весь пакет
+    prompt = prompt_store.get("system_evaluate")
+
+    screened = await asyncio.to_thread(
+        prescreen, vacancy_profile or vacancy_text, resumes, keep_fraction, top_k
+    )
+    candidates = screened.keep
+
+    async def evaluate(index):
+        return await evaluate_resume(vacancy_text, resumes[index], client, prompt)
+
+    results: list[dict] = []
+    failed = 0
+    top_ids: list[int] = []
+    unchanged = 0
+    stopped_early = False
+
+    # aclosing: при ранней остановке bounded_map отменяет оставшиеся оценки
+    async with aclosing(bounded_map(iter_list(candidates), evaluate, concurrency)) as outcomes:
+        async for position, report in outcomes:
+            index = candidates[position]
+            if isinstance(report, Exception):
+                # сбой одной оценки не прерывает ранжирование
+                failed += 1
+                yield {"type": "error", "index": index, "error_message": str(report)}
+                continue
+            item = {"index": index, "score": extract_score(report), "evaluation": report}
+            results.append(item)
+            yield {"type": "result", **item}
+
+            results.sort(key=_sort_key)
+            new_top = [r["index"] for r in results[:top_k]]
+            unchanged = unchanged + 1 if new_top == top_ids else 0
+            top_ids = new_top
+
+            if len(results) + failed < len(candidates):
+                if len(results) >= top_k and all(r["score"] == MAX_SCORE for r in results[:top_k]):
+                    stopped_early = True
+                elif stable_after and len(results) >= top_k and unchanged >= stable_after:
+                    stopped_early = True
+                if stopped_early:
+                    break
+
+    skipped = len(candidates) - len(results) - failed
+    llm_calls_saved.inc(screened.dropped + skipped)
+    yield {
+        "type": "shortlist",
+        "items": results[:top_k],
+        "evaluated": len(results),
+        "failed": failed,
+        "skipped": skipped,
+        "prescreened_out": screened.dropped,
+        "llm_calls_saved": screened.dropped + skipped,
+        "stopped_early": stopped_early,
+    }
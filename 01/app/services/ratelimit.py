@@ -0,0 +1,193 @@
+import asyncio
+import math
+import re
+import time
+import weakref
+from contextlib import asynccontextmanager
+
+from app.config import OPENAI_RPM, OPENAI_TPM, LLM_RATE_MAX_WAIT
+from app.metrics import registry
+from app.profiling import record
+from app.services.budget import count_messages
+from app.services.limiter import LLMOverloaded
+from app.services.usage import record_usage
+
+rate_wait_seconds = registry.histogram("llm_rate_wait_seconds", "Ожидание квоты RPM/TPM перед вызовом LLM")
+rate_tokens = registry.counter("llm_rate_tokens_total", "Токены квоты: reserved — оценка, used — по usage ответа")
+rate_limited = registry.counter("llm_rate_limited_total", "Ответы 429 от upstream")
+rate_limit_gauge = registry.gauge("llm_rate_limit", "Текущие лимиты RPM/TPM (kind=requests|tokens)")
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(text: str) -> float:
+    """Длительность в формате заголовков x-ratelimit-reset-*: «1s», «6m0s», «20ms»."""
+    return sum(float(value) * _UNITS[unit] for value, unit in _DURATION_RE.findall(text or ""))
+
+
+def estimate_tokens(messages: list[dict], max_tokens: int, model: str | None = None) -> int:
+    """
+    Токены запроса: промпт по токенизатору модели (без модели или tiktoken —
+    оценкой по символам) плюс max_tokens — столько же резервирует и сам OpenAI.
+    """
+    return count_messages(messages, model) + max_tokens
+
+
+class TokenBucket:
+    """Корзина на минуту: ёмкость per_minute, пополняется равномерно."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / 60
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        self._refill()
+        # запрос больше ёмкости всё равно когда-то нужно пропустить
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= amount
+
+    def give(self, amount: float):
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+    def sync(self, limit: float, remaining: float):
+        """Подстраивается под фактическую квоту и остаток, которые сообщил upstream."""
+        self._refill()
+        self.capacity = float(limit)
+        self.level = min(self.level, float(remaining))
+
+
+class Reservation:
+    def __init__(self, scheduler: "RateScheduler", tokens: int, model: str | None = None):
+        self.scheduler = scheduler
+        self.tokens = tokens
+        self.model = model
+        self.settled = False
+
+    def settle(self, usage):
+        """
+        Сверяет резерв с usage ответа: излишек возвращается в корзину TPM.
+        Если известна модель, usage идёт и в счётчики токенов и стоимости.
+        """
+        total = getattr(usage, "total_tokens", None) if usage is not None else None
+        if total is None or self.settled:
+            return
+        self.settled = True
+        if self.model is not None:
+            record_usage(self.model, usage)
+        rate_tokens.inc(total, kind="used")
+        if self.scheduler.tokens is not None:
+            self.scheduler.tokens.give(self.tokens - total)
+
+
+class RateScheduler:
+    """
+    Клиентский планировщик квот OpenAI: перед вызовом резервирует 1 запрос
+    в корзине RPM и оценку токенов в корзине TPM, при нехватке ждёт
+    в порядке очереди. Дольше max_wait не ждёт — LLMOverloaded (503).
+    Лимиты берутся из OPENAI_RPM/OPENAI_TPM и подстраиваются по заголовкам
+    x-ratelimit-*; 0 — лимит неизвестен, пока его не сообщит upstream.
+    """
+
+    def __init__(self, rpm: int = OPENAI_RPM, tpm: int = OPENAI_TPM, max_wait: float = LLM_RATE_MAX_WAIT):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.max_wait = max_wait
+        self.paused_until = 0.0
+        # замок на каждый event loop (тесты и TestClient живут в разных циклах)
+        self._locks: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._publish()
+
+    def _publish(self):
+        if self.requests is not None:
+            rate_limit_gauge.set(self.requests.capacity, kind="requests")
+        if self.tokens is not None:
+            rate_limit_gauge.set(self.tokens.capacity, kind="tokens")
+
+    def wait_time(self, tokens: int) -> float:
+        wait = max(0.0, self.paused_until - time.monotonic())
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens))
+        return wait
+
+    async def _acquire(self, tokens: int):
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        started = time.monotonic()
+        # один ждущий за раз: квота раздаётся в порядке очереди, без гонки на пробуждении
+        async with lock:
+            while (wait := self.wait_time(tokens)) > 0:
+                waited = time.monotonic() - started
+                if waited + wait > self.max_wait:
+                    raise LLMOverloaded("rate_limit", math.ceil(wait))
+                await asyncio.sleep(wait)
+            if self.requests is not None:
+                self.requests.take(1)
+            if self.tokens is not None:
+                self.tokens.take(tokens)
+        rate_wait_seconds.observe(time.monotonic() - started)
+        record("rate_wait", time.monotonic() - started)
+        rate_tokens.inc(tokens, kind="reserved")
+
+    @asynccontextmanager
+    async def reserve(self, messages: list[dict], max_tokens: int, model: str | None = None):
+        """Резерв квоты на один вызов; после ответа вызовите reservation.settle(response.usage)."""
+        reservation = Reservation(self, estimate_tokens(messages, max_tokens, model), model)
+        await self._acquire(reservation.tokens)
+        try:
+            yield reservation
+        except BaseException:
+            # ответа нет — токены генерации не потрачены
+            if not reservation.settled and self.tokens is not None:
+                self.tokens.give(max_tokens)
+            raise
+
+    def update_from_headers(self, headers):
+        for kind in ("requests", "tokens"):
+            limit = headers.get(f"x-ratelimit-limit-{kind}")
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if not limit or remaining is None:
+                continue
+            bucket = getattr(self, kind)
+            if bucket is None:
+                bucket = TokenBucket(float(limit))
+                setattr(self, kind, bucket)
+            bucket.sync(float(limit), float(remaining))
+        self._publish()
+
+    def on_rate_limited(self, retry_after: float):
+        rate_limited.inc()
+        self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+    async def on_response(self, response):
+        """httpx response hook общего LLM клиента: читает x-ratelimit-* и 429."""
+        self.update_from_headers(response.headers)
+        if response.status_code == 429:
+            reset = response.headers.get("x-ratelimit-reset-requests") or response.headers.get("x-ratelimit-reset-tokens")
+            try:
+                retry_after = float(response.headers.get("retry-after", ""))
+            except ValueError:
+                retry_after = parse_duration(reset) or 1.0
+            self.on_rate_limited(retry_after)
+
+
+rate_scheduler = RateScheduler()
@@ -0,0 +1,204 @@
+import asyncio
+import math
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, TypeVar
+
+import openai
+
+from app.config import (
+    LLM_DEADLINES,
+    LLM_RETRY_ATTEMPTS,
+    LLM_RETRY_BASE,
+    LLM_RETRY_CAP,
+    LLM_RETRY_BUDGET,
+    LLM_HEDGE_ENABLED,
+    LLM_HEDGE_BUDGET,
+    LLM_HEDGE_QUANTILE,
+    LLM_HEDGE_MIN_SAMPLES,
+)
+from app.context import request_state
+from app.metrics import registry
+
+T = TypeVar("T")
+
+# временные сбои upstream, которые имеет смысл повторить
+TRANSIENT_ERRORS = (
+    openai.RateLimitError,
+    openai.InternalServerError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+)
+
+retries_total = registry.counter("llm_retries_total", "Повторы вызовов LLM после временной ошибки")
+retries_denied = registry.counter("llm_retries_denied_total", "Повторы, не сделанные из-за бюджета или дедлайна")
+deadline_exceeded = registry.counter("llm_deadline_exceeded_total", "Вызовы LLM, не уложившиеся в дедлайн запроса")
+hedges_total = registry.counter("llm_hedges_total", "Дублирующие (hedged) вызовы LLM")
+hedge_wins = registry.counter("llm_hedge_wins_total", "Hedged-вызовы по победителю: hedge — дубль ответил первым, primary — исходный")
+
+
+class DeadlineExceeded(Exception):
+    """Дедлайн запроса истёк до ответа LLM — отвечаем 504."""
+
+
+class Budget:
+    """
+    Бюджет дополнительной нагрузки: каждый обычный вызов добавляет ratio
+    токена (не больше burst), каждый повтор или дубль тратит один.
+    При ratio=0.1 лишних вызовов не больше ~10% от обычных.
+    """
+
+    def __init__(self, ratio: float, burst: float = 10):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = burst if ratio else 0.0
+
+    def deposit(self):
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class LatencyTracker:
+    """Скользящее окно задержек по видам вызовов, для порога hedging."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: dict[str, deque] = {}
+
+    def observe(self, kind: str, latency: float):
+        self._samples.setdefault(kind, deque(maxlen=self.window)).append(latency)
+
+    def quantile(self, kind: str, q: float, min_samples: int) -> float | None:
+        samples = self._samples.get(kind)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+
+def call_deadline(kind: str) -> float | None:
+    """
+    Дедлайн вызова (time.monotonic): дедлайн входящего запроса
+    (заголовок X-Request-Timeout) и таймаут вида вызова из LLM_DEADLINES — что раньше.
+    """
+    deadlines = [request_state().get("deadline")]
+    if kind.removesuffix("_stream") in LLM_DEADLINES:
+        deadlines.append(time.monotonic() + LLM_DEADLINES[kind.removesuffix("_stream")])
+    deadlines = [d for d in deadlines if d is not None]
+    return min(deadlines) if deadlines else None
+
+
+class Resilience:
+    """
+    Повторы с decorrelated jitter, дедлайны и hedging для вызовов LLM.
+
+    Повтор: пауза = min(cap, uniform(base, 3 × предыдущая)), не больше attempts
+    попыток, только если пауза укладывается в дедлайн и есть бюджет повторов.
+    Hedging (только для call(..., hedge=True) при hedge_enabled): если ответа нет
+    дольше p95 этого вида вызова, отправляется дубль и берётся первый ответ,
+    второй отменяется. Дубли ограничены своим бюджетом.
+    """
+
+    def __init__(
+        self,
+        attempts: int = LLM_RETRY_ATTEMPTS,
+        base: float = LLM_RETRY_BASE,
+        cap: float = LLM_RETRY_CAP,
+        retry_budget: float = LLM_RETRY_BUDGET,
+        hedge_enabled: bool = LLM_HEDGE_ENABLED,
+        hedge_budget: float = LLM_HEDGE_BUDGET,
+        hedge_quantile: float = LLM_HEDGE_QUANTILE,
+        hedge_min_samples: int = LLM_HEDGE_MIN_SAMPLES,
+    ):
+        self.attempts = attempts
+        self.base = base
+        self.cap = cap
+        self.retry_budget = Budget(retry_budget)
+        self.hedge_enabled = hedge_enabled
+        self.hedge_budget = Budget(hedge_budget)
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.latency = LatencyTracker()
+        self._rng = random.Random()
+
+    def next_sleep(self, previous: float) -> float:
+        return min(self.cap, self._rng.uniform(self.base, max(self.base, previous * 3)))
+
+    async def _attempt(self, kind: str, fn: Callable[[], Awaitable[T]], deadline: float | None) -> T:
+        started = time.monotonic()
+        try:
+            if deadline is None:
+                result = await fn()
+            else:
+                result = await asyncio.wait_for(fn(), max(0.0, deadline - started))
+        except asyncio.TimeoutError:
+            if deadline is not None and time.monotonic() >= deadline:
+                deadline_exceeded.inc(kind=kind)
+                raise DeadlineExceeded(f"LLM call '{kind}' exceeded the request deadline")
+            raise
+        self.latency.observe(kind, time.monotonic() - started)
+        return result
+
+    async def _hedged(self, kind: str, fn: Callable[[], Awaitable[T]], deadline: float | None) -> T:
+        delay = self.latency.quantile(kind, self.hedge_quantile, self.hedge_min_samples)
+        primary = asyncio.ensure_future(self._attempt(kind, fn, deadline))
+        if delay is None:
+            return await primary
+        hedge = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not self.hedge_budget.withdraw():
+                return await primary
+
+            hedges_total.inc(kind=kind)
+            hedge = asyncio.ensure_future(self._attempt(kind, fn, deadline))
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if not task.cancelled() and task.exception() is None:
+                        hedge_wins.inc(kind=kind, winner="hedge" if task is hedge else "primary")
+                        return task.result()
+            # оба упали — отдаём ошибку исходного вызова
+            return primary.result()
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+                    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def call(self, kind: str, fn: Callable[[], Awaitable[T]], hedge: bool = False) -> T:
+        """
+        Выполняет fn() — одну попытку вызова LLM — с повторами и дедлайном.
+        fn должна быть идемпотентной: при hedging она выполняется дважды.
+        """
+        deadline = call_deadline(kind)
+        self.retry_budget.deposit()
+        self.hedge_budget.deposit()
+        sleep = self.base
+        for attempt in range(1, self.attempts + 1):
+            try:
+                if hedge and self.hedge_enabled:
+                    return await self._hedged(kind, fn, deadline)
+                return await self._attempt(kind, fn, deadline)
+            except TRANSIENT_ERRORS as e:
+                if attempt == self.attempts:
+                    raise
+                sleep = self.next_sleep(sleep)
+                retry_after = getattr(getattr(e, "response", None), "headers", {}).get("retry-after")
+                if retry_after and retry_after.replace(".", "", 1).isdigit():
+                    sleep = max(sleep, float(retry_after))
+                if deadline is not None and time.monotonic() + sleep >= deadline or not self.retry_budget.withdraw():
+                    retries_denied.inc(kind=kind)
+                    raise
+                retries_total.inc(kind=kind, error=type(e).__name__)
+                await asyncio.sleep(sleep)
+
+
+llm_resilience = Resilience()
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import random
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, TypeVar
+
+from app.config import (
+    LLM_DEFAULT_MODEL,
+    LLM_ROUTES,
+    ROUTER_EXPLORE,
+    ROUTER_LOG_PATH,
+    ROUTER_MIN_CHARS,
+    ROUTER_PARSE_REQUIRED_FIELDS,
+)
+from app.context import set_response_header
+from app.metrics import registry
+from app.services.usage import track_cost
+
+T = TypeVar("T")
+
+model_seconds = registry.histogram("llm_model_seconds", "Длительность вызова модели в каскаде (kind, model)")
+model_calls = registry.counter("llm_model_calls_total", "Вызовы моделей каскада (kind, model, result=ok|escalated|error)")
+model_cost = registry.counter("llm_model_cost_usd_total", "Стоимость вызовов моделей каскада в $ (kind, model)")
+escalations = registry.counter("llm_escalations_total", "Переходы каскада к следующей модели (kind, reason)")
+
+
+class ModelRouter:
+    """
+    Каскад моделей по виду вызова: сначала первая модель маршрута, ответ
+    проверяется, при непрошедшей проверке (или невалидном ответе — ValueError)
+    вызывается следующая. Ответ последней модели возвращается без проверки.
+    Проверка — по признакам ответа (features): у разбора вакансии — заполненные
+    поля (filled), у текста — длина (chars). Признаки каждой попытки, задержка
+    и стоимость пишутся в журнал log_path: по нему benchmarks/replay_router
+    подбирает маршруты и пороги без вызовов LLM.
+    """
+
+    def __init__(
+        self,
+        routes: dict[str, list[str]] = LLM_ROUTES,
+        default: str = LLM_DEFAULT_MODEL,
+        required_fields: list[str] = ROUTER_PARSE_REQUIRED_FIELDS,
+        min_chars: dict[str, int] = ROUTER_MIN_CHARS,
+        log_path: str = ROUTER_LOG_PATH,
+        explore: float = ROUTER_EXPLORE,
+    ):
+        self.routes = routes
+        self.default = default
+        self.required_fields = required_fields
+        self.min_chars = min_chars
+        self.log_path = log_path
+        self.explore = explore
+        self._log_lock = threading.Lock()
+        self._explorations: set[asyncio.Task] = set()
+
+    def models(self, kind: str) -> list[str]:
+        return self.routes.get(kind) or [self.default]
+
+    def primary(self, kind: str) -> str:
+        """Первая модель маршрута: по ней считается бюджет промпта и идут потоковые ответы."""
+        return self.models(kind)[0]
+
+    def route_key(self, kind: str) -> str:
+        """Маршрут для ключа кеша: ответ каскада может прийти от любой его модели."""
+        return ">".join(self.models(kind))
+
+    def escalation_reason(self, kind: str, features: dict) -> str | None:
+        """Причина перейти к следующей модели; None — ответ принимается."""
+        if "error" in features:
+            return "invalid"
+        if "filled" in features and any(name not in features["filled"] for name in self.required_fields):
+            return "missing_fields"
+        if "chars" in features and features["chars"] < self.min_chars.get(kind, 0):
+            return "too_short"
+        return None
+
+    async def run(self, kind: str, call: Callable[[str], Awaitable[T]], features: Callable[[T], dict]) -> T:
+        """call(model) по моделям маршрута, пока features(ответ) не пройдёт проверку."""
+        models = self.models(kind)
+        run_id = uuid.uuid4().hex[:12]
+        for step, model in enumerate(models):
+            last = step == len(models) - 1
+            try:
+                result, seen = await self._attempt(kind, model, call, features, run_id, step)
+            except ValueError:
+                if last:
+                    model_calls.inc(kind=kind, model=model, result="error")
+                    raise
+                reason = "invalid"
+            else:
+                reason = None if last else self.escalation_reason(kind, seen)
+                if reason is None:
+                    model_calls.inc(kind=kind, model=model, result="ok")
+                    set_response_header("X-LLM-Model", model)
+                    if not last and self.explore and random.random() < self.explore:
+                        self._start_exploration(kind, models[step + 1:], call, features, run_id, step + 1)
+                    return result
+            model_calls.inc(kind=kind, model=model, result="escalated")
+            escalations.inc(kind=kind, reason=reason)
+
+    async def _attempt(
+        self, kind: str, model: str, call: Callable[[str], Awaitable[T]], features: Callable[[T], dict],
+        run_id: str, step: int, explore: bool = False,
+    ) -> tuple[T, dict]:
+        started = time.perf_counter()
+        seen = None
+        with track_cost() as spent:
+            try:
+                result = await call(model)
+                seen = features(result)
+            except ValueError as e:
+                seen = {"error": type(e).__name__}
+                raise
+            except BaseException:
+                model_calls.inc(kind=kind, model=model, result="error")
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                model_seconds.observe(elapsed, kind=kind, model=model)
+                model_cost.inc(spent[0], kind=kind, model=model)
+                if seen is not None:
+                    self._log(kind, model, run_id, step, seen, elapsed, spent[0], explore)
+        return result, seen
+
+    def _start_exploration(self, kind, models, call, features, run_id, step):
+        # ответ уже отдан; следующие модели спрашиваются в фоне только ради журнала
+        async def explore():
+            for offset, model in enumerate(models):
+                try:
+                    await self._attempt(kind, model, call, features, run_id, step + offset, explore=True)
+                except Exception:
+                    return
+
+        task = asyncio.ensure_future(explore())
+        self._explorations.add(task)
+        task.add_done_callback(self._explorations.discard)
+
+    def _log(self, kind: str, model: str, run_id: str, step: int, features: dict, seconds: float, cost: float, explore: bool):
+        if not self.log_path:
+            return
+        record: dict[str, Any] = {
+            "ts": time.time(), "run": run_id, "kind": kind, "step": step, "model": model,
+            "seconds": round(seconds, 4), "cost": cost, "features": features,
+        }
+        if explore:
+            record["explore"] = True
+        with self._log_lock, open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def text_features(content: str) -> dict:
+    return {"chars": len(content.strip())}
+
+
+model_router = ModelRouter()
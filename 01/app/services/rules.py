@@ -0,0 +1,355 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.models.vacancy import Vacancy
+
+# Быстрый разбор вакансий без LLM: подписанные строки шаблонных досок
+# («Должность: ...», «Зарплата: ...»), словарь навыков и нормализаторы
+# зарплаты/локации. Каждое поле получает оценку уверенности 0..1.
+
+LABELED = 0.95      # значение из подписанной строки
+PATTERN = 0.85      # однозначный шаблон в свободном тексте
+GAZETTEER = 0.8     # найдено словарём по всему тексту
+INFERRED = 0.6      # косвенный признак (опыт в годах, глагол «ищет»)
+
+LIST_FIELDS = ("skills", "requirements", "responsibilities")
+
+_LABELS = {
+    "job_title": ["должность", "вакансия", "позиция", "position", "job title", "title", "role"],
+    "company": ["компания", "работодатель", "company", "employer"],
+    "location": ["город", "локация", "местоположение", "место работы", "location", "city"],
+    "employment_type": ["тип занятости", "занятость", "employment type", "employment"],
+    "experience_level": ["уровень", "грейд", "level", "seniority", "grade"],
+    "salary": ["зарплата", "заработная плата", "оклад", "зп", "доход", "salary", "compensation"],
+    "skills": ["ключевые навыки", "навыки", "стек", "технологии", "skills", "tech stack", "stack"],
+    "description": ["описание", "о вакансии", "description", "about"],
+    "requirements": ["требования", "requirements"],
+    "responsibilities": ["обязанности", "задачи", "responsibilities"],
+}
+
+_LABEL_RE = re.compile(
+    r"^\s*(?:[-•*]\s*)?(?P<label>%s)\s*(?::|\s[-–—]\s)\s*(?P<rest>.*)$"
+    % "|".join(sorted((re.escape(label) for labels in _LABELS.values() for label in labels), key=len, reverse=True)),
+    re.IGNORECASE,
+)
+_LABEL_FIELD = {label: name for name, labels in _LABELS.items() for label in labels}
+_BULLET_RE = re.compile(r"^\s*(?:[-•*–—]|\d+[.)])\s*(.+)$")
+
+SKILLS = {
+    "Python": ["python", "питон"],
+    "Django": ["django"],
+    "FastAPI": ["fastapi"],
+    "Flask": ["flask"],
+    "asyncio": ["asyncio"],
+    "Celery": ["celery"],
+    "SQLAlchemy": ["sqlalchemy"],
+    "pandas": ["pandas"],
+    "NumPy": ["numpy"],
+    "PyTorch": ["pytorch"],
+    "TensorFlow": ["tensorflow"],
+    "scikit-learn": ["scikit-learn", "sklearn"],
+    "Airflow": ["airflow"],
+    "Spark": ["spark", "pyspark"],
+    "Java": ["java"],
+    "Kotlin": ["kotlin"],
+    "Spring": ["spring", "spring boot"],
+    "Go": ["golang"],
+    "Rust": ["rust"],
+    "C++": ["c++"],
+    "C#": ["c#"],
+    ".NET": [".net"],
+    "PHP": ["php"],
+    "Ruby": ["ruby"],
+    "JavaScript": ["javascript", "js"],
+    "TypeScript": ["typescript"],
+    "Node.js": ["node.js", "nodejs"],
+    "React": ["react", "react.js"],
+    "Vue": ["vue", "vue.js"],
+    "Angular": ["angular"],
+    "HTML": ["html", "html5"],
+    "CSS": ["css", "css3"],
+    "SQL": ["sql"],
+    "PostgreSQL": ["postgresql", "postgres", "постгрес"],
+    "MySQL": ["mysql"],
+    "MongoDB": ["mongodb", "mongo"],
+    "Redis": ["redis"],
+    "ClickHouse": ["clickhouse"],
+    "Elasticsearch": ["elasticsearch", "elastic"],
+    "Kafka": ["kafka"],
+    "RabbitMQ": ["rabbitmq"],
+    "REST API": ["rest api", "restful"],
+    "GraphQL": ["graphql"],
+    "gRPC": ["grpc"],
+    "Docker": ["docker"],
+    "Kubernetes": ["kubernetes", "k8s"],
+    "Terraform": ["terraform"],
+    "Ansible": ["ansible"],
+    "CI/CD": ["ci/cd"],
+    "Git": ["git"],
+    "Linux": ["linux"],
+    "Nginx": ["nginx"],
+    "AWS": ["aws"],
+    "GCP": ["gcp"],
+    "Azure": ["azure"],
+}
+# короткие имена, которые в обычном тексте совпадают со словами, — только с учётом регистра
+CASE_SENSITIVE_SKILLS = {"Go": ["Go"], "R": ["R"], "REST API": ["REST"]}
+# псевдонимы-слова («весной (spring)», «Go to office»): навык только в списке навыков,
+# в свободном тексте не считаются — иначе попали бы в быстрый путь и в merge с ответом LLM
+AMBIGUOUS_ALIASES = {"spring", "elastic", "Go", "R", "REST"}
+
+
+def _skills_re(aliases: dict[str, list[str]], flags: int) -> re.Pattern:
+    words = sorted((alias for names in aliases.values() for alias in names), key=len, reverse=True)
+    return re.compile(r"(?<![\w+#.])(%s)(?![\w+#]|\.\w)" % "|".join(map(re.escape, words)), flags)
+
+
+_SKILLS_RE = _skills_re(SKILLS, re.IGNORECASE)
+_SKILLS_CS_RE = _skills_re(CASE_SENSITIVE_SKILLS, 0)
+_SKILL_ALIASES = {alias: name for name, aliases in SKILLS.items() for alias in aliases}
+_SKILL_ALIASES_CS = {alias: name for name, aliases in CASE_SENSITIVE_SKILLS.items() for alias in aliases}
+
+
+def find_skills(text: str, ambiguous: bool = True) -> list[str]:
+    """
+    Навыки из словаря в порядке первого упоминания, имена приведены к каноническим.
+    ambiguous=False — без AMBIGUOUS_ALIASES (для свободного текста).
+    """
+    found = [(m.start(), m.group(1).lower(), _SKILL_ALIASES) for m in _SKILLS_RE.finditer(text)]
+    found += [(m.start(), m.group(1), _SKILL_ALIASES_CS) for m in _SKILLS_CS_RE.finditer(text)]
+    names = (aliases[alias] for _, alias, aliases in sorted(found) if ambiguous or alias not in AMBIGUOUS_ALIASES)
+    return list(dict.fromkeys(names))
+
+
+_CURRENCIES = [
+    (re.compile(r"руб|₽|^р\.?$|rub", re.IGNORECASE), "руб"),
+    (re.compile(r"\$|usd|долл", re.IGNORECASE), "USD"),
+    (re.compile(r"€|eur|евро", re.IGNORECASE), "EUR"),
+]
+_AMOUNT = r"\d{1,3}(?:[ \u00a0\u202f]\d{3})+|\d+(?:[.,]\d+)?"
+_SALARY_RE = re.compile(
+    r"(?P<before>[$€₽])?\s*(?P<prefix>от|до|from|up to)?\s*(?P<before2>[$€₽])?\s*"
+    r"(?P<low>%s)\s*(?P<low_mul>тыс\.?|к|k)?"
+    r"(?:\s*(?:-|–|—|до|to)\s*[$€₽]?\s*(?P<high>%s)\s*(?P<high_mul>тыс\.?|к|k)?)?"
+    r"\s*(?P<currency>руб\w*\.?|₽|р\.|rub|usd|\$|долл\w*\.?|€|eur|евро)?" % (_AMOUNT, _AMOUNT),
+    re.IGNORECASE,
+)
+
+
+def _amount(text: str, multiplier: str | None) -> int:
+    value = float(re.sub(r"[ \u00a0\u202f]", "", text).replace(",", "."))
+    return int(value * 1000 if multiplier else value)
+
+
+def normalize_salary(text: str, require_currency: bool = True) -> str | None:
+    """
+    «200 000–250 000 руб.» → «200000-250000 руб», «от 150к ₽» → «от 150000 руб»,
+    «$5,000 - $7,000» → «5000-7000 USD». Без валюты в свободном тексте не срабатывает.
+    """
+    for m in _SALARY_RE.finditer(text):
+        symbol = m.group("currency") or m.group("before") or m.group("before2")
+        if not symbol and require_currency:
+            continue
+        # «5,000» — разделитель тысяч, а не дробь
+        low_text = re.sub(r"(?<=\d),(?=\d{3}\b)", "", m.group("low"))
+        low = _amount(low_text, m.group("low_mul"))
+        currency = next((name for pattern, name in _CURRENCIES if symbol and pattern.search(symbol)), "")
+        if m.group("high"):
+            high_text = re.sub(r"(?<=\d),(?=\d{3}\b)", "", m.group("high"))
+            high = _amount(high_text, m.group("high_mul") or m.group("low_mul"))
+            amount = f"{low}-{high}"
+        else:
+            prefix = (m.group("prefix") or "").lower()
+            amount = {"from": "от", "up to": "до"}.get(prefix, prefix) + (" " if prefix else "") + str(low)
+        return f"{amount} {currency}".strip()
+    return None
+
+
+_REMOTE_RE = re.compile(r"удал[её]нн\w*|remote|дистанционн\w*", re.IGNORECASE)
+CITIES = {
+    "Москва": ["москва", "москве", "мск", "moscow"],
+    "Санкт-Петербург": ["санкт-петербург", "санкт-петербурге", "спб", "питер", "saint petersburg"],
+    "Новосибирск": ["новосибирск", "новосибирске"],
+    "Екатеринбург": ["екатеринбург", "екатеринбурге"],
+    "Казань": ["казань", "казани"],
+    "Нижний Новгород": ["нижний новгород", "нижнем новгороде"],
+    "Минск": ["минск", "минске"],
+    "Алматы": ["алматы"],
+}
+_CITY_RE = re.compile(
+    r"(?<!\w)(%s)(?!\w)" % "|".join(map(re.escape, sorted((a for v in CITIES.values() for a in v), key=len, reverse=True))),
+    re.IGNORECASE,
+)
+_CITY_ALIASES = {alias: city for city, aliases in CITIES.items() for alias in aliases}
+
+
+def normalize_location(text: str) -> tuple[str | None, float]:
+    """Локация и уверенность: «удалённо» или каноническое имя города."""
+    if _REMOTE_RE.search(text):
+        return "удалённо", PATTERN
+    match = _CITY_RE.search(text)
+    if match:
+        return _CITY_ALIASES[match.group(1).lower()], GAZETTEER
+    return None, 0.0
+
+
+_LEVELS = [
+    (re.compile(r"\b(?:team ?lead|tech ?lead|lead|тимлид|ведущ\w*)\b", re.IGNORECASE), "lead"),
+    (re.compile(r"\b(?:senior|сеньор|старш\w*)\b", re.IGNORECASE), "senior"),
+    (re.compile(r"\b(?:middle|мидл)\b", re.IGNORECASE), "middle"),
+    (re.compile(r"\b(?:junior|джун\w*|младш\w*)\b", re.IGNORECASE), "junior"),
+    (re.compile(r"\b(?:intern|стаж[её]р\w*)\b", re.IGNORECASE), "intern"),
+]
+_YEARS_RE = re.compile(r"опыт\w*[^.\n]{0,30}?(?:от|более|не менее|\b)\s*(\d+)\+?\s*(?:лет|год)|(\d+)\+?\s*years", re.IGNORECASE)
+
+
+def normalize_level(text: str) -> str | None:
+    return next((level for pattern, level in _LEVELS if pattern.search(text)), None)
+
+
+_EMPLOYMENT = [
+    (re.compile(r"полн\w* занятост\w*|полный (?:рабочий )?день|full[- ]time", re.IGNORECASE), "полная занятость"),
+    (re.compile(r"частичн\w* занятост\w*|неполный (?:рабочий )?день|part[- ]time", re.IGNORECASE), "частичная занятость"),
+    (re.compile(r"проектн\w* работ\w*|contract", re.IGNORECASE), "проектная работа"),
+    (re.compile(r"стажировк\w*|internship", re.IGNORECASE), "стажировка"),
+]
+
+
+def normalize_employment(text: str) -> str | None:
+    return next((kind for pattern, kind in _EMPLOYMENT if pattern.search(text)), None)
+
+
+# «Компания TechSolutions ищет Senior Python разработчика для ...»
+_HIRING_RE = re.compile(
+    r"(?:компания|company)\s+[«\"]?(?P<company>[\w.&' -]+?)[»\"]?\s+"
+    r"(?:ищет|в поиске|is hiring|is looking for|looking for)\s+(?P<title>[^.,;\n]+?)(?=\s+(?:для|в|на|for|to|with)\b|[.,;\n]|$)",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class RuleExtraction:
+    fields: dict[str, Any] = field(default_factory=dict)
+    confidence: dict[str, float] = field(default_factory=dict)
+
+    def put(self, name: str, value: Any, confidence: float):
+        # более надёжный источник вытесняет менее надёжный
+        if value and confidence > self.confidence.get(name, 0.0):
+            self.fields[name] = value
+            self.confidence[name] = confidence
+
+    def missing(self, required: list[str], threshold: float) -> list[str]:
+        """Поля из required, уверенность в которых ниже порога, — их должен дать LLM."""
+        return [name for name in required if self.confidence.get(name, 0.0) < threshold]
+
+    def to_vacancy(self) -> Vacancy:
+        return Vacancy(**{"job_title": "", "company": "", **self.fields})
+
+    def merge(self, vacancy: Vacancy, threshold: float) -> tuple[Vacancy, list[str]]:
+        """
+        Слияние с ответом LLM: уверенные поля правил заменяют значения LLM,
+        списки объединяются. Возвращает вакансию и поля, взятые из правил.
+        """
+        data = vacancy.model_dump()
+        taken = []
+        for name, value in self.fields.items():
+            if self.confidence[name] < threshold:
+                continue
+            if name in LIST_FIELDS:
+                seen = {item.lower() for item in value}
+                value = list(value) + [item for item in data[name] if item.lower() not in seen]
+            if value != data[name]:
+                data[name] = value
+                taken.append(name)
+        return Vacancy(**data), taken
+
+
+def _split_items(text: str, name: str) -> list[str]:
+    separators = r"[,;]" if name == "skills" else r";"
+    return [item.strip(" .") for item in re.split(separators, text) if item.strip(" .")]
+
+
+def _labeled(lines: list[str], result: RuleExtraction):
+    """Подписанные строки и списки под заголовками («Требования:» + пункты)."""
+    current = None
+    for line in lines:
+        match = _LABEL_RE.match(line)
+        if match:
+            current = _LABEL_FIELD[match.group("label").lower()]
+            rest = match.group("rest").strip()
+            if current in LIST_FIELDS:
+                result.fields.setdefault(current, [])
+                if rest:
+                    result.fields[current] += _split_items(rest, current)
+            elif rest:
+                result.put(current, rest, LABELED)
+                current = None
+            continue
+        if current is None:
+            continue
+        if current in LIST_FIELDS:
+            bullet = _BULLET_RE.match(line)
+            if bullet:
+                result.fields[current].append(bullet.group(1).strip(" .;"))
+            elif line.strip():
+                current = None
+        elif line.strip():
+            # «Описание:» с текстом на следующей строке
+            result.put(current, line.strip(), LABELED)
+            current = None
+
+    for name in LIST_FIELDS:
+        if result.fields.get(name):
+            result.confidence[name] = LABELED
+        else:
+            result.fields.pop(name, None)
+
+
+def extract_rules(description: str) -> RuleExtraction:
+    """
+    Разбор вакансии правилами. Подписанные строки дают уверенность LABELED,
+    шаблоны свободного текста — PATTERN/GAZETTEER, косвенные признаки — INFERRED.
+    """
+    result = RuleExtraction()
+    _labeled(description.splitlines(), result)
+
+    # подписанные значения приводим к общему виду
+    if "salary" in result.fields:
+        salary = normalize_salary(result.fields["salary"], require_currency=False)
+        result.fields["salary"] = salary or result.fields["salary"]
+    if "location" in result.fields:
+        location, _ = normalize_location(result.fields["location"])
+        result.fields["location"] = location or result.fields["location"].strip(" .")
+    if "experience_level" in result.fields:
+        result.fields["experience_level"] = normalize_level(result.fields["experience_level"]) or result.fields["experience_level"]
+    if "employment_type" in result.fields:
+        value = result.fields["employment_type"]
+        # на досках часто пишут просто «Занятость: полная»
+        result.fields["employment_type"] = normalize_employment(value) or normalize_employment(value + " занятость") or value
+    if "skills" in result.fields:
+        # известные навыки — в каноническом написании, прочие пункты как есть
+        skills = []
+        for item in result.fields["skills"]:
+            # «Python/Django» даёт два навыка, неизвестный пункт остаётся как есть
+            skills += find_skills(item) or [item]
+        result.fields["skills"] = list(dict.fromkeys(skills))
+
+    hiring = _HIRING_RE.search(description)
+    if hiring:
+        result.put("company", hiring.group("company").strip(), PATTERN)
+        result.put("job_title", hiring.group("title").strip(), INFERRED)
+
+    result.put("salary", normalize_salary(description), PATTERN)
+    location, confidence = normalize_location(description)
+    result.put("location", location, confidence)
+    result.put("employment_type", normalize_employment(description), PATTERN)
+    result.put("skills", find_skills(description, ambiguous=False), GAZETTEER)
+
+    level = normalize_level(result.fields.get("job_title", ""))
+    result.put("experience_level", level, PATTERN)
+    years = _YEARS_RE.search(description)
+    if years:
+        n = int(years.group(1) or years.group(2))
+        result.put("experience_level", "senior" if n >= 5 else "middle" if n >= 2 else "junior", INFERRED)
+    return result
@@ -0,0 +1,262 @@
+import importlib.util
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Iterator
+
+from app.metrics import registry
+from app.models.vacancy import Vacancy
+from app.services.rules import CASE_SENSITIVE_SKILLS, SKILLS
+
+# синонимы сверх словаря правил: русские написания, полные названия, варианты версий
+SYNONYMS = {
+    "Python": ["python3", "пайтон"],
+    "PostgreSQL": ["psql", "pgsql", "postgre sql"],
+    "Kubernetes": ["кубернетес", "openshift"],
+    "Docker": ["докер", "docker compose", "docker-compose"],
+    "JavaScript": ["ecmascript", "es6"],
+    "REST API": ["rest-api", "restful api"],
+    "CI/CD": ["ci / cd", "gitlab ci", "github actions", "jenkins"],
+    "Kafka": ["apache kafka", "кафка"],
+    "Spark": ["apache spark"],
+    "Airflow": ["apache airflow"],
+    "Elasticsearch": ["opensearch", "elk"],
+    "Linux": ["ubuntu", "debian", "centos"],
+    "Git": ["github", "gitlab", "bitbucket"],
+    "Machine Learning": ["machine learning", "машинное обучение", "ml"],
+    "SQL": ["t-sql", "pl/sql", "plpgsql"],
+}
+
+skills_scan_seconds = registry.histogram(
+    "skills_scan_seconds", "Длительность поиска навыков в тексте автоматом Ахо–Корасик",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1),
+)
+
+
+class AhoCorasick:
+    """
+    Автомат Ахо–Корасик: все шаблоны ищутся за один проход по тексту.
+    Переходы по failure-ссылкам свёрнуты заранее (полный ДКА), поэтому на символ
+    текста — один поиск в словаре. iter() отдаёт (конец совпадения, id шаблона).
+    """
+
+    def __init__(self, patterns: list[str]):
+        self.patterns = patterns
+        goto: list[dict[str, int]] = [{}]
+        out: list[tuple[int, ...]] = [()]
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = goto[state][ch] = len(goto)
+                    goto.append({})
+                    out.append(())
+                state = nxt
+            out[state] += (pattern_id,)
+
+        # обход в ширину: failure-ссылка состояния короче его самого и уже достроена
+        fail = [0] * len(goto)
+        delta: list[dict[str, int]] = [goto[0]] + [{}] * (len(goto) - 1)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            delta[state] = {**delta[fail[state]], **goto[state]}
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0) if state else 0
+                out[nxt] += out[fail[nxt]]
+                queue.append(nxt)
+        self._delta = delta
+        self._out = out
+
+    def iter(self, text: str) -> Iterator[tuple[int, int]]:
+        delta, out = self._delta, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                for pattern_id in out[state]:
+                    yield i + 1, pattern_id
+
+
+class _NativeAhoCorasick:
+    """Тот же интерфейс поверх pyahocorasick (C), если пакет установлен."""
+
+    def __init__(self, patterns: list[str]):
+        import ahocorasick
+
+        self.patterns = patterns
+        self._automaton = ahocorasick.Automaton()
+        for pattern_id, pattern in enumerate(patterns):
+            self._automaton.add_word(pattern, pattern_id)
+        self._automaton.make_automaton()
+
+    def iter(self, text: str) -> Iterator[tuple[int, int]]:
+        for end, pattern_id in self._automaton.iter(text):
+            yield end + 1, pattern_id
+
+
+def build_automaton(patterns: list[str]) -> "AhoCorasick | _NativeAhoCorasick":
+    if importlib.util.find_spec("ahocorasick") is not None:
+        return _NativeAhoCorasick(patterns)
+    return AhoCorasick(patterns)
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _lower(text: str) -> str:
+    # позиции совпадений должны совпадать с исходным текстом: символы, которые
+    # при lower() меняют длину (İ), оставляем как есть
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(low if len(low) == 1 else ch for ch, low in zip(text, map(str.lower, text)))
+
+
+@dataclass
+class SkillMention:
+    skill: str
+    start: int
+    end: int
+
+
+class SkillMatcher:
+    """
+    Поиск навыков по словарю с синонимами: все написания всех навыков
+    ищутся одним проходом автомата по тексту в нижнем регистре. Граница
+    слова — как у правил (app.services.rules): «Java» не находится в «JavaScript»,
+    «.NET» — в «ASP.NET». Короткие имена (Go, R) совпадают только с учётом регистра.
+    """
+
+    def __init__(
+        self,
+        skills: dict[str, list[str]] = SKILLS,
+        synonyms: dict[str, list[str]] = SYNONYMS,
+        case_sensitive: dict[str, list[str]] = CASE_SENSITIVE_SKILLS,
+    ):
+        aliases: dict[str, tuple[str, str | None]] = {}
+        for source in (skills, synonyms):
+            for name, names in source.items():
+                # само имя — тоже написание, кроме коротких (Go): они ищутся с учётом регистра
+                for alias in names if name in case_sensitive else (name, *names):
+                    aliases.setdefault(alias.lower(), (name, None))
+        for name, names in case_sensitive.items():
+            for alias in names:
+                aliases.setdefault(alias.lower(), (name, alias))
+        self.names = set(skills) | set(synonyms) | set(case_sensitive)
+        patterns = list(aliases)
+        self._skill = [aliases[pattern][0] for pattern in patterns]
+        self._exact = [aliases[pattern][1] for pattern in patterns]
+        self._automaton = build_automaton(patterns)
+
+    def scan(self, text: str) -> list[SkillMention]:
+        """Упоминания навыков в порядке текста; вложенные в более длинное совпадение отбрасываются."""
+        mentions = []
+        for end, pattern_id in self._automaton.iter(_lower(text)):
+            start = end - len(self._automaton.patterns[pattern_id])
+            if start > 0 and (_is_word(text[start - 1]) or text[start - 1] in "+#."):
+                continue
+            if end < len(text) and (
+                _is_word(text[end]) or text[end] in "+#"
+                or (text[end] == "." and end + 1 < len(text) and _is_word(text[end + 1]))
+            ):
+                continue
+            exact = self._exact[pattern_id]
+            if exact is not None and text[start:end] != exact:
+                continue
+            mentions.append(SkillMention(self._skill[pattern_id], start, end))
+        mentions.sort(key=lambda m: (m.start, -m.end))
+        result, last_end = [], 0
+        for mention in mentions:
+            if mention.start >= last_end:
+                result.append(mention)
+                last_end = mention.end
+        return result
+
+    def find(self, text: str) -> dict[str, list[tuple[int, int]]]:
+        """Навык -> позиции (начало, конец) в порядке первого упоминания."""
+        started = time.perf_counter()
+        found: dict[str, list[tuple[int, int]]] = {}
+        for mention in self.scan(text):
+            found.setdefault(mention.skill, []).append((mention.start, mention.end))
+        skills_scan_seconds.observe(time.perf_counter() - started)
+        return found
+
+    def canonical(self, phrase: str) -> list[str]:
+        """Канонические имена навыков, названных во фразе («знание Postgres» -> PostgreSQL)."""
+        return list(dict.fromkeys(mention.skill for mention in self.scan(phrase)))
+
+
+@dataclass
+class SkillsGap:
+    required: list[str]
+    matched: dict[str, list[tuple[int, int]]]
+    missing: list[str]
+
+    @property
+    def coverage(self) -> float:
+        return len(self.matched) / len(self.required) if self.required else 1.0
+
+    def to_dict(self) -> dict:
+        return {
+            "required": self.required,
+            "matched": [{"skill": skill, "positions": positions} for skill, positions in self.matched.items()],
+            "missing": self.missing,
+            "coverage": round(self.coverage, 3),
+        }
+
+    def prompt_note(self) -> str:
+        """Блок для промпта оценки: навыки уже сверены локально, LLM их не перепроверяет."""
+        if not self.required:
+            return ""
+        return (
+            "Навыки из вакансии уже сверены с резюме по словарю (повторно не проверяй, используй в отчёте):\n"
+            f"- есть в резюме: {', '.join(self.matched) or 'нет'}\n"
+            f"- не найдены: {', '.join(self.missing) or 'нет'}"
+        )
+
+
+def _literal_positions(text: str, skill: str) -> list[tuple[int, int]]:
+    pattern = re.compile(r"(?<![\w+#.])%s(?![\w+#]|\.\w)" % re.escape(skill.strip()), re.IGNORECASE)
+    return [match.span() for match in pattern.finditer(text)]
+
+
+def required_skills(vacancy: Vacancy | str, matcher: SkillMatcher) -> list[str]:
+    """
+    Навыки вакансии: из текста — все навыки словаря; из разобранной вакансии —
+    skills (приведённые к каноническим именам, вне словаря — как есть)
+    и навыки словаря, названные в requirements.
+    """
+    if isinstance(vacancy, str):
+        return list(matcher.find(vacancy))
+    names: list[str] = []
+    for skill in vacancy.skills:
+        names += matcher.canonical(skill) or ([skill.strip()] if skill.strip() else [])
+    for requirement in vacancy.requirements:
+        names += matcher.canonical(requirement)
+    return list(dict.fromkeys(names))
+
+
+def skills_gap(vacancy: Vacancy | str, resume: str, matcher: SkillMatcher | None = None) -> SkillsGap:
+    """
+    Какие навыки вакансии есть в резюме (с позициями) и каких нет — без LLM.
+    Резюме просматривается автоматом один раз; навыки вне словаря ищутся как фраза.
+    """
+    matcher = matcher or skill_matcher
+    required = required_skills(vacancy, matcher)
+    found = matcher.find(resume)
+    matched: dict[str, list[tuple[int, int]]] = {}
+    missing: list[str] = []
+    for skill in required:
+        positions = found.get(skill) if skill in matcher.names else _literal_positions(resume, skill)
+        if positions:
+            matched[skill] = positions
+        else:
+            missing.append(skill)
+    return SkillsGap(required, matched, missing)
+
+
+skill_matcher = SkillMatcher()
@@ -0,0 +1,296 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Callable, TypeVar
+
+from app.config import CACHE_NONDETERMINISTIC, STORE_DB_PATH, STORE_ENABLED
+from app.context import set_response_header
+from app.metrics import registry
+from app.models.vacancy import Vacancy
+from app.services.cache import canonicalize
+
+T = TypeVar("T")
+
+store_lookups = registry.counter("store_lookups_total", "Поиск в хранилище по хешу содержимого (kind, result=hit|miss)")
+store_errors = registry.counter("store_errors_total", "Ошибки SQLite хранилища; запрос при этом обслуживается без него")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vacancies (
+    id INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL,
+    company TEXT,
+    experience_level TEXT,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS vacancies_company ON vacancies (company, id);
+CREATE INDEX IF NOT EXISTS vacancies_experience_level ON vacancies (experience_level, id);
+CREATE TABLE IF NOT EXISTS vacancy_skills (
+    skill TEXT NOT NULL,
+    vacancy_id INTEGER NOT NULL REFERENCES vacancies (id) ON DELETE CASCADE,
+    PRIMARY KEY (skill, vacancy_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS descriptions (
+    id INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL UNIQUE,
+    prompt_version TEXT NOT NULL,
+    input TEXT NOT NULL,
+    text TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS evaluations (
+    id INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL UNIQUE,
+    prompt_version TEXT NOT NULL,
+    vacancy_hash TEXT NOT NULL,
+    resume_hash TEXT NOT NULL,
+    report TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS evaluations_vacancy ON evaluations (vacancy_hash, id);
+"""
+
+
+def content_hash(*parts) -> str:
+    """Хеш нормализованного содержимого (как ключ кеша): пробелы и Unicode-формы (NFKC) не важны, регистр важен."""
+    return hashlib.sha256("\x1f".join(canonicalize(part) for part in parts).encode("utf-8")).hexdigest()
+
+
+def _norm(value: str | None) -> str | None:
+    return " ".join(value.casefold().split()) if value else None
+
+
+class VacancyStore:
+    """
+    Постоянное хранилище результатов в SQLite: разобранные вакансии,
+    сгенерированные описания и оценки резюме. Записи ключуются хешем
+    содержимого запроса, версии промпта и маршрута моделей — повтор того же
+    входа отдаётся без вызова LLM. Ответы с temperature > 0 (описания, оценки)
+    сохраняются всегда, а повторно отдаются, как и из кеша, только при
+    nondeterministic (CACHE_NONDETERMINISTIC=1).
+    Вакансии индексируются по company, experience_level и навыкам,
+    списки отдаются с keyset-пагинацией (after=id последней записи).
+    Запросы выполняются вне event loop; сбой SQLite не ломает сам запрос.
+    """
+
+    def __init__(self, path: str = STORE_DB_PATH, enabled: bool = STORE_ENABLED, nondeterministic: bool = CACHE_NONDETERMINISTIC):
+        self.path = path
+        self.enabled = enabled
+        self.nondeterministic = nondeterministic
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # открываем лениво: TestClient без lifespan тоже пишет в хранилище
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, fn: Callable[..., T], *args) -> T | None:
+        if not self.enabled:
+            return None
+        try:
+            return await asyncio.to_thread(fn, *args)
+        except sqlite3.Error:
+            store_errors.inc()
+            return None
+
+    def reuses(self, temperature: float) -> bool:
+        # случайный ответ, отданный вместо новых, подменил бы все следующие генерации
+        return self.enabled and (temperature == 0 or self.nondeterministic)
+
+    # --- вакансии ---
+
+    def _find_vacancy(self, key: str) -> tuple[int, Vacancy] | None:
+        with self._lock:
+            row = self.conn.execute("SELECT id, data FROM vacancies WHERE content_hash = ?", (key,)).fetchone()
+        return (row["id"], Vacancy.model_validate_json(row["data"])) if row else None
+
+    def _save_vacancy(self, key: str, vacancy: Vacancy, source: str) -> int:
+        with self._lock:
+            conn = self.conn
+            cursor = conn.execute(
+                """INSERT INTO vacancies (content_hash, source, company, experience_level, data, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (content_hash) DO NOTHING""",
+                (key, source, _norm(vacancy.company), _norm(vacancy.experience_level), vacancy.model_dump_json(), time.time()),
+            )
+            if cursor.rowcount:
+                vacancy_id = cursor.lastrowid
+                conn.executemany(
+                    "INSERT OR IGNORE INTO vacancy_skills (skill, vacancy_id) VALUES (?, ?)",
+                    [(_norm(skill), vacancy_id) for skill in vacancy.skills if skill.strip()],
+                )
+            else:
+                # тот же текст уже сохранил параллельный запрос
+                vacancy_id = conn.execute("SELECT id FROM vacancies WHERE content_hash = ?", (key,)).fetchone()[0]
+            conn.commit()
+        return vacancy_id
+
+    async def find_vacancy(self, description: str, prompt_version: str, model: str) -> Vacancy | None:
+        found = await self._run(self._find_vacancy, content_hash(description, prompt_version, model))
+        store_lookups.inc(kind="vacancy", result="hit" if found else "miss")
+        if found is None:
+            return None
+        set_response_header("X-Vacancy-Id", str(found[0]))
+        return found[1]
+
+    async def save_vacancy(
+        self, description: str, prompt_version: str, model: str, vacancy: Vacancy, source: str
+    ) -> int | None:
+        key = content_hash(description, prompt_version, model)
+        vacancy_id = await self._run(self._save_vacancy, key, vacancy, source)
+        if vacancy_id is not None:
+            set_response_header("X-Vacancy-Id", str(vacancy_id))
+        return vacancy_id
+
+    def _get_vacancy(self, vacancy_id: int) -> dict | None:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT id, source, data, created_at FROM vacancies WHERE id = ?", (vacancy_id,)
+            ).fetchone()
+        return self._vacancy_row(row) if row else None
+
+    async def get_vacancy(self, vacancy_id: int) -> dict | None:
+        return await self._run(self._get_vacancy, vacancy_id)
+
+    @staticmethod
+    def _vacancy_row(row: sqlite3.Row) -> dict:
+        return {"id": row["id"], "source": row["source"], "created_at": row["created_at"], "vacancy": json.loads(row["data"])}
+
+    def _list_vacancies(
+        self, company: str | None, skill: str | None, experience_level: str | None, after: int, limit: int
+    ) -> tuple[list[dict], int | None]:
+        where, params = ["v.id > ?"], [after]
+        if company:
+            where.append("v.company = ?")
+            params.append(_norm(company))
+        if experience_level:
+            where.append("v.experience_level = ?")
+            params.append(_norm(experience_level))
+        source = "vacancies v"
+        if skill:
+            # навык — по индексу vacancy_skills (skill, vacancy_id), дальше по первичному ключу
+            source = "vacancy_skills s JOIN vacancies v ON v.id = s.vacancy_id"
+            where.append("s.skill = ?")
+            params.append(_norm(skill))
+        sql = (
+            f"SELECT v.id, v.source, v.data, v.created_at FROM {source} "
+            f"WHERE {' AND '.join(where)} ORDER BY v.id LIMIT ?"
+        )
+        with self._lock:
+            rows = self.conn.execute(sql, (*params, limit + 1)).fetchall()
+        return self._page([self._vacancy_row(row) for row in rows], limit)
+
+    async def list_vacancies(
+        self,
+        company: str | None = None,
+        skill: str | None = None,
+        experience_level: str | None = None,
+        after: int = 0,
+        limit: int = 50,
+    ) -> tuple[list[dict], int | None]:
+        """Страница вакансий после id=after и id для следующей страницы (None — страниц больше нет)."""
+        page = await self._run(self._list_vacancies, company, skill, experience_level, after, limit)
+        return page if page is not None else ([], None)
+
+    @staticmethod
+    def _page(items: list[dict], limit: int) -> tuple[list[dict], int | None]:
+        # запрашиваем на одну запись больше — так без COUNT видно, есть ли следующая страница
+        if len(items) > limit:
+            return items[:limit], items[limit - 1]["id"]
+        return items, None
+
+    # --- описания и оценки ---
+
+    def _find_text(self, table: str, column: str, key: str) -> str | None:
+        with self._lock:
+            row = self.conn.execute(f"SELECT {column} FROM {table} WHERE content_hash = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    async def _lookup(self, kind: str, table: str, column: str, key: str) -> str | None:
+        found = await self._run(self._find_text, table, column, key)
+        store_lookups.inc(kind=kind, result="hit" if found is not None else "miss")
+        return found
+
+    async def find_description(self, vacancy_data: dict, prompt_version: str, model: str, temperature: float) -> str | None:
+        if not self.reuses(temperature):
+            return None
+        key = content_hash(vacancy_data, prompt_version, model)
+        return await self._lookup("description", "descriptions", "text", key)
+
+    def _save_description(self, vacancy_data: dict, prompt_version: str, model: str, text: str):
+        with self._lock:
+            self.conn.execute(
+                """INSERT INTO descriptions (content_hash, prompt_version, input, text, created_at)
+                   VALUES (?, ?, ?, ?, ?) ON CONFLICT (content_hash) DO NOTHING""",
+                (content_hash(vacancy_data, prompt_version, model), prompt_version,
+                 json.dumps(vacancy_data, ensure_ascii=False), text, time.time()),
+            )
+            self.conn.commit()
+
+    async def save_description(self, vacancy_data: dict, prompt_version: str, model: str, text: str):
+        await self._run(self._save_description, vacancy_data, prompt_version, model, text)
+
+    async def find_evaluation(
+        self, vacancy_text: str, resume_text: str, prompt_version: str, model: str, temperature: float
+    ) -> str | None:
+        if not self.reuses(temperature):
+            return None
+        key = content_hash(vacancy_text, resume_text, prompt_version, model)
+        return await self._lookup("evaluation", "evaluations", "report", key)
+
+    def _save_evaluation(self, vacancy_text: str, resume_text: str, prompt_version: str, model: str, report: str):
+        with self._lock:
+            self.conn.execute(
+                """INSERT INTO evaluations (content_hash, prompt_version, vacancy_hash, resume_hash, report, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (content_hash) DO NOTHING""",
+                (content_hash(vacancy_text, resume_text, prompt_version, model), prompt_version,
+                 content_hash(vacancy_text), content_hash(resume_text), report, time.time()),
+            )
+            self.conn.commit()
+
+    async def save_evaluation(self, vacancy_text: str, resume_text: str, prompt_version: str, model: str, report: str):
+        await self._run(self._save_evaluation, vacancy_text, resume_text, prompt_version, model, report)
+
+    def _list(self, table: str, columns: str, where: str, params: tuple, after: int, limit: int) -> tuple[list[dict], int | None]:
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT id, {columns} FROM {table} WHERE id > ? {where} ORDER BY id LIMIT ?",
+                (after, *params, limit + 1),
+            ).fetchall()
+        return self._page([dict(row) for row in rows], limit)
+
+    async def list_descriptions(self, after: int = 0, limit: int = 50) -> tuple[list[dict], int | None]:
+        page = await self._run(self._list, "descriptions", "prompt_version, input, text, created_at", "", (), after, limit)
+        if page is None:
+            return [], None
+        for item in page[0]:
+            item["input"] = json.loads(item["input"])
+        return page
+
+    async def list_evaluations(self, vacancy: str | None = None, after: int = 0, limit: int = 50) -> tuple[list[dict], int | None]:
+        """Оценки (все или по тексту вакансии — через индекс vacancy_hash)."""
+        where, params = ("AND vacancy_hash = ?", (content_hash(vacancy),)) if vacancy else ("", ())
+        columns = "prompt_version, vacancy_hash, resume_hash, report, created_at"
+        page = await self._run(self._list, "evaluations", columns, where, params, after, limit)
+        return page if page is not None else ([], None)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+vacancy_store = VacancyStore()
+
@@ -0,0 +1,66 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from app.config import LLM_PRICES
+from app.context import request_state, set_response_header
+from app.metrics import registry
+
+llm_tokens = registry.counter("llm_tokens_total", "Токены LLM по usage ответов (type=prompt|completion)")
+llm_cost = registry.counter("llm_cost_usd_total", "Оценка стоимости вызовов LLM в долларах по LLM_PRICES")
+
+_cost_sink: ContextVar[list[float] | None] = ContextVar("cost_sink", default=None)
+
+
+def model_setting(table: dict, model: str):
+    """Настройка модели из таблицы конфига; снапшоты вида gpt-4o-mini-2024-07-18 — по самому длинному префиксу."""
+    matches = [name for name in table if model.startswith(name)]
+    return table[max(matches, key=len)] if matches else None
+
+
+def model_prices(model: str) -> tuple[float, float] | None:
+    """Цены за 1M токенов: (вход, выход)."""
+    return model_setting(LLM_PRICES, model)
+
+
+def usage_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float | None:
+    prices = model_prices(model)
+    if prices is None:
+        return None
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+@contextmanager
+def track_cost():
+    """Стоимость вызовов LLM внутри блока, включая задачи, запущенные из него: spent[0]."""
+    spent = [0.0]
+    token = _cost_sink.set(spent)
+    try:
+        yield spent
+    finally:
+        _cost_sink.reset(token)
+
+
+def record_usage(model: str, usage):
+    """
+    Учитывает usage ответа LLM: счётчики токенов и стоимости по модели,
+    итог запроса — в заголовках X-LLM-Tokens и X-LLM-Cost.
+    """
+    if usage is None:
+        return
+    prompt = getattr(usage, "prompt_tokens", 0) or 0
+    completion = getattr(usage, "completion_tokens", 0) or 0
+    llm_tokens.inc(prompt, model=model, type="prompt")
+    llm_tokens.inc(completion, model=model, type="completion")
+    cost = usage_cost(model, prompt, completion)
+    if cost is not None:
+        llm_cost.inc(cost, model=model)
+        sink = _cost_sink.get()
+        if sink is not None:
+            sink[0] += cost
+
+    totals = request_state().setdefault("usage", {"prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0})
+    totals["prompt_tokens"] += prompt
+    totals["completion_tokens"] += completion
+    totals["cost"] += cost or 0.0
+    set_response_header("X-LLM-Tokens", str(totals["prompt_tokens"] + totals["completion_tokens"]))
+    set_response_header("X-LLM-Cost", f"{totals['cost']:.6f}")
@@ -1,14 +1,40 @@
-import json
-from openai import OpenAI
+import asyncio
+import difflib
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable
 from openai import AsyncOpenAI
+from app.config import (
+    DEDUP_DIFF_THRESHOLD,
+    DEDUP_ENABLED,
+    DEDUP_REUSE_THRESHOLD,
+    EVALUATE_CHUNK_CONCURRENCY,
+    EVALUATE_CHUNK_THRESHOLD,
+    EVALUATE_CHUNK_TOKENS,
+    LLM_MAX_TOKENS,
+    RULES_CONFIDENCE_THRESHOLD,
+    RULES_ENABLED,
+    RULES_REQUIRED_FIELDS,
+    SKILLS_GAP_IN_PROMPT,
+)
+from app.context import set_response_header
+from app.metrics import registry
 from app.models.vacancy import Vacancy
-from app.config import OPENAI_API_KEY
-from app.config import OPENAI_API_BASE
+from app.profiling import record, span
+from app.services.budget import PromptTooLarge, prompt_budget, token_counter
+from app.services.cache import canonicalize, completion_cache
+from app.services.chunking import chunk_text
+from app.services.dedup import generate_index, parse_index
+from app.services.extraction import extract_vacancy_json
+from app.services.limiter import LLMOverloaded, llm_limiter
+from app.services.ratelimit import rate_scheduler
+from app.services.resilience import DeadlineExceeded, llm_resilience
+from app.services.prompts import Prompt, prompt_store, prompt_version
+from app.services.router import model_router, text_features
+from app.services.rules import extract_rules
+from app.services.skills import skills_gap
+from app.services.store import vacancy_store
 
-client = OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_API_BASE)
-
-def parse_vacancy(description: str) -> Vacancy | dict:
-    prompt = f"""
+PARSE_PROMPT = """
     Extract the following structured JSON fields from the job description:
 
     - job_title
@@ -27,50 +53,535 @@ def parse_vacancy(description: str) -> Vacancy | dict:
 
     Respond only with valid JSON following the schema.
     """
+PARSE_PROMPT_VERSION = prompt_version(PARSE_PROMPT)
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0
+# почти-дубликат уже разобранной вакансии: в LLM уходит прошлый разбор и diff текста
+UPDATE_PROMPT = """
+    A job description was already parsed into this JSON:
+    {previous}
+
+    The description has since changed. Unified diff of the changes
+    (lines starting with "-" were removed, "+" were added):
+    {diff}
+
+    Apply the changes and return the full updated JSON with the same fields.
+    Respond only with valid JSON following the schema.
+    """
+
+# map-шаг оценки длинного резюме: в промпте нет номера раздела, чтобы выжимка
+# раздела переиспользовалась из кеша, когда в резюме меняются другие разделы
+CHUNK_PROMPT = """Вакансия:
+{vacancy}
+
+Фрагмент резюме:
+{chunk}
+
+Это только часть резюме. Кратко, списком выпиши из фрагмента всё, что важно для оценки
+по вакансии: навыки, опыт, образование, какие требования вакансии он закрывает, риски.
+Итоговую оценку не ставь."""
+CHUNK_PROMPT_VERSION = prompt_version(CHUNK_PROMPT)
+
+
+class SingleFlight:
+    """
+    Склеивает одинаковые одновременные запросы к LLM: первый запрос
+    делает вызов, остальные ждут его результат. Вызов идёт в отдельной
+    задаче, поэтому отмена первого клиента не обрывает ожидание остальных;
+    когда отменились все ожидающие, отменяется и сам вызов.
+    """
+
+    def __init__(self):
+        self._pending: dict[str, asyncio.Task] = {}
+        self._waiters: dict[str, int] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[str]]) -> str:
+        task = self._pending.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._pending[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._pending.get(key) is task:
+                self._waiters[key] -= 1
+                if self._waiters[key] == 0:
+                    task.cancel()
+            raise
+
+    def _finish(self, key: str, task: asyncio.Task):
+        self._pending.pop(key, None)
+        self._waiters.pop(key, None)
+        # исключение заберут ожидающие; помечаем его полученным, даже если все отменились
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._pending)}
+
+
+inflight = SingleFlight()
+
+stream_ttfb = registry.histogram("llm_stream_ttfb_seconds", "Время до первого токена потокового ответа LLM")
+stream_cancelled = registry.counter("llm_stream_cancelled_total", "Потоки, прерванные отключением клиента")
+parse_source = registry.counter(
+    "vacancy_parse_source_total", "Разобранные вакансии по источнику: store, rules, near_duplicate, diff, llm, merged"
+)
+near_dup_lookups = registry.counter(
+    "near_dup_lookups_total", "Поиск почти-дубликатов (kind, result=reuse|diff|miss)"
+)
+llm_calls_avoided = registry.counter("vacancy_parse_llm_avoided_total", "Вакансии, разобранные правилами без вызова LLM")
+evaluate_chunks = registry.histogram(
+    "evaluate_chunks", "Число разделов длинного резюме при map-reduce оценке", buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+chunk_reused = registry.counter("evaluate_chunk_reused_total", "Выжимки разделов резюме, взятые из кеша")
+
+
+async def _complete(client: AsyncOpenAI, key: str, messages: list[dict], temperature: float, endpoint: str) -> str:
+    # одинаковые одновременные вызовы (тот же ключ кеша) идут в LLM один раз
+    async def attempt(model: str) -> str:
+        async with rate_scheduler.reserve(messages, LLM_MAX_TOKENS, model) as reservation, llm_limiter.slot(endpoint):
+            with span("llm"):
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=LLM_MAX_TOKENS
+                )
+            reservation.settle(getattr(response, "usage", None))
+        return response.choices[0].message.content
+
+    # модели маршрута endpoint по очереди, пока ответ не пройдёт проверку
+    return await inflight.do(key, lambda: model_router.run(
+        endpoint, lambda model: llm_resilience.call(endpoint, lambda: attempt(model), hedge=True), text_features
+    ))
+
+
+def vacancy_features(content: str) -> dict:
+    """Признаки разбора для каскада моделей: какие поля Vacancy заполнены."""
+    vacancy = Vacancy.model_validate_json(content)
+    return {"filled": [name for name, value in vacancy if value not in (None, "", [])]}
+
+
+async def _parse_with_llm(
+    description: str,
+    client: AsyncOpenAI,
+    on_field: Callable[[str, Any], None] | None,
+) -> Vacancy:
+    # слишком длинное описание обрезается (или отклоняется) до вызова LLM
+    with span("prompt"):
+        messages = prompt_budget.fit(
+            lambda text: [{"role": "user", "content": PARSE_PROMPT.format(description=text)}],
+            description, model_router.primary("parse"), LLM_MAX_TOKENS,
+        )
+        prompt = messages[0]["content"]
+    # детерминированный вызов (temperature=0) — сначала смотрим в кеш
+    key = completion_cache.make_key(
+        input=description, prompt_version=PARSE_PROMPT_VERSION, model=model_router.route_key("parse"), temperature=0
+    )
+    content = await completion_cache.get(key, 0)
+    if content is not None:
+        with span("parse"):
+            vacancy = Vacancy.model_validate_json(content)
+        if on_field is not None:
+            for name, value in vacancy:
+                on_field(name, value)
+        return vacancy
+
+    if on_field is None:
+        content = await inflight.do(key, lambda: model_router.run(
+            "parse", lambda model: extract_vacancy_json(client, model, prompt), vacancy_features
+        ))
+    else:
+        # поля нужны по мере генерации — такой вызов не склеиваем с другими;
+        # после перехода к следующей модели её поля отдаются заново и заменяют прежние
+        content = await model_router.run(
+            "parse", lambda model: extract_vacancy_json(client, model, prompt, on_field), vacancy_features
+        )
+    with span("parse"):
+        vacancy = Vacancy.model_validate_json(content)
+    # в кеш попадают только ответы, прошедшие валидацию
+    await completion_cache.set(key, content, 0)
+    return vacancy
+
+
+def _text_diff(previous: str, description: str) -> str:
+    lines = difflib.unified_diff(previous.splitlines(), description.splitlines(), lineterm="", n=0)
+    # первые две строки — заголовки ---/+++ без имён файлов
+    return "\n".join(list(lines)[2:])
+
+
+async def _update_with_llm(
+    previous: str,
+    previous_vacancy: Vacancy,
+    description: str,
+    client: AsyncOpenAI,
+    on_field: Callable[[str, Any], None] | None,
+) -> Vacancy | None:
+    """Разбор почти-дубликата по прошлому разбору и diff; None — diff не короче самого описания."""
+    with span("prompt"):
+        diff = _text_diff(previous, description)
+        count = token_counter(model_router.primary("parse")).count
+        # правок много — полный разбор выйдет не дороже и надёжнее
+        if not diff or count(diff) * 2 > count(description):
+            return None
+        messages = prompt_budget.check(
+            [{"role": "user", "content": UPDATE_PROMPT.format(previous=previous_vacancy.model_dump_json(), diff=diff)}],
+            model_router.primary("parse"), LLM_MAX_TOKENS,
         )
-        
-        content = response.choices[0].message.content.strip("```json")
-        print ("content ", content)
-        data = json.loads(content)
-        print ("data json.loads(content)", data)
-        print ("Vacancy", Vacancy(**data).model_dump())
-        return Vacancy(**data)
+    content = await model_router.run(
+        "parse", lambda model: extract_vacancy_json(client, model, messages[0]["content"], on_field), vacancy_features
+    )
+    with span("parse"):
+        return Vacancy.model_validate_json(content)
+
+
+async def parse_vacancy(
+    description: str,
+    client: AsyncOpenAI,
+    on_field: Callable[[str, Any], None] | None = None,
+) -> Vacancy | dict:
+    """
+    Разбор текста вакансии в Vacancy. При ошибке возвращает словарь parse_error.
+    on_field(name, value) вызывается для каждого поля, как только оно готово.
+
+    Сначала вакансия разбирается правилами (app.services.rules). Если все поля
+    RULES_REQUIRED_FIELDS найдены с уверенностью не ниже порога, LLM не вызывается;
+    иначе уверенные поля правил сливаются с ответом LLM.
+    Вакансия с тем же текстом, уже разобранная раньше, берётся из хранилища
+    или индекса почти-дубликатов. Для почти такой же (MinHash-сходство от
+    DEDUP_DIFF_THRESHOLD) в LLM уходит прошлый разбор и diff текста вместо
+    полного описания: даже мелкая правка может сменить компанию или зарплату.
+    Прошлый разбор берётся только той же версии промпта и того же маршрута моделей.
+    """
+    try:
+        route = model_router.route_key("parse")
+        stored = await vacancy_store.find_vacancy(description, PARSE_PROMPT_VERSION, route)
+        if stored is not None:
+            if on_field is not None:
+                for name, value in stored:
+                    on_field(name, value)
+            parse_source.inc(source="store")
+            set_response_header("X-Parse-Source", "store")
+            return stored
+
+        with span("rules"):
+            rules = extract_rules(description) if RULES_ENABLED else None
+        if rules is not None and not rules.missing(RULES_REQUIRED_FIELDS, RULES_CONFIDENCE_THRESHOLD):
+            vacancy = rules.to_vacancy()
+            if on_field is not None:
+                for name, value in vacancy:
+                    on_field(name, value)
+            parse_source.inc(source="rules")
+            llm_calls_avoided.inc()
+            set_response_header("X-Parse-Source", "rules")
+            await vacancy_store.save_vacancy(description, PARSE_PROMPT_VERSION, route, vacancy, "rules")
+            return vacancy
+
+        near = parse_index.query(description, DEDUP_DIFF_THRESHOLD) if DEDUP_ENABLED else None
+        if near is not None and near[1][:2] != (PARSE_PROMPT_VERSION, route):
+            # разбор старым промптом или другой моделью не переиспользуем
+            near = None
+        if near is not None and canonicalize(near[1][2]) == canonicalize(description):
+            # тот же текст (хранилище выключено или не ответило) — разбор уже есть
+            similarity, (_, _, _, vacancy) = near
+            near_dup_lookups.inc(kind="parse", result="reuse")
+            if on_field is not None:
+                for name, value in vacancy:
+                    on_field(name, value)
+            parse_source.inc(source="near_duplicate")
+            llm_calls_avoided.inc()
+            set_response_header("X-Parse-Source", "near_duplicate")
+            set_response_header("X-Near-Duplicate", f"{similarity:.2f}")
+            await vacancy_store.save_vacancy(description, PARSE_PROMPT_VERSION, route, vacancy, "near_duplicate")
+            return vacancy
+
+        vacancy = None
+        source = "llm"
+        if near is not None:
+            similarity, (_, _, previous, previous_vacancy) = near
+            vacancy = await _update_with_llm(previous, previous_vacancy, description, client, on_field)
+            if vacancy is not None:
+                source = "diff"
+                set_response_header("X-Near-Duplicate", f"{similarity:.2f}")
+        if DEDUP_ENABLED:
+            near_dup_lookups.inc(kind="parse", result=source if source == "diff" else "miss")
+        if vacancy is None:
+            vacancy = await _parse_with_llm(description, client, on_field)
+        if rules is not None:
+            vacancy, taken = rules.merge(vacancy, RULES_CONFIDENCE_THRESHOLD)
+            source = "merged" if taken else source
+        if DEDUP_ENABLED:
+            parse_index.add(description, (PARSE_PROMPT_VERSION, route, description, vacancy))
+        parse_source.inc(source=source)
+        set_response_header("X-Parse-Source", source)
+        await vacancy_store.save_vacancy(description, PARSE_PROMPT_VERSION, route, vacancy, source)
+        return vacancy
 
+    except (LLMOverloaded, DeadlineExceeded, PromptTooLarge):
+        # перегрузка, дедлайн и бюджет промпта — не ошибки разбора: роут ответит 503/504/413
+        raise
     except Exception as e:
         return {
             "parse_error": True,
             "error_message": str(e),
-            "raw_output": content if "content" in locals() else None
+            "raw_output": getattr(e, "raw_output", None)
         }
 
-async def generate_vacancy_description(vacancy_data: dict, system_path: str = "base/system_vacancy.md"):
-    
-    # читаем system роль
-    with open(system_path, "r", encoding="utf-8") as f:
-        system_content = f.read()
-
+def _generate_messages(vacancy_data: dict, system_prompt: Prompt) -> list[dict]:
     # формируем user content
     user_content = "\n".join([f"{k}: {v}" for k, v in vacancy_data.items()])
 
-    messages = [
-        {"role": "system", "content": system_content},
+    return [
+        {"role": "system", "content": system_prompt.text},
         {"role": "user", "content": f"Сделай описание вакансии со следующими параметрами:\n{user_content}"}
     ]
 
-    # создаём клиента AsyncOpenAI
-    asycClient = AsyncOpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_API_BASE)
+async def generate_vacancy_description(vacancy_data: dict, client: AsyncOpenAI, system_prompt: Prompt | None = None):
+
+    # system роль берём из кеша промптов (base/system_vacancy.md)
+    system_prompt = system_prompt or prompt_store.get("system_vacancy")
+
+    # temperature=0.7 — хранилище и кеш отдают прошлое описание только при CACHE_NONDETERMINISTIC=1,
+    # в хранилище оно записывается всегда
+    route = model_router.route_key("generate")
+    stored = await vacancy_store.find_description(vacancy_data, system_prompt.version, route, 0.7)
+    if stored is not None:
+        return stored
+
+    key = completion_cache.make_key(input=vacancy_data, prompt_version=system_prompt.version, model=route, temperature=0.7)
+    cached = await completion_cache.get(key, 0.7)
+    if cached is not None:
+        return cached
+
+    with span("prompt"):
+        messages = prompt_budget.check(
+            _generate_messages(vacancy_data, system_prompt), model_router.primary("generate"), LLM_MAX_TOKENS
+        )
+
+    # почти те же параметры (переставлены навыки, другая дата) — описание уже есть;
+    # как и кеш, отдаём прошлый ответ temperature=0.7 только при CACHE_NONDETERMINISTIC=1
+    fields = messages[-1]["content"]
+    reuse = DEDUP_ENABLED and completion_cache.cache_nondeterministic
+    near = generate_index.query(fields, DEDUP_REUSE_THRESHOLD) if reuse else None
+    if near is not None and near[1][:2] == (system_prompt.version, route):
+        near_dup_lookups.inc(kind="generate", result="reuse")
+        set_response_header("X-Near-Duplicate", f"{near[0]:.2f}")
+        return near[1][2]
+    if reuse:
+        near_dup_lookups.inc(kind="generate", result="miss")
+
+    # делаем запрос через общий клиент приложения
+    content = await _complete(client, key, messages, 0.7, "generate")
+    await completion_cache.set(key, content, 0.7)
+    if reuse:
+        generate_index.add(fields, (system_prompt.version, route, content))
+    await vacancy_store.save_description(vacancy_data, system_prompt.version, route, content)
+    return content
+
+def _evaluate_messages(vacancy_text: str, resume_text: str, system_prompt: Prompt, skills_note: str = "") -> list[dict]:
+    # формируем user-промпт
+    user_content = (
+        f"Вакансия:\n{vacancy_text}\n\n"
+        f"Резюме:\n{resume_text}\n\n"
+        + (f"{skills_note}\n\n" if skills_note else "")
+        + "Сравни резюме с вакансией и выдай отчет по критериям."
+    )
+
+    return [
+        {"role": "system", "content": system_prompt.text},
+        {"role": "user", "content": user_content}
+    ]
+
+def _skills_note(vacancy_text: str, resume_text: str) -> str:
+    # навыки сверяются по полному резюме — до обрезки по бюджету и до выжимок map-reduce
+    if not SKILLS_GAP_IN_PROMPT:
+        return ""
+    with span("skills"):
+        return skills_gap(vacancy_text, resume_text).prompt_note()
+
+def _fit_evaluate(vacancy_text: str, resume_text: str, system_prompt: Prompt, skills_note: str = "") -> list[dict]:
+    # резюме сверх бюджета токенов обрезается, вакансия и промпт остаются целыми
+    return prompt_budget.fit(
+        lambda resume: _evaluate_messages(vacancy_text, resume, system_prompt, skills_note),
+        resume_text, model_router.primary("evaluate"), LLM_MAX_TOKENS,
+    )
+
+def _resume_chunks(resume_text: str) -> list[str] | None:
+    """Разделы резюме для map-reduce оценки; None — резюме достаточно короткое для одного промпта."""
+    counter = token_counter(model_router.primary("evaluate"))
+    if counter.count(resume_text) <= EVALUATE_CHUNK_THRESHOLD:
+        return None
+    chunks = chunk_text(resume_text, EVALUATE_CHUNK_TOKENS, counter.count)
+    return chunks if len(chunks) > 1 else None
+
+def _chunk_messages(vacancy_text: str, chunk: str, system_prompt: Prompt) -> list[dict]:
+    return [
+        {"role": "system", "content": system_prompt.text},
+        {"role": "user", "content": CHUNK_PROMPT.format(vacancy=vacancy_text, chunk=chunk)}
+    ]
+
+async def _evaluate_chunk(vacancy_text: str, chunk: str, client: AsyncOpenAI, system_prompt: Prompt) -> str:
+    # выжимка раздела детерминирована (temperature=0) и кешируется отдельно от отчёта
+    key = completion_cache.make_key(
+        input=[vacancy_text, chunk], prompt_version=f"{system_prompt.version}:{CHUNK_PROMPT_VERSION}",
+        model=model_router.route_key("evaluate_chunk"), temperature=0
+    )
+    cached = await completion_cache.get(key, 0)
+    if cached is not None:
+        chunk_reused.inc()
+        return cached
+    with span("prompt"):
+        messages = prompt_budget.fit(
+            lambda text: _chunk_messages(vacancy_text, text, system_prompt), chunk,
+            model_router.primary("evaluate_chunk"), LLM_MAX_TOKENS,
+        )
+    content = await _complete(client, key, messages, 0, "evaluate_chunk")
+    await completion_cache.set(key, content, 0)
+    return content
+
+async def _summarize_chunks(vacancy_text: str, chunks: list[str], client: AsyncOpenAI, system_prompt: Prompt) -> str:
+    """Map: разделы оцениваются параллельно; результат — выжимки в порядке разделов."""
+    evaluate_chunks.observe(len(chunks))
+    semaphore = asyncio.Semaphore(EVALUATE_CHUNK_CONCURRENCY)
+
+    async def evaluate(chunk: str) -> str:
+        async with semaphore:
+            return await _evaluate_chunk(vacancy_text, chunk, client, system_prompt)
+
+    notes = await asyncio.gather(*(evaluate(chunk) for chunk in chunks))
+    return "\n\n".join(f"Раздел {i}:\n{note}" for i, note in enumerate(notes, 1))
+
+async def evaluate_resume(vacancy_text: str, resume_text: str, client: AsyncOpenAI, system_prompt: Prompt | None = None):
+    """
+    Сравнивает резюме и вакансию по заданному промпту.
+    Возвращает структурированный отчет.
+
+    Резюме длиннее EVALUATE_CHUNK_THRESHOLD токенов оценивается map-reduce:
+    разделы параллельно сводятся в выжимки (каждая кешируется), отчёт строится по выжимкам.
+    Навыки вакансии сверяются с резюме локально (app.services.skills), итог сверки — в промпте.
+    """
+
+    # system-промпт берём из кеша промптов (base/system_evaluate.md)
+    system_prompt = system_prompt or prompt_store.get("system_evaluate")
+
+    route = model_router.route_key("evaluate")
+    stored = await vacancy_store.find_evaluation(vacancy_text, resume_text, system_prompt.version, route, 0.7)
+    if stored is not None:
+        return stored
+
+    key = completion_cache.make_key(
+        input=[vacancy_text, resume_text], prompt_version=system_prompt.version, model=route, temperature=0.7
+    )
+    cached = await completion_cache.get(key, 0.7)
+    if cached is not None:
+        return cached
+
+    skills_note = _skills_note(vacancy_text, resume_text)
+    report_input = resume_text
+    chunks = _resume_chunks(resume_text)
+    if chunks is not None:
+        # длинное резюме: map по разделам, reduce — обычная оценка по выжимкам
+        report_input = await _summarize_chunks(vacancy_text, chunks, client, system_prompt)
+
+    with span("prompt"):
+        messages = _fit_evaluate(vacancy_text, report_input, system_prompt, skills_note)
+
+    # делаем запрос через общий клиент приложения
+    content = await _complete(client, key, messages, 0.7, "evaluate")
+    await completion_cache.set(key, content, 0.7)
+    await vacancy_store.save_evaluation(vacancy_text, resume_text, system_prompt.version, route, content)
+    return content
+
+async def _stream(client: AsyncOpenAI, key: str, messages: list[dict], temperature: float, endpoint: str) -> AsyncIterator[str]:
+    """
+    Отдаёт токены по мере генерации. Если клиент отключился, генератор
+    закрывается и вместе с ним закрывается поток к LLM — лишние токены не оплачиваем.
+    """
+    cached = await completion_cache.get(key, temperature)
+    if cached is not None:
+        yield cached
+        return
+
+    # токены уходят клиенту сразу — каскада нет, поток идёт от первой модели маршрута
+    model = model_router.primary(endpoint)
+    # слот лимитера занят, пока читается поток
+    async with rate_scheduler.reserve(messages, LLM_MAX_TOKENS, model) as reservation, llm_limiter.slot(f"{endpoint}_stream"):
+        started = time.perf_counter()
+        # повторяется только открытие потока: после первого токена ответ уже у клиента
+        stream = await llm_resilience.call(f"{endpoint}_stream", lambda: client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=LLM_MAX_TOKENS,
+            stream=True,
+            # usage приходит последним чанком — по нему сверяется резерв TPM
+            stream_options={"include_usage": True}
+        ))
+        parts = []
+        completed = False
+        try:
+            async for chunk in stream:
+                reservation.settle(getattr(chunk, "usage", None))
+                if not chunk.choices:
+                    continue
+                token = chunk.choices[0].delta.content
+                if not token:
+                    continue
+                if not parts:
+                    first_token = time.perf_counter()
+                    stream_ttfb.observe(first_token - started, endpoint=endpoint)
+                    record("ttfb", first_token - started)
+                parts.append(token)
+                yield token
+            completed = True
+        finally:
+            if parts:
+                record("generation", time.perf_counter() - first_token)
+            if not completed:
+                stream_cancelled.inc(endpoint=endpoint)
+                await stream.close()
+
+    await completion_cache.set(key, "".join(parts), temperature)
+
+# не генераторы: бюджет промпта проверяется сразу, пока роут ещё может ответить 413
+
+def stream_vacancy_description(vacancy_data: dict, client: AsyncOpenAI, system_prompt: Prompt | None = None) -> AsyncIterator[str]:
+    system_prompt = system_prompt or prompt_store.get("system_vacancy")
+    key = completion_cache.make_key(
+        input=vacancy_data, prompt_version=system_prompt.version, model=model_router.route_key("generate"), temperature=0.7
+    )
+    messages = prompt_budget.check(
+        _generate_messages(vacancy_data, system_prompt), model_router.primary("generate"), LLM_MAX_TOKENS
+    )
+    return _stream(client, key, messages, 0.7, "generate")
 
-    # делаем запрос
-    response = await asycClient.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=messages,
-        temperature=0.7
+def stream_evaluate_resume(vacancy_text: str, resume_text: str, client: AsyncOpenAI, system_prompt: Prompt | None = None) -> AsyncIterator[str]:
+    system_prompt = system_prompt or prompt_store.get("system_evaluate")
+    key = completion_cache.make_key(
+        input=[vacancy_text, resume_text], prompt_version=system_prompt.version, model=model_router.route_key("evaluate"), temperature=0.7
     )
+    skills_note = _skills_note(vacancy_text, resume_text)
+    chunks = _resume_chunks(resume_text)
+    if chunks is not None:
+        return _stream_chunked(client, key, vacancy_text, chunks, system_prompt, skills_note)
+    return _stream(client, key, _fit_evaluate(vacancy_text, resume_text, system_prompt, skills_note), 0.7, "evaluate")
 
-    return response.choices[0].message.content
\ No newline at end of file
+async def _stream_chunked(
+    client: AsyncOpenAI, key: str, vacancy_text: str, chunks: list[str], system_prompt: Prompt, skills_note: str
+) -> AsyncIterator[str]:
+    # выжимки разделов собираются до потока, потоком идёт только итоговый отчёт
+    cached = await completion_cache.get(key, 0.7)
+    if cached is not None:
+        yield cached
+        return
+    summary = await _summarize_chunks(vacancy_text, chunks, client, system_prompt)
+    async for token in _stream(client, key, _fit_evaluate(vacancy_text, summary, system_prompt, skills_note), 0.7, "evaluate"):
+        yield token
@@ -0,0 +1,120 @@
+"""
+Микробенчмарк JSON-кодека (app.codec) против прежнего пути FastAPI:
+- ответ: jsonable_encoder + JSONResponse (json.dumps) против FastJSONResponse,
+  возвращённого напрямую (orjson / pydantic-core), и против класса по умолчанию
+  FastJSONResponse, когда jsonable_encoder всё ещё работает;
+- Vacancy: model_dump + json.dumps против TypeAdapter.dump_json;
+- тело dict[str, str]: json.loads + проверка dict против validate_json;
+- пакет: JSON-массив целиком (request.json) против потокового iter_json_array —
+  время и пик памяти (tracemalloc).
+
+Запуск (из каталога 01):
+    python -m benchmarks.bench_codec --items 2000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.codec import HAS_ORJSON, STR_DICT_ADAPTER, VACANCY_ADAPTER, FastJSONResponse, dumps
+from app.models.vacancy import Vacancy
+from app.services.batch import iter_json_array
+
+
+def make_vacancy(i: int) -> Vacancy:
+    return Vacancy(
+        job_title=f"Python-разработчик {i}",
+        company=f"Компания {i % 97}",
+        location="Москва, гибрид",
+        experience_level="middle",
+        skills=["Python", "FastAPI", "PostgreSQL", "Docker", "Kafka"],
+        requirements=["опыт от 3 лет", "знание SQL", "умение писать тесты"],
+        responsibilities=["разработка сервисов", "код-ревью", "участие в планировании"],
+        salary="250 000 – 350 000 ₽",
+    )
+
+
+def bench(name: str, fn, repeat: int, size: int | None = None):
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - started) / repeat
+    rate = f"{size / elapsed / 1e6:>7.1f}" if size else f"{'':>7}"
+    print(f"{name:>44} | {elapsed * 1000:>9.3f} | {rate}")
+    return elapsed
+
+
+def peak_memory(fn) -> float:
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON codec micro-benchmarks against the default FastAPI path")
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--chunk", type=int, default=64 * 1024, help="размер чанка тела запроса, байт")
+    args = parser.parse_args()
+
+    vacancies = [make_vacancy(i) for i in range(args.items)]
+    page = {"items": [v.model_dump() for v in vacancies], "next": None}
+    body = dumps(page)
+    print(f"orjson: {'да' if HAS_ORJSON else 'нет (json)'}; {args.items} вакансий, {len(body) / 1e6:.2f} МБ JSON")
+    print(f"{'':>44} | {'мс':>9} | {'MB/s':>7}")
+
+    print("ответ (страница вакансий)")
+    base = bench("jsonable_encoder + JSONResponse", lambda: JSONResponse(jsonable_encoder(page)), args.repeat, len(body))
+    bench("jsonable_encoder + FastJSONResponse", lambda: FastJSONResponse(jsonable_encoder(page)), args.repeat, len(body))
+    fast = bench("FastJSONResponse напрямую", lambda: FastJSONResponse(page), args.repeat, len(body))
+    print(f"{'ускорение':>44} | {base / fast:>8.1f}x |")
+
+    print("Vacancy -> JSON")
+    one = vacancies[0]
+    bench("model_dump + json.dumps", lambda: json.dumps(one.model_dump(), ensure_ascii=False).encode(), args.repeat * 500)
+    bench("VACANCY_ADAPTER.dump_json", lambda: VACANCY_ADAPTER.dump_json(one), args.repeat * 500)
+
+    print("тело dict[str, str]")
+    fields = {f"Поле {i}": f"значение {i}" for i in range(50)}
+    raw = json.dumps(fields, ensure_ascii=False).encode()
+    bench("json.loads + validate_python", lambda: STR_DICT_ADAPTER.validate_python(json.loads(raw)), args.repeat * 500)
+    bench("STR_DICT_ADAPTER.validate_json", lambda: STR_DICT_ADAPTER.validate_json(raw), args.repeat * 500)
+
+    print("пакет: JSON-массив в теле запроса")
+    array = dumps([v.model_dump() for v in vacancies])
+    chunks = [array[i:i + args.chunk] for i in range(0, len(array), args.chunk)]
+
+    def buffered():
+        # прежний путь: request.body() склеивает чанки, request.json() разбирает целиком
+        return len(json.loads(b"".join(chunks)))
+
+    def streamed():
+        async def feed():
+            for chunk in chunks:
+                yield chunk
+
+        async def consume():
+            # элементы обрабатываются по одному и не копятся — как в /vacancy/parse/batch
+            count = 0
+            async for _ in iter_json_array(feed()):
+                count += 1
+            return count
+
+        return asyncio.run(consume())
+
+    bench("request.json() целиком", buffered, args.repeat, len(array))
+    bench("iter_json_array по чанкам", streamed, args.repeat, len(array))
+    print(f"{'пик памяти, МБ: целиком':>44} | {peak_memory(buffered):>9.2f} |")
+    print(f"{'пик памяти, МБ: потоком':>44} | {peak_memory(streamed):>9.2f} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Бенчмарк индекса почти-дубликатов (app.services.dedup): время добавления
+и поиска на корпусе вакансий и доля найденных перепубликаций — вакансий
+с изменённой датой, переставленными пунктами и другим подвалом.
+
+Запуск (из каталога 01):
+    python -m benchmarks.bench_dedup --docs 5000 --queries 1000
+"""
+
+import argparse
+import random
+import time
+
+from app.services.dedup import NearDuplicateIndex
+from benchmarks.bench_rules import make_corpus
+
+FOOTERS = ["Опубликовано {day}.03.2025", "Откликайтесь на сайте!", "Вакансия в архиве с {day}.04.2025"]
+
+
+def repost(doc: str, rng: random.Random) -> str:
+    """Та же вакансия с мелкими правками: два пункта переставлены, другой подвал."""
+    lines = doc.splitlines()
+    if len(lines) > 3:
+        i = rng.randrange(len(lines) - 1)
+        lines[i], lines[i + 1] = lines[i + 1], lines[i]
+    return "\n".join(lines) + "\n" + rng.choice(FOOTERS).format(day=rng.randrange(10, 29))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MinHash/LSH near-duplicate index latency")
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--threshold", type=float, default=0.6)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    docs = make_corpus(args.docs, args.seed)
+    index = NearDuplicateIndex("bench", max_entries=args.docs)
+
+    started = time.perf_counter()
+    for i, doc in enumerate(docs):
+        index.add(doc, i)
+    add_ms = (time.perf_counter() - started) / len(docs) * 1000
+
+    picked = rng.sample(range(len(docs)), min(args.queries, len(docs)))
+    queries = [(i, repost(docs[i], rng)) for i in picked]
+    found = similar = 0
+    started = time.perf_counter()
+    for i, text in queries:
+        match = index.query(text, args.threshold)
+        if match is not None:
+            # шаблонные вакансии похожи между собой — совпасть может и соседняя
+            found += match[1] == i
+            similar += 1
+    query_ms = (time.perf_counter() - started) / len(queries) * 1000
+
+    print(f"{len(docs)} вакансий в индексе, {len(queries)} перепубликаций")
+    print(f"добавление: {add_ms:.3f} мс, поиск: {query_ms:.3f} мс")
+    print(f"найдена та же вакансия: {found / len(queries):.1%}, похожая выше порога: {similar / len(queries):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Бенчмарк /vacancy/parse: пропускная способность при росте числа
+одновременных запросов.
+
+Сравниваются два пути:
+  sync  — прежний `def` эндпоинт с синхронным клиентом, который
+          занимает слот threadpool Starlette (~40 слотов) на весь вызов LLM;
+  async — текущий `async def` эндпоинт на общем AsyncOpenAI клиенте.
+
+LLM подменяется заглушкой с фиксированной задержкой, сеть не нужна.
+
+Запуск (из каталога 01):
+    python -m benchmarks.bench_parse_concurrency --latency 0.2
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.main import app
+from app.services.llm import get_llm_client
+from tests.test_vacancy import VACANCY_JSON
+
+LEVELS = [10, 40, 100, 200, 400]
+
+
+def make_response():
+    message = type("obj2", (), {"content": VACANCY_JSON})
+    return type("obj", (), {"choices": [type("obj", (), {"message": message})]})
+
+
+class SleepyAsyncClient:
+    def __init__(self, latency: float):
+        async def create(**kwargs):
+            await asyncio.sleep(latency)
+            return make_response()
+
+        completions = type("obj", (), {"create": staticmethod(create)})
+        self.chat = type("obj", (), {"completions": completions})
+
+
+def make_sync_app(latency: float) -> FastAPI:
+    # воспроизводит прежний путь: sync def + блокирующий вызов клиента
+    sync_app = FastAPI()
+
+    @sync_app.post("/vacancy/parse")
+    def vacancy_parse(payload: dict):
+        time.sleep(latency)
+        return make_response().choices[0].message.content
+
+    return sync_app
+
+
+async def run_level(target: FastAPI, concurrency: int) -> tuple[float, float]:
+    transport = httpx.ASGITransport(app=target)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            http.post("/vacancy/parse", json={"description": "Vacancy text"})
+            for _ in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+    return elapsed, concurrency / elapsed
+
+
+async def main(latency: float):
+    app.dependency_overrides[get_llm_client] = lambda: SleepyAsyncClient(latency)
+    sync_app = make_sync_app(latency)
+
+    print(f"upstream latency: {latency * 1000:.0f} ms")
+    print(f"{'concurrency':>11} | {'sync RPS':>9} | {'async RPS':>9} | {'speedup':>7}")
+    for level in LEVELS:
+        # отладочный print() в parse_vacancy не должен попадать в отчёт
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, sync_rps = await run_level(sync_app, level)
+            _, async_rps = await run_level(app, level)
+        print(f"{level:>11} | {sync_rps:>9.1f} | {async_rps:>9.1f} | {async_rps / sync_rps:>6.1f}x")
+
+    app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.2, help="задержка заглушки LLM, сек")
+    args = parser.parse_args()
+    asyncio.run(main(args.latency))
@@ -0,0 +1,105 @@
+"""
+Бенчмарк разбора вакансий правилами (app.services.rules): сколько
+вакансий в секунду и МБ текста в секунду обрабатывает одно ядро,
+и как это масштабируется на несколько процессов.
+
+Вакансии генерируются по шаблонам досок (подписанные строки) и в виде
+свободного текста; печатается и доля вакансий, для которых LLM не нужен.
+
+Запуск (из каталога 01):
+    python -m benchmarks.bench_rules --docs 20000 --workers 1,2,4
+"""
+
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.config import RULES_CONFIDENCE_THRESHOLD, RULES_REQUIRED_FIELDS
+from app.services.rules import CITIES, SKILLS, extract_rules
+
+TITLES = ["Python-разработчик", "Backend Developer", "Data Engineer", "DevOps-инженер", "Frontend-разработчик"]
+LEVELS = ["Junior", "Middle", "Senior", "Lead"]
+COMPANIES = ["TechSolutions", "ООО «Ромашка»", "DataFlow", "Сбер", "Yandex", "СтартАп"]
+
+BOARD = """Должность: {level} {title}
+Компания: {company}
+Город: {city}
+Занятость: полная
+Зарплата: от {low} 000 до {high} 000 руб.
+Ключевые навыки: {skills}
+
+Требования:
+- опыт коммерческой разработки от {years} лет
+- знание {skill}
+
+Обязанности:
+- разработка и поддержка сервисов
+- участие в code review
+"""
+
+FREE = (
+    "Компания {company} ищет {level} {title} для удалённой работы. "
+    "Обязательные навыки: {skills}. Опыт работы от {years} лет. "
+    "Зарплата: {low} 000–{high} 000 руб. Мы предлагаем дружную команду и гибкий график."
+)
+
+
+def make_corpus(n: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    skills = list(SKILLS)
+    docs = []
+    for i in range(n):
+        low = rng.randrange(80, 300, 10)
+        picked = rng.sample(skills, 5)
+        template = BOARD if i % 2 == 0 else FREE
+        docs.append(template.format(
+            level=rng.choice(LEVELS), title=rng.choice(TITLES), company=rng.choice(COMPANIES),
+            city=rng.choice(list(CITIES)), low=low, high=low + rng.randrange(20, 150, 10),
+            skills=", ".join(picked), skill=picked[0], years=rng.randrange(1, 7),
+        ))
+    return docs
+
+
+def run_chunk(docs: list[str]) -> int:
+    """Разбирает часть корпуса, возвращает число вакансий без вызова LLM."""
+    return sum(not extract_rules(doc).missing(RULES_REQUIRED_FIELDS, RULES_CONFIDENCE_THRESHOLD) for doc in docs)
+
+
+def bench(docs: list[str], workers: int) -> tuple[float, int]:
+    if workers == 1:
+        started = time.perf_counter()
+        avoided = run_chunk(docs)
+        return time.perf_counter() - started, avoided
+    chunks = [docs[i::workers] for i in range(workers)]
+    with ProcessPoolExecutor(workers) as pool:
+        # прогрев: импорт и компиляция регулярных выражений в каждом процессе
+        list(pool.map(run_chunk, [docs[:1]] * workers))
+        started = time.perf_counter()
+        avoided = sum(pool.map(run_chunk, chunks))
+        return time.perf_counter() - started, avoided
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rule-based vacancy extraction throughput")
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--workers", type=lambda s: [int(x) for x in s.split(",")], default=[1, os.cpu_count() or 1])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    docs = make_corpus(args.docs, args.seed)
+    megabytes = sum(len(doc.encode("utf-8")) for doc in docs) / 1e6
+    print(f"{len(docs)} вакансий, {megabytes:.1f} МБ, ядер: {os.cpu_count()}")
+    print(f"{'workers':>7} | {'docs/s':>9} | {'docs/s/core':>11} | {'MB/s':>6} | {'без LLM':>7}")
+    for workers in args.workers:
+        elapsed, avoided = bench(docs, workers)
+        rate = len(docs) / elapsed
+        print(
+            f"{workers:>7} | {rate:>9.0f} | {rate / workers:>11.0f} | "
+            f"{megabytes / elapsed:>6.2f} | {avoided / len(docs):>7.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Бенчмарк поиска навыков в резюме (app.services.skills): МБ текста в секунду
+у автомата Ахо–Корасик (чистый Python и pyahocorasick, если установлен)
+против прежнего поиска одним большим регулярным выражением (rules.find_skills),
+и время сверки навыков вакансии с резюме.
+
+Резюме собираются из обычных слов со вставками навыков и их синонимов.
+
+Запуск (из каталога 01):
+    python -m benchmarks.bench_skills --megabytes 5
+"""
+
+import argparse
+import importlib.util
+import random
+import time
+
+from app.models.vacancy import Vacancy
+from app.services.rules import find_skills
+from app.services.skills import SYNONYMS, AhoCorasick, SkillMatcher, skills_gap
+
+WORDS = (
+    "опыт разработки сервисов команда проект задачи поддержка внедрение система данные клиент "
+    "оптимизация запросов архитектура микросервисов интеграция тестирование документация релиз "
+    "developed maintained designed services team platform performance migration pipeline"
+).split()
+
+
+def make_corpus(megabytes: float, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    aliases = [alias for names in SYNONYMS.values() for alias in names] + ["Python", "Django", "PostgreSQL", "Go", "C++"]
+    resumes, size = [], 0
+    while size < megabytes * 1_000_000:
+        words = [rng.choice(aliases) if rng.random() < 0.05 else rng.choice(WORDS) for _ in range(rng.randrange(300, 1500))]
+        resume = " ".join(words)
+        resumes.append(resume)
+        size += len(resume.encode("utf-8"))
+    return resumes
+
+
+def bench(name: str, fn, resumes: list[str], megabytes: float):
+    started = time.perf_counter()
+    found = sum(len(fn(resume)) for resume in resumes)
+    elapsed = time.perf_counter() - started
+    print(f"{name:>24} | {megabytes / elapsed:>7.2f} | {elapsed / len(resumes) * 1000:>9.3f} | {found:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Skills matching throughput on a resume corpus")
+    parser.add_argument("--megabytes", type=float, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    resumes = make_corpus(args.megabytes, args.seed)
+    megabytes = sum(len(r.encode("utf-8")) for r in resumes) / 1e6
+    started = time.perf_counter()
+    matcher = SkillMatcher()
+    print(f"{len(resumes)} резюме, {megabytes:.1f} МБ; автомат построен за {(time.perf_counter() - started) * 1000:.1f} мс")
+    print(f"{'':>24} | {'MB/s':>7} | {'мс/резюме':>9} | {'навыков':>8}")
+
+    bench("regex (rules)", find_skills, resumes, megabytes)
+    if importlib.util.find_spec("ahocorasick") is not None:
+        bench("aho-corasick (C)", matcher.find, resumes, megabytes)
+    matcher._automaton = AhoCorasick(matcher._automaton.patterns)
+    bench("aho-corasick (Python)", matcher.find, resumes, megabytes)
+
+    vacancy = Vacancy(job_title="Backend", company="X", skills=["Python", "Kafka", "Docker", "Kubernetes", "Code review"])
+    bench("skills_gap (Vacancy)", lambda resume: skills_gap(vacancy, resume, matcher).matched, resumes, megabytes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Нагрузочный тест API: /vacancy/parse, /vacancy/generate, /vacancy/evaluate
+и /auth/register (проект 02) при растущей конкурентности.
+Для каждого эндпоинта и уровня печатает p50/p95/p99 задержки, RPS и долю ошибок.
+
+Без реального OpenAI: с --spawn поднимаются заглушка benchmarks.mock_llm,
+приложение 01 (OPENAI_API_BASE указывает на заглушку, кеш ответов выключен)
+и приложение 02. Нагрузка детерминирована (--seed), результаты можно
+сохранить в JSON и сравнивать между запусками.
+
+Запуск (из каталога 01):
+    python -m benchmarks.load_test --spawn --levels 1,8,32,128 --requests 400
+    python -m benchmarks.load_test --vacancy-url http://127.0.0.1:8000 --endpoints parse
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parents[1]
+AUTH_ROOT = ROOT.parent / "02"
+
+VACANCY_TEXT = (
+    "Компания TechSolutions ищет Senior Python разработчика для удалённой работы. "
+    "Обязательные навыки: Python, Django, REST API, PostgreSQL. Опыт работы от 5 лет. "
+    "Зарплата: 200 000–250 000 руб."
+)
+RESUME_TEXT = "Иван Иванов. Опыт: 6 лет Python (Django, FastAPI), PostgreSQL, Docker, Git."
+
+
+def make_request(endpoint: str, n: int, rng: random.Random) -> tuple[str, str, dict]:
+    """(сервис, путь, тело) для n-го запроса; тексты слегка варьируются, чтобы не попадать в кеш."""
+    tag = f" #{n}-{rng.randrange(10**6)}"
+    if endpoint == "parse":
+        return "vacancy", "/vacancy/parse", {"description": VACANCY_TEXT + tag}
+    if endpoint == "generate":
+        return "vacancy", "/vacancy/generate", {"Должность": "Python разработчик" + tag, "Язык": "русский"}
+    if endpoint == "evaluate":
+        return "vacancy", "/vacancy/evaluate", {"vacancy": VACANCY_TEXT, "resume": RESUME_TEXT + tag}
+    if endpoint == "register":
+        name = f"u{n}_{rng.randrange(10**6)}"
+        return "auth", "/auth/register", {"username": name, "email": f"{name}@example.com", "age": 30}
+    raise ValueError(f"Unknown endpoint '{endpoint}'")
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_level(clients: dict, endpoint: str, concurrency: int, total: int, seed: int) -> dict:
+    rng = random.Random(f"{seed}-{endpoint}-{concurrency}")
+    requests = [make_request(endpoint, n, rng) for n in range(total)]
+    latencies: list[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < total:
+            service, path, body = requests[next_index]
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                response = await clients[service].post(path, json=body)
+                ok = response.status_code == 200 and not (
+                    endpoint == "parse" and response.json().get("parse_error")
+                )
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": total,
+        "rps": total / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "error_rate": errors / total,
+    }
+
+
+def spawn(args) -> list[subprocess.Popen]:
+    env = {
+        **os.environ,
+        "OPENAI_API_BASE": f"http://127.0.0.1:{args.mock_port}/v1",
+        "OPENAI_API_KEY": "mock",
+        "CACHE_ENABLED": "0",
+        "MOCK_LATENCY_MS": str(args.mock_latency_ms),
+        "MOCK_TOKENS_PER_SEC": str(args.mock_tokens_per_sec),
+        "MOCK_ERROR_RATE": str(args.mock_error_rate),
+        "MOCK_SEED": str(args.seed),
+    }
+    uvicorn = [sys.executable, "-m", "uvicorn", "--log-level", "warning"]
+    return [
+        subprocess.Popen(uvicorn + ["benchmarks.mock_llm:app", "--port", str(args.mock_port)], cwd=ROOT, env=env),
+        subprocess.Popen(uvicorn + ["app.main:app", "--port", "8101"], cwd=ROOT, env=env),
+        subprocess.Popen(uvicorn + ["app.main:app", "--port", "8102"], cwd=AUTH_ROOT, env=env),
+    ]
+
+
+async def wait_ready(urls: list[str], timeout: float = 20):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as http:
+        for url in urls:
+            while True:
+                try:
+                    await http.get(url + "/docs")
+                    break
+                except httpx.HTTPError:
+                    if time.monotonic() > deadline:
+                        raise RuntimeError(f"{url} did not start")
+                    await asyncio.sleep(0.2)
+
+
+async def main(args):
+    processes = []
+    if args.spawn:
+        processes = spawn(args)
+        args.vacancy_url, args.auth_url = "http://127.0.0.1:8101", "http://127.0.0.1:8102"
+        await wait_ready([f"http://127.0.0.1:{args.mock_port}", args.vacancy_url, args.auth_url])
+
+    limits = httpx.Limits(max_connections=max(args.levels), max_keepalive_connections=max(args.levels))
+    timeout = httpx.Timeout(args.timeout)
+    results = []
+    try:
+        async with httpx.AsyncClient(base_url=args.vacancy_url, limits=limits, timeout=timeout) as vacancy, \
+                httpx.AsyncClient(base_url=args.auth_url, limits=limits, timeout=timeout) as auth:
+            clients = {"vacancy": vacancy, "auth": auth}
+            print(f"{'endpoint':>9} | {'conc':>5} | {'RPS':>8} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'errors':>6}")
+            for endpoint in args.endpoints:
+                for level in args.levels:
+                    result = await run_level(clients, endpoint, level, max(args.requests, level), args.seed)
+                    results.append(result)
+                    print(
+                        f"{endpoint:>9} | {level:>5} | {result['rps']:>8.1f} | {result['p50_ms']:>8.1f} | "
+                        f"{result['p95_ms']:>8.1f} | {result['p99_ms']:>8.1f} | {result['error_rate']:>6.1%}"
+                    )
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test for the vacancy and auth APIs")
+    parser.add_argument("--vacancy-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--auth-url", default="http://127.0.0.1:8002")
+    parser.add_argument("--endpoints", type=lambda s: s.split(","), default=["parse", "generate", "evaluate", "register"])
+    parser.add_argument("--levels", type=lambda s: [int(x) for x in s.split(",")], default=[1, 8, 32, 128])
+    parser.add_argument("--requests", type=int, default=200, help="запросов на уровень конкурентности")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="сохранить результаты в JSON")
+    parser.add_argument("--spawn", action="store_true", help="поднять заглушку LLM и оба приложения локально")
+    parser.add_argument("--mock-port", type=int, default=9100)
+    parser.add_argument("--mock-latency-ms", type=float, default=300)
+    parser.add_argument("--mock-tokens-per-sec", type=float, default=0)
+    parser.add_argument("--mock-error-rate", type=float, default=0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,261 @@
+"""
+Локальная заглушка OpenAI Chat Completions API для нагрузочных тестов.
+
+Поддерживает обычные и потоковые ответы, распределение задержки
+(логнормальное: медиана + разброс), скорость генерации токенов,
+долю ошибок 5xx и поведение 429 (случайно и/или по лимитам RPM/TPM
+с заголовками x-ratelimit-*).
+
+Запуск (из каталога 01):
+    python -m benchmarks.mock_llm --port 9100 --latency-ms 300 --tokens-per-sec 80
+
+Приложение направляется на заглушку через .env:
+    OPENAI_API_BASE=http://127.0.0.1:9100/v1
+    OPENAI_API_KEY=mock
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import time
+import uuid
+from dataclasses import dataclass
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+MOCK_VACANCY = {
+    "job_title": "Senior Python Developer",
+    "company": "TechSolutions",
+    "location": "удалённо",
+    "employment_type": "полная занятость",
+    "experience_level": "senior",
+    "skills": ["Python", "Django", "REST API", "PostgreSQL", "Git"],
+    "salary": "200000-250000 руб",
+    "description": "Разработка и поддержка веб-приложений.",
+    "requirements": ["знание Git", "умение работать в команде"],
+    "responsibilities": ["разработка и поддержка веб-приложений"],
+}
+
+FILLER = (
+    "Мы ищем мотивированного специалиста в дружную команду. Вас ждут интересные задачи, "
+    "современный стек, гибкий график и возможности профессионального роста. "
+)
+
+
+@dataclass
+class MockConfig:
+    latency_ms: float = 300.0
+    latency_sigma: float = 0.5
+    tokens_per_sec: float = 0.0
+    completion_tokens: int = 200
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    rpm: int = 0
+    tpm: int = 0
+    seed: int | None = None
+
+    @classmethod
+    def from_env(cls) -> "MockConfig":
+        return cls(
+            latency_ms=float(os.getenv("MOCK_LATENCY_MS", cls.latency_ms)),
+            latency_sigma=float(os.getenv("MOCK_LATENCY_SIGMA", cls.latency_sigma)),
+            tokens_per_sec=float(os.getenv("MOCK_TOKENS_PER_SEC", cls.tokens_per_sec)),
+            completion_tokens=int(os.getenv("MOCK_COMPLETION_TOKENS", cls.completion_tokens)),
+            error_rate=float(os.getenv("MOCK_ERROR_RATE", cls.error_rate)),
+            rate_limit_rate=float(os.getenv("MOCK_RATE_LIMIT_RATE", cls.rate_limit_rate)),
+            rpm=int(os.getenv("MOCK_RPM", cls.rpm)),
+            tpm=int(os.getenv("MOCK_TPM", cls.tpm)),
+            seed=int(os.environ["MOCK_SEED"]) if os.getenv("MOCK_SEED") else None,
+        )
+
+
+class MinuteWindow:
+    """Лимит на минуту в стиле OpenAI: остаток и время до сброса."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self.window_start = time.monotonic()
+
+    def _roll(self):
+        if time.monotonic() - self.window_start >= 60:
+            self.window_start = time.monotonic()
+            self.used = 0
+
+    def try_take(self, amount: int) -> bool:
+        self._roll()
+        if self.limit and self.used + amount > self.limit:
+            return False
+        self.used += amount
+        return True
+
+    def remaining(self) -> int:
+        self._roll()
+        return max(0, self.limit - self.used)
+
+    def reset_after(self) -> float:
+        return max(0.0, 60 - (time.monotonic() - self.window_start))
+
+
+def count_tokens(text: str) -> int:
+    # для заглушки достаточно ~4 символов на токен
+    return max(1, len(text) // 4)
+
+
+def make_content(messages: list[dict], completion_tokens: int) -> str:
+    user = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+    if "Respond only with valid JSON" in user:
+        return json.dumps(MOCK_VACANCY, ensure_ascii=False)
+    if "Резюме:" in user:
+        score = int(hashlib.sha256(user.encode("utf-8")).hexdigest(), 16) % 10 + 1
+        return f"Кандидат частично соответствует требованиям.\nИтоговая оценка: {score}/10\nSCORE: {score}"
+    text = FILLER * math.ceil(completion_tokens * 4 / len(FILLER))
+    return text[: completion_tokens * 4]
+
+
+def create_app(config: MockConfig | None = None) -> FastAPI:
+    config = config or MockConfig.from_env()
+    rng = random.Random(config.seed)
+    requests_window = MinuteWindow(config.rpm)
+    tokens_window = MinuteWindow(config.tpm)
+    mock = FastAPI(title="Mock OpenAI API")
+    mock.state.config = config
+    mock.state.stats = {"requests": 0, "errors": 0, "rate_limited": 0}
+
+    def ratelimit_headers() -> dict:
+        headers = {}
+        if config.rpm:
+            headers["x-ratelimit-limit-requests"] = str(config.rpm)
+            headers["x-ratelimit-remaining-requests"] = str(requests_window.remaining())
+            headers["x-ratelimit-reset-requests"] = f"{requests_window.reset_after():.3f}s"
+        if config.tpm:
+            headers["x-ratelimit-limit-tokens"] = str(config.tpm)
+            headers["x-ratelimit-remaining-tokens"] = str(tokens_window.remaining())
+            headers["x-ratelimit-reset-tokens"] = f"{tokens_window.reset_after():.3f}s"
+        return headers
+
+    def error(status: int, message: str, error_type: str, headers: dict | None = None) -> JSONResponse:
+        return JSONResponse(
+            {"error": {"message": message, "type": error_type, "param": None, "code": None}},
+            status_code=status,
+            headers=headers,
+        )
+
+    def sample_latency() -> float:
+        return config.latency_ms / 1000 * math.exp(rng.gauss(0, config.latency_sigma))
+
+    @mock.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats = mock.state.stats
+        stats["requests"] += 1
+
+        messages = body.get("messages", [])
+        prompt_tokens = sum(count_tokens(str(m.get("content", ""))) for m in messages)
+        max_tokens = body.get("max_tokens") or body.get("max_completion_tokens") or config.completion_tokens
+
+        if rng.random() < config.rate_limit_rate or not requests_window.try_take(1) \
+                or not tokens_window.try_take(prompt_tokens + max_tokens):
+            stats["rate_limited"] += 1
+            retry_after = requests_window.reset_after() if config.rpm else 1.0
+            headers = {"retry-after": f"{retry_after:.0f}", **ratelimit_headers()}
+            return error(429, "Rate limit reached", "requests", headers)
+
+        if rng.random() < config.error_rate:
+            stats["errors"] += 1
+            await asyncio.sleep(sample_latency())
+            return error(500, "The server had an error while processing your request.", "server_error")
+
+        content = make_content(messages, min(max_tokens, config.completion_tokens))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        model = body.get("model", "gpt-4o-mini")
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": count_tokens(content),
+            "total_tokens": prompt_tokens + count_tokens(content),
+        }
+        ttfb = sample_latency()
+
+        if body.get("stream"):
+            async def events():
+                await asyncio.sleep(ttfb)
+                words = content.split(" ")
+                for i, word in enumerate(words):
+                    token = word if i == len(words) - 1 else word + " "
+                    chunk = {
+                        "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                        "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                    }
+                    yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                    if config.tokens_per_sec:
+                        await asyncio.sleep(count_tokens(token) / config.tokens_per_sec)
+                final = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                    "usage": usage if body.get("stream_options", {}).get("include_usage") else None,
+                }
+                yield f"data: {json.dumps(final, ensure_ascii=False)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream", headers=ratelimit_headers())
+
+        generation = usage["completion_tokens"] / config.tokens_per_sec if config.tokens_per_sec else 0
+        await asyncio.sleep(ttfb + generation)
+        return JSONResponse({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        }, headers=ratelimit_headers())
+
+    @mock.get("/stats")
+    def mock_stats():
+        return mock.state.stats
+
+    return mock
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Mock OpenAI Chat Completions API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=MockConfig.latency_ms, help="медиана задержки до первого токена")
+    parser.add_argument("--latency-sigma", type=float, default=MockConfig.latency_sigma, help="разброс (sigma логнормального распределения)")
+    parser.add_argument("--tokens-per-sec", type=float, default=MockConfig.tokens_per_sec, help="скорость генерации, 0 — мгновенно")
+    parser.add_argument("--completion-tokens", type=int, default=MockConfig.completion_tokens)
+    parser.add_argument("--error-rate", type=float, default=MockConfig.error_rate, help="доля ответов 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=MockConfig.rate_limit_rate, help="доля случайных ответов 429")
+    parser.add_argument("--rpm", type=int, default=0, help="лимит запросов в минуту (0 — без лимита)")
+    parser.add_argument("--tpm", type=int, default=0, help="лимит токенов в минуту (0 — без лимита)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        tokens_per_sec=args.tokens_per_sec,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        rpm=args.rpm,
+        tpm=args.tpm,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
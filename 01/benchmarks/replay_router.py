@@ -0,0 +1,131 @@
+"""
+Офлайн-подбор маршрутов каскада моделей (app.services.router) по журналу
+ROUTER_LOG_PATH: для каждого записанного вызова каскад проигрывается заново
+с другими маршрутами и порогами — без обращения к LLM. Печатаются доля
+переходов к следующей модели, кто отвечал, задержка, стоимость и доля
+ответов, прошедших проверку.
+
+Если проигрыш требует модель, которую в том вызове не спрашивали (каскад
+тогда остановился раньше), берутся её средние задержка и стоимость по журналу,
+а ответ считается прошедшим проверку; такие вызовы считаются в колонке «нет данных».
+Полные данные даёт ROUTER_EXPLORE > 0: часть вызовов в фоне проходит весь маршрут.
+
+Запуск (из каталога 01):
+    python -m benchmarks.replay_router router.jsonl --routes "parse=gpt-4o-mini>gpt-4o" \\
+        --required-fields job_title,company,skills --min-chars 0,200,400
+"""
+
+import argparse
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from app.services.router import ModelRouter
+
+
+@dataclass
+class Replay:
+    runs: int = 0
+    escalated: int = 0
+    unknown: int = 0
+    accepted: int = 0
+    seconds: list[float] = field(default_factory=list)
+    cost: float = 0.0
+    answered_by: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+
+def load_runs(path: str) -> dict[str, dict[str, dict[str, dict]]]:
+    """Журнал по видам вызова: kind -> run -> model -> запись попытки."""
+    runs: dict[str, dict[str, dict[str, dict]]] = defaultdict(lambda: defaultdict(dict))
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                runs[record["kind"]][record["run"]][record["model"]] = record
+    return runs
+
+
+def model_averages(runs: dict[str, dict[str, dict]]) -> dict[str, tuple[float, float]]:
+    """Средние (секунды, стоимость) попытки по моделям."""
+    totals: dict[str, list[float]] = defaultdict(lambda: [0.0, 0.0, 0])
+    for attempts in runs.values():
+        for model, record in attempts.items():
+            total = totals[model]
+            total[0] += record["seconds"]
+            total[1] += record["cost"]
+            total[2] += 1
+    return {model: (s / n, c / n) for model, (s, c, n) in totals.items()}
+
+
+def simulate(kind: str, runs: dict[str, dict[str, dict]], router: ModelRouter) -> Replay:
+    """Проигрывает записанные вызовы вида kind через каскад router."""
+    averages = model_averages(runs)
+    models = router.models(kind)
+    result = Replay()
+    for attempts in runs.values():
+        seconds = cost = 0.0
+        unknown = False
+        for step, model in enumerate(models):
+            record = attempts.get(model)
+            if record is None:
+                if model not in averages:
+                    break
+                unknown = True
+                seconds += averages[model][0]
+                cost += averages[model][1]
+                passed = True
+            else:
+                seconds += record["seconds"]
+                cost += record["cost"]
+                passed = router.escalation_reason(kind, record["features"]) is None
+            if passed or step == len(models) - 1:
+                result.runs += 1
+                result.escalated += step > 0
+                result.unknown += unknown
+                result.accepted += passed
+                result.seconds.append(seconds)
+                result.cost += cost
+                result.answered_by[model] += 1
+                break
+    return result
+
+
+def _quantile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay model cascade decisions from the router log")
+    parser.add_argument("log")
+    parser.add_argument("--routes", default="", help="«вид=модель>модель» через запятую; по умолчанию — из конфига")
+    parser.add_argument("--required-fields", default=None, help="поля parse через запятую; по умолчанию — из конфига")
+    parser.add_argument("--min-chars", default="", help="варианты порога длины текста через запятую")
+    args = parser.parse_args()
+
+    base = ModelRouter(log_path="")
+    routes = {kind: models.split(">") for kind, models in (item.split("=") for item in args.routes.split(",") if item)}
+    required = args.required_fields.split(",") if args.required_fields is not None else base.required_fields
+    thresholds = [int(value) for value in args.min_chars.split(",") if value] or [None]
+
+    runs = load_runs(args.log)
+    print(f"{'kind':>14} | {'min_chars':>9} | {'вызовов':>7} | {'эскал.':>6} | {'прошли':>6} | "
+          f"{'p50, с':>6} | {'p95, с':>6} | {'$':>9} | {'нет данных':>10} | ответили")
+    for kind, kind_runs in sorted(runs.items()):
+        for threshold in thresholds:
+            min_chars = base.min_chars if threshold is None else {kind: threshold}
+            router = ModelRouter({**base.routes, **routes}, base.default, required, min_chars, log_path="")
+            replay = simulate(kind, kind_runs, router)
+            if not replay.runs:
+                continue
+            answered = ", ".join(f"{model} {n / replay.runs:.0%}" for model, n in replay.answered_by.items())
+            print(
+                f"{kind:>14} | {threshold if threshold is not None else '-':>9} | {replay.runs:>7} | "
+                f"{replay.escalated / replay.runs:>6.1%} | {replay.accepted / replay.runs:>6.1%} | "
+                f"{_quantile(replay.seconds, 0.5):>6.2f} | {_quantile(replay.seconds, 0.95):>6.2f} | "
+                f"{replay.cost:>9.4f} | {replay.unknown:>10} | {answered}"
+            )
+
+
+if __name__ == "__main__":
+    main()
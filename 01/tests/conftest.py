@@ -0,0 +1,75 @@
+import pytest
+
+from app.services.cache import completion_cache
+from app.services.dedup import generate_index, parse_index
+from app.services.store import vacancy_store
+
+
+class DummyStream:
+    """Потоковый ответ: по одному чанку на слово."""
+
+    def __init__(self, content):
+        self.tokens = [word + " " for word in content.split(" ")]
+        self.closed = False
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        for token in self.tokens:
+            delta = type("obj", (), {"content": token})
+            yield type("obj", (), {"choices": [type("obj", (), {"delta": delta})]})
+
+    async def close(self):
+        self.closed = True
+
+
+class DummyAsyncClient:
+    """Подменяет общий AsyncOpenAI клиент, запоминает запросы."""
+
+    def __init__(self, content):
+        self.calls = []
+        self.streams = []
+        outer = self
+
+        class Completions:
+            async def create(self, **kwargs):
+                outer.calls.append(kwargs)
+                if kwargs.get("stream"):
+                    stream = DummyStream(content)
+                    outer.streams.append(stream)
+                    return stream
+                return type("obj", (), {"choices": [type("obj", (), {"message": type("obj2", (), {"content": content})})]})
+
+        self.chat = type("obj", (), {"completions": Completions()})
+
+
+@pytest.fixture
+def dummy_client():
+    return DummyAsyncClient
+
+
+@pytest.fixture(autouse=True)
+def clear_completion_cache():
+    completion_cache.clear()
+    yield
+    completion_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def isolated_store(tmp_path, monkeypatch):
+    # у каждого теста своё хранилище результатов
+    vacancy_store.close()
+    monkeypatch.setattr(vacancy_store, "path", str(tmp_path / "store.db"))
+    yield vacancy_store
+    vacancy_store.close()
+
+
+@pytest.fixture(autouse=True)
+def clear_near_duplicates():
+    # тесты считают вызовы LLM — разборы прошлых тестов не должны переиспользоваться
+    parse_index.clear()
+    generate_index.clear()
+    yield
+    parse_index.clear()
+    generate_index.clear()
@@ -1,30 +1,22 @@
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.services.llm import get_llm_client
+from tests.test_vacancy import VACANCY_JSON
 
 client = TestClient(app)
 
-def test_vacancy_parse_success(monkeypatch):
-    class DummyResponse:
-        choices = [type("obj", (), {"message": type("obj2", (), {"content": """
-        {
-          "job_title": "Senior Python Developer",
-          "company": "TechSolutions",
-          "location": "удалённо",
-          "employment_type": null,
-          "experience_level": "senior",
-          "skills": ["Python", "Django", "REST API", "PostgreSQL", "Git"],
-          "salary": "200000-250000 руб",
-          "description": "Разработка и поддержка веб-приложений, участие в проектировании архитектуры.",
-          "requirements": ["знание Git", "умение работать в команде", "внимательность к деталям"],
-          "responsibilities": ["разработка и поддержка веб-приложений", "участие в проектировании архитектуры"]
-        }
-        """})})]
-
-    def dummy_chat_completions_create(*args, **kwargs):
-        return DummyResponse()
-
-    monkeypatch.setattr("app.services.vacancy.client.chat.completions.create", dummy_chat_completions_create)
+@pytest.fixture
+def override_llm(dummy_client):
+    def _override(content):
+        dummy = dummy_client(content)
+        app.dependency_overrides[get_llm_client] = lambda: dummy
+        return dummy
+    yield _override
+    app.dependency_overrides.clear()
+
+def test_vacancy_parse_success(override_llm):
+    override_llm(VACANCY_JSON)
 
     response = client.post("/vacancy/parse", json={"description": "Vacancy text"})
     assert response.status_code == 200
@@ -32,16 +24,38 @@ def test_vacancy_parse_success(monkeypatch):
     assert data["job_title"] == "Senior Python Developer"
     assert "Python" in data["skills"]
 
-def test_vacancy_parse_invalid_json(monkeypatch):
-    class DummyResponse:
-        choices = [type("obj", (), {"message": type("obj2", (), {"content": "INVALID_JSON"})})]
-
-    def dummy_chat_completions_create(*args, **kwargs):
-        return DummyResponse()
-
-    monkeypatch.setattr("app.services.vacancy.client.chat.completions.create", dummy_chat_completions_create)
+def test_vacancy_parse_invalid_json(override_llm):
+    override_llm("INVALID_JSON")
 
     response = client.post("/vacancy/parse", json={"description": "Vacancy text"})
     assert response.status_code == 200
     data = response.json()
-    assert data["error_message"].startswith("Expecting value:") is True
\ No newline at end of file
+    assert data["error_message"].startswith("Expecting value:") is True
+
+def test_vacancy_generate_uses_shared_client(override_llm):
+    dummy = override_llm("Отличная вакансия")
+
+    response = client.post("/vacancy/generate", json={"Должность": "Python разработчик"})
+    response2 = client.post("/vacancy/evaluate", json={"vacancy": "Python", "resume": "Python, 3 года"})
+
+    assert response.status_code == 200
+    assert response.json() == {"vacancy_description": "Отличная вакансия"}
+    assert response2.json() == {"evaluation": "Отличная вакансия"}
+    assert len(response.headers["X-Prompt-Version"]) == 12
+    assert len(dummy.calls) == 2
+
+def test_vacancy_parse_cache_headers(override_llm, isolated_store, monkeypatch):
+    # хранилище и индекс почти-дубликатов отдают повтор раньше кеша — здесь проверяем сам кеш
+    monkeypatch.setattr(isolated_store, "enabled", False)
+    monkeypatch.setattr("app.services.vacancy.DEDUP_ENABLED", False)
+    dummy = override_llm(VACANCY_JSON)
+
+    first = client.post("/vacancy/parse", json={"description": "Vacancy  text"})
+    second = client.post("/vacancy/parse", json={"description": "Vacancy text "})
+    generate = client.post("/vacancy/generate", json={"Должность": "Python разработчик"})
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+    assert generate.headers["X-Cache"] == "BYPASS"
+    assert len(dummy.calls) == 2
@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.batch import bounded_map, iter_list
+from app.services.llm import get_llm_client
+from tests.test_vacancy import VACANCY_JSON
+
+client = TestClient(app)
+
+
+def test_bounded_map_respects_concurrency():
+    active = 0
+    peak = 0
+
+    async def work(x):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        if x == 3:
+            raise ValueError("boom")
+        return x * 2
+
+    async def scenario():
+        return [item async for item in bounded_map(iter_list(list(range(20))), work, concurrency=4)]
+
+    results = dict(asyncio.run(scenario()))
+    assert peak == 4
+    assert len(results) == 20
+    assert isinstance(results[3], ValueError)
+    assert results[5] == 10
+
+
+def test_bounded_map_early_close_does_not_hang():
+    started = []
+
+    async def work(x):
+        # первый элемент готов сразу, остальные «висят» — очередь входа заполнена
+        started.append(x)
+        await asyncio.sleep(0 if x == 0 else 10)
+        return x
+
+    async def scenario():
+        # входов больше, чем вмещает очередь (2 * concurrency) плюс воркеры
+        results = bounded_map(iter_list(list(range(100))), work, concurrency=2)
+        first = await results.__anext__()
+        await results.aclose()
+        return first
+
+    assert asyncio.run(asyncio.wait_for(scenario(), timeout=2)) == (0, 0)
+    assert len(started) < 100
+
+
+def test_parse_batch_ndjson_stream(dummy_client):
+    dummy = dummy_client(VACANCY_JSON)
+    app.dependency_overrides[get_llm_client] = lambda: dummy
+    body = "\n".join([json.dumps("первая"), json.dumps({"description": "вторая"}), "{broken", json.dumps(42)])
+    try:
+        response = client.post(
+            "/vacancy/parse/batch?concurrency=2",
+            content=body.encode(),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    lines = {item["index"]: item["result"] for item in map(json.loads, response.text.splitlines())}
+    assert lines[0]["job_title"] == "Senior Python Developer"
+    assert lines[1]["company"] == "TechSolutions"
+    assert lines[2]["parse_error"] is True
+    assert lines[3]["parse_error"] is True
+    assert len(dummy.calls) == 2
+
+
+def test_parse_batch_json_list(dummy_client):
+    app.dependency_overrides[get_llm_client] = lambda: dummy_client("INVALID_JSON")
+    try:
+        response = client.post("/vacancy/parse/batch", json=["a", "b"])
+        bad = client.post("/vacancy/parse/batch", json={"description": "a"})
+    finally:
+        app.dependency_overrides.clear()
+
+    results = [json.loads(line)["result"] for line in response.text.splitlines()]
+    assert all(r["parse_error"] is True for r in results)
+    assert len(results) == 2
+    assert bad.status_code == 400
@@ -0,0 +1,118 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import budget as budget_module, vacancy
+from app.services.budget import (
+    TRIM_MARKER,
+    PromptBudget,
+    PromptTooLarge,
+    TokenCounter,
+    approx_tokens,
+    count_messages,
+)
+from app.services.llm import get_llm_client
+from app.services.prompts import Prompt
+from app.services.ratelimit import estimate_tokens
+
+client = TestClient(app)
+SYSTEM = Prompt("system_evaluate", "Оцени резюме.", "v1", 0)
+
+
+class WordEncoding:
+    """Токенизатор для тестов: токен — слово с пробелом."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text):
+        self.calls += 1
+        return [word + " " for word in text.split(" ")]
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+
+def test_approx_tokens_counts_cyrillic_finer():
+    assert approx_tokens("x" * 400) == 100
+    assert approx_tokens("я" * 10) == 4
+    messages = [{"role": "user", "content": "x" * 400}]
+    assert count_messages(messages) == 104
+    assert estimate_tokens(messages, 50) == 154
+
+
+def test_counter_caches_by_text_hash():
+    encoding = WordEncoding()
+    counter = TokenCounter(encoding, cache_size=2)
+
+    assert counter.count("a b c") == 3
+    assert counter.count("a b c") == 3
+    assert encoding.calls == 1 and counter.hits == 1
+    counter.count("d")
+    counter.count("e")
+    # вытеснена самая старая запись
+    counter.count("a b c")
+    assert encoding.calls == 4
+    assert counter.truncate("a b c d", 2) == "a b "
+
+
+def test_missing_tokenizer_is_reported(monkeypatch, caplog):
+    monkeypatch.setattr(budget_module.importlib.util, "find_spec", lambda name: None)
+    with caplog.at_level("WARNING", logger="app.services.budget"):
+        counter = TokenCounter.for_model("gpt-4o-mini")
+    assert not counter.exact
+    assert "tiktoken is not installed" in caplog.text
+    assert TokenCounter(WordEncoding()).exact
+
+
+def test_truncate_without_tokenizer_fits_budget():
+    counter = TokenCounter()
+    text = "Опыт работы с Python и Django. " * 200
+    cut = counter.truncate(text, 100)
+    assert approx_tokens(cut) <= 100
+    assert text.startswith(cut) and len(cut) > 100
+
+
+def test_budget_limits_context_and_cost():
+    budget = PromptBudget(context_limits={"gpt-4o": 1000}, max_cost=0.01)
+    assert budget.limit("gpt-4o-2024-08-06", 200) == (800, "context")
+    # 0.01$ = 10000 × 0.6 (ответ) + x × 0.15 → x = 26666
+    assert PromptBudget(context_limits={}, max_cost=0.01).limit("gpt-4o-mini", 10_000) == (26_666, "cost")
+    assert PromptBudget(context_limits={}).limit("unknown", 10) is None
+
+
+def test_trim_mode_cuts_resume_to_budget(monkeypatch):
+    budget = PromptBudget(context_limits={"gpt-4o-mini": 2600}, mode="trim")
+    monkeypatch.setattr(vacancy, "prompt_budget", budget)
+    resume = "Python, FastAPI, PostgreSQL. " * 500
+
+    messages = vacancy._fit_evaluate("Python-разработчик", resume, SYSTEM)
+
+    assert count_messages(messages, "gpt-4o-mini") <= 2600 - vacancy.LLM_MAX_TOKENS
+    assert messages[1]["content"].count(TRIM_MARKER) == 1
+    assert "Python-разработчик" in messages[1]["content"]
+
+
+def test_reject_mode_answers_413_without_llm_call(monkeypatch, dummy_client):
+    monkeypatch.setattr(vacancy, "prompt_budget", PromptBudget(max_prompt_tokens=3000, mode="reject"))
+    dummy = dummy_client("Отчёт")
+    app.dependency_overrides[get_llm_client] = lambda: dummy
+    try:
+        rejected = client.post("/vacancy/evaluate", json={"vacancy": "Python", "resume": "Python " * 5000})
+        stream = client.post("/vacancy/evaluate/stream", json={"vacancy": "Python", "resume": "Python " * 5000})
+        accepted = client.post("/vacancy/evaluate", json={"vacancy": "Python", "resume": "Python"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert rejected.status_code == 413
+    assert rejected.json()["limit"] == 3000
+    assert stream.status_code == 413
+    assert accepted.status_code == 200
+    assert int(accepted.headers["X-Prompt-Tokens"]) <= 3000
+    assert float(accepted.headers["X-Estimated-Cost"]) > 0
+    if not vacancy.token_counter("gpt-4o-mini").exact:
+        assert accepted.headers["X-Prompt-Tokens-Estimated"] == "1"
+    assert len(dummy.calls) == 1
+
+    with pytest.raises(PromptTooLarge):
+        PromptBudget(max_prompt_tokens=5, mode="trim").fit(lambda text: [{"content": "x" * 100 + text}], "y", "gpt-4o-mini", 10)
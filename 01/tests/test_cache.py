@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+from app.services.cache import CompletionCache, MemoryTier, SQLiteTier
+
+
+def test_memory_tier_lru_and_size_eviction():
+    tier = MemoryTier(max_entries=2, max_bytes=10, ttl=60)
+    tier.set("a", "1111")
+    tier.set("b", "2222")
+    tier.get("a")
+    tier.set("c", "3333")
+    assert tier.get("b") is None
+    assert tier.get("a") == "1111"
+
+    tier.set("d", "44444444")
+    assert len(tier) == 1
+    assert tier.size_bytes == 8
+
+
+def test_memory_tier_ttl():
+    tier = MemoryTier(ttl=0.01)
+    tier.set("a", "1")
+    time.sleep(0.02)
+    assert tier.get("a") is None
+
+
+def test_completion_cache_key_and_sqlite_tier(tmp_path):
+    key = CompletionCache.make_key(input="Python  dev\n", prompt_version="v1", model="m", temperature=0)
+    assert key == CompletionCache.make_key(input="Python dev", prompt_version="v1", model="m", temperature=0)
+    assert key != CompletionCache.make_key(input="Python dev", prompt_version="v2", model="m", temperature=0)
+
+    persistent = SQLiteTier(str(tmp_path / "cache.db"))
+    cache = CompletionCache(persistent=persistent)
+    assert not cache.cacheable(0.7)
+
+    async def scenario():
+        assert await cache.get(key, 0) is None
+        await cache.set(key, "answer", 0)
+        cache.memory.clear()
+        return await cache.get(key, 0)
+
+    value = asyncio.run(scenario())
+    assert value == "answer"
+    assert (cache.hits, cache.misses) == (1, 1)
+    persistent.close()
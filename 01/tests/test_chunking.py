@@ -0,0 +1,78 @@
+import asyncio
+
+from app.services import vacancy
+from app.services.budget import approx_tokens
+from app.services.chunking import chunk_text, is_heading, split_sections
+from app.services.prompts import Prompt
+
+SYSTEM = Prompt("system_evaluate", "Оцени резюме.", "v1", 0)
+
+
+def make_resume(experience: str = "Разработка API на FastAPI, PostgreSQL, Redis.") -> str:
+    return (
+        "Иван Иванов\nPython developer\n\n"
+        "Опыт работы\n" + "\n".join(f"Компания {i}, 2015-2024. {experience}" for i in range(30)) + "\n\n"
+        "ОБРАЗОВАНИЕ\nМГУ, прикладная математика, " + "курсовые проекты по анализу данных. " * 20 + "\n\n"
+        "Навыки:\n" + "Python, SQL, Docker, Kubernetes, Linux. " * 20
+    )
+
+
+def test_headings_and_sections():
+    assert is_heading("Опыт работы")
+    assert is_heading("ОБРАЗОВАНИЕ")
+    assert is_heading("## Projects")
+    assert is_heading("Ключевые навыки:")
+    assert not is_heading("МГУ")
+    assert not is_heading("Python developer")
+    assert not is_heading("Разработка API. Код-ревью.")
+
+    sections = split_sections("Иван\n\nОпыт работы\nСбер\n\nОБРАЗОВАНИЕ\nМГУ")
+    assert sections == ["Иван", "Опыт работы\nСбер", "ОБРАЗОВАНИЕ\nМГУ"]
+
+
+def test_chunks_respect_limit_and_keep_all_text():
+    resume = make_resume()
+    chunks = chunk_text(resume, 300, approx_tokens)
+
+    assert len(chunks) > 3
+    assert all(approx_tokens(chunk) <= 300 for chunk in chunks)
+    assert " ".join(chunks).split() == resume.split()
+
+
+def test_edit_in_one_section_changes_only_its_chunks():
+    before = chunk_text(make_resume(), 300, approx_tokens)
+    after = chunk_text(make_resume("Разработка API на Django."), 300, approx_tokens)
+
+    changed = [chunk for chunk in after if chunk not in before]
+    assert changed and all("Компания" in chunk for chunk in changed)
+    assert [chunk for chunk in after if "ОБРАЗОВАНИЕ" in chunk or "Навыки" in chunk] == [
+        chunk for chunk in before if "ОБРАЗОВАНИЕ" in chunk or "Навыки" in chunk
+    ]
+
+
+def test_long_resume_is_evaluated_map_reduce_with_chunk_cache(dummy_client, monkeypatch):
+    monkeypatch.setattr(vacancy, "EVALUATE_CHUNK_THRESHOLD", 500)
+    monkeypatch.setattr(vacancy, "EVALUATE_CHUNK_TOKENS", 300)
+    client = dummy_client("Выжимка: Python, 9 лет")
+
+    report = asyncio.run(vacancy.evaluate_resume("Python-разработчик", make_resume(), client, SYSTEM))
+    chunks = vacancy._resume_chunks(make_resume())
+    assert report == "Выжимка: Python, 9 лет"
+    # map по разделам + один reduce
+    assert len(client.calls) == len(chunks) + 1
+    reduce_prompt = client.calls[-1]["messages"][1]["content"]
+    assert f"Раздел {len(chunks)}:" in reduce_prompt
+    assert all(call["temperature"] == 0 for call in client.calls[:-1])
+
+    client.calls.clear()
+    asyncio.run(vacancy.evaluate_resume("Python-разработчик", make_resume("Разработка API на Django."), client, SYSTEM))
+    edited = len([c for c in vacancy._resume_chunks(make_resume("Разработка API на Django.")) if c not in chunks])
+    # заново оцениваются только изменённые разделы
+    assert len(client.calls) == edited + 1
+    assert edited < len(chunks)
+
+
+def test_short_resume_uses_single_prompt(dummy_client):
+    client = dummy_client("Отчёт")
+    asyncio.run(vacancy.evaluate_resume("Python", "Python, 3 года", client, SYSTEM))
+    assert len(client.calls) == 1
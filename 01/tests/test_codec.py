@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.codec import VACANCY_ADAPTER, dumps, loads
+from app.main import app
+from app.models.vacancy import Vacancy
+from app.services.batch import iter_json_array
+from app.services.llm import get_llm_client
+from tests.test_vacancy import VACANCY_JSON
+
+client = TestClient(app)
+
+
+async def _chunks(body: bytes, size: int):
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+
+def _collect(body: bytes, size: int) -> list:
+    async def scenario():
+        return [item async for item in iter_json_array(_chunks(body, size))]
+
+    return asyncio.run(scenario())
+
+
+def test_dumps_matches_json_and_pydantic():
+    vacancy = Vacancy.model_validate_json(VACANCY_JSON)
+    assert dumps(vacancy) == VACANCY_ADAPTER.dump_json(vacancy)
+
+    payload = {"items": [vacancy, {"Город": "Москва"}], "skills": ("Python",), "next": None}
+    assert loads(dumps(payload)) == json.loads(json.dumps({**payload, "items": [vacancy.model_dump(), {"Город": "Москва"}], "skills": ["Python"]}))
+    assert "Москва".encode() in dumps(payload)
+
+
+def test_json_array_split_across_any_chunks():
+    items = [{"description": 'кавычки " и скобки ], {', "tags": [1, {"a": "\\"}]}, "a,b]", None, [], {}, 42]
+    body = json.dumps(items, ensure_ascii=False).encode()
+    for size in (1, 2, 3, 7, len(body)):
+        assert _collect(body, size) == items
+
+    # битый элемент — ошибка этого элемента, остальные разбираются
+    parsed = _collect(b" [1, tru, 3] ", 4)
+    assert parsed[0] == 1 and isinstance(parsed[1], ValueError) and parsed[2] == 3
+    assert _collect(b"[]", 1) == []
+
+    for bad in (b'{"a": 1}', b'"text"', b"[1, 2", b"[1] [2]", b"[1}"):
+        with pytest.raises(ValueError):
+            _collect(bad, 3)
+
+
+def test_batch_streams_json_array_and_generate_validates_body(dummy_client):
+    app.dependency_overrides[get_llm_client] = lambda: dummy_client(VACANCY_JSON)
+    try:
+        body = json.dumps(["Вакансия Python", {"description": "Вакансия Go"}, 5]).encode()
+        response = client.post("/vacancy/parse/batch", content=(body[i:i + 5] for i in range(0, len(body), 5)), headers={"content-type": "application/json"})
+        invalid = client.post("/vacancy/generate", json={"Должность": ["не строка"]})
+        broken = client.post("/vacancy/generate", content='{"Должность": '.encode(), headers={"content-type": "application/json"})
+    finally:
+        app.dependency_overrides.clear()
+
+    lines = {line["index"]: line["result"] for line in map(json.loads, response.text.splitlines())}
+    assert lines[0]["company"] == lines[1]["company"] == "TechSolutions"
+    assert lines[2]["parse_error"] is True
+    assert invalid.status_code == 422 and invalid.json()["detail"][0]["loc"] == ["body", "Должность"]
+    assert broken.status_code == 422
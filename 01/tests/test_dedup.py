@@ -0,0 +1,126 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.cache import completion_cache
+from app.services.dedup import MinHasher, NearDuplicateIndex, index_evictions, parse_index
+from app.services.llm import get_llm_client
+from app.services.vacancy import near_dup_lookups
+from tests.test_vacancy import VACANCY_JSON
+
+client = TestClient(app)
+
+POSTING = "\n".join(
+    f"Пункт {i}: разработка сервиса {word} на Python, ревью кода и работа с командой {word}"
+    for i, word in enumerate(["платежей", "заказов", "доставки", "склада", "отчётов", "поиска", "уведомлений", "логистики"])
+)
+
+
+def test_similarity_of_edited_and_unrelated_texts():
+    index = NearDuplicateIndex("test")
+    index.add(POSTING, "posting")
+    index.add("Повар в ресторан, сменный график, питание за счёт компании", "cook")
+
+    edited = POSTING + "\nОпубликовано 12.03.2025"
+    similarity, value = index.query(edited, 0.6)
+    assert value == "posting"
+    assert similarity >= 0.8
+    assert index.query("Водитель погрузчика на склад, ночные смены", 0.6) is None
+    assert index.query("...", 0.6) is None
+    # подпись не зависит от регистра и разбиения на строки
+    assert (MinHasher().signature(POSTING.upper()) == MinHasher().signature(" ".join(POSTING.split()))).all()
+
+
+def test_index_is_bounded_and_evicts_least_recently_used():
+    index = NearDuplicateIndex("test_lru", max_entries=2)
+    index.add(POSTING, 0)
+    index.add("Повар в ресторан, сменный график, питание за счёт компании", 1)
+    # обращение продлевает жизнь записи — вытесняется повар
+    assert index.query(POSTING + "\nальфа", 0.6)[1] == 0
+    index.add("Водитель погрузчика на склад, ночные смены и доставка", 2)
+
+    assert len(index) == 2
+    assert index.query("Повар в ресторан, сменный график, питание за счёт компании", 0.6) is None
+    assert index.query(POSTING, 0.99)[1] == 0
+    assert index_evictions.value(kind="test_lru") == 1
+    assert not any(1 in ids for band in index._buckets for ids in band.values())
+
+
+def test_parse_sends_diff_for_near_duplicate(dummy_client):
+    dummy = dummy_client(VACANCY_JSON)
+    diffs = near_dup_lookups.value(kind="parse", result="diff")
+    app.dependency_overrides[get_llm_client] = lambda: dummy
+    try:
+        client.post("/vacancy/parse", json={"description": POSTING})
+        # перепубликация с другой компанией — готовый разбор не отдаётся, в LLM уходит diff
+        reposted = client.post("/vacancy/parse", json={"description": POSTING + "\nКомпания: ООО Ромашка"})
+        # поменялись два пункта — тоже только diff
+        lines = POSTING.splitlines()
+        lines[2] = "Пункт 2: разработка сервиса доставки на Go, дежурства и работа с командой доставки"
+        lines[5] = "Пункт 5: поддержка поиска на Elasticsearch, дежурства и ревью кода"
+        changed = client.post("/vacancy/parse", json={"description": "\n".join(lines)})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert reposted.headers["X-Parse-Source"] != "near_duplicate"
+    assert "+Компания: ООО Ромашка" in dummy.calls[1]["messages"][0]["content"]
+    assert len(dummy.calls) == 3
+
+    # правила ещё могут дополнить поля — тогда источник merged
+    assert near_dup_lookups.value(kind="parse", result="diff") == diffs + 2
+    assert "X-Near-Duplicate" in changed.headers
+    prompt = dummy.calls[-1]["messages"][0]["content"]
+    assert "+Пункт 5: поддержка поиска на Elasticsearch" in prompt
+    assert "-Пункт 2:" in prompt
+    assert "Пункт 7" not in prompt
+    assert len(parse_index) == 3
+
+
+def test_parse_reuses_same_text_only_for_same_prompt_and_route(dummy_client, isolated_store, monkeypatch):
+    from app.services import vacancy
+
+    # хранилище выключено — тот же текст узнаёт индекс почти-дубликатов
+    monkeypatch.setattr(isolated_store, "enabled", False)
+    dummy = dummy_client(VACANCY_JSON)
+    app.dependency_overrides[get_llm_client] = lambda: dummy
+    try:
+        client.post("/vacancy/parse", json={"description": POSTING})
+        same = client.post("/vacancy/parse", json={"description": "  " + POSTING})
+        monkeypatch.setattr(vacancy, "PARSE_PROMPT_VERSION", "other")
+        reloaded = client.post("/vacancy/parse", json={"description": POSTING})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert same.headers["X-Parse-Source"] == "near_duplicate"
+    # после смены промпта прошлый разбор не подходит
+    assert reloaded.headers["X-Parse-Source"] != "near_duplicate"
+    assert len(dummy.calls) == 2
+
+
+def test_generate_reuses_near_duplicate(dummy_client, monkeypatch):
+    monkeypatch.setattr(completion_cache, "cache_nondeterministic", True)
+    dummy = dummy_client("Описание вакансии")
+    app.dependency_overrides[get_llm_client] = lambda: dummy
+    fields = {f"Поле {i}": f"значение номер {i} для описания" for i in range(20)}
+    try:
+        first = client.post("/vacancy/generate", json=fields)
+        second = client.post("/vacancy/generate", json={**fields, "Дата": "12.03.2025"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert second.json() == first.json()
+    assert "X-Near-Duplicate" in second.headers
+    assert len(dummy.calls) == 1
+
+
+def test_generate_does_not_reuse_nondeterministic_output_by_default(dummy_client):
+    dummy = dummy_client("Описание вакансии")
+    app.dependency_overrides[get_llm_client] = lambda: dummy
+    fields = {f"Поле {i}": f"значение номер {i} для описания" for i in range(20)}
+    try:
+        client.post("/vacancy/generate", json=fields)
+        second = client.post("/vacancy/generate", json={**fields, "Дата": "12.03.2025"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert "X-Near-Duplicate" not in second.headers
+    assert len(dummy.calls) == 2
@@ -0,0 +1,146 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.vacancy import Vacancy
+from app.services.extraction import (
+    ExtractionError,
+    IncrementalJSONObject,
+    VACANCY_RESPONSE_FORMAT,
+    extract_vacancy_json,
+)
+from app.services.llm import get_llm_client
+from app.services.usage import llm_tokens, track_cost
+from tests.conftest import DummyStream
+from tests.test_vacancy import VACANCY_JSON
+
+
+class RepairingClient:
+    """Поток отдаёт stream_content, обычный запрос (исправление) — repair_content."""
+
+    def __init__(self, dummy_client, stream_content, repair_content):
+        self.streaming = dummy_client(stream_content)
+        self.repairing = dummy_client(repair_content)
+        self.calls = []
+        outer = self
+
+        class Completions:
+            async def create(self, **kwargs):
+                outer.calls.append(kwargs)
+                target = outer.streaming if kwargs.get("stream") else outer.repairing
+                return await target.chat.completions.create(**kwargs)
+
+        self.chat = type("obj", (), {"completions": Completions()})
+
+
+def test_incremental_parser_emits_fields_before_end():
+    parser = IncrementalJSONObject()
+    assert parser.feed('{"job_title": "Dev", "skills": ["Py') == [("job_title", "Dev")]
+    assert parser.feed('thon", "Git"], "company"') == [("skills", ["Python", "Git"])]
+    assert parser.feed(': null}') == [("company", None)]
+    assert parser.complete
+
+
+def test_incremental_parser_accepts_code_fence():
+    parser = IncrementalJSONObject()
+    fields = parser.feed('```json\n{"job_title": "Dev"}\n```')
+    assert fields == [("job_title", "Dev")]
+    assert parser.complete
+
+
+def test_incremental_parser_fails_on_first_bad_field():
+    parser = IncrementalJSONObject()
+    with pytest.raises(json.JSONDecodeError):
+        parser.feed('{"job_title": Dev, "company": "X"')
+
+
+def test_strict_schema_requires_every_field():
+    schema = VACANCY_RESPONSE_FORMAT["json_schema"]["schema"]
+    assert set(schema["required"]) == set(Vacancy.model_fields)
+    assert schema["additionalProperties"] is False
+
+
+def test_stream_is_aborted_on_syntax_error(dummy_client):
+    client = RepairingClient(dummy_client, 'Sorry, I cannot {"job_title": "Dev"}', "still not json")
+    with pytest.raises(ExtractionError) as info:
+        asyncio.run(extract_vacancy_json(client, "gpt-4o-mini", "prompt"))
+    # поток закрыт на первом же токене, затем одна попытка исправления
+    assert client.streaming.streams[0].closed
+    assert [bool(call.get("stream")) for call in client.calls] == [True, False]
+    assert info.value.raw_output == "still not json"
+
+
+def test_truncated_output_is_repaired(dummy_client):
+    truncated = VACANCY_JSON[: len(VACANCY_JSON) // 2]
+    client = RepairingClient(dummy_client, truncated, "```json\n" + VACANCY_JSON + "\n```")
+    seen = []
+    content = asyncio.run(extract_vacancy_json(client, "gpt-4o-mini", "prompt", lambda n, v: seen.append(n)))
+    assert Vacancy.model_validate_json(content).job_title == "Senior Python Developer"
+    assert seen[:2] == ["job_title", "company"]
+    repair_messages = client.calls[1]["messages"]
+    assert repair_messages[1]["role"] == "assistant"
+    assert repair_messages[1]["content"].strip() == truncated.strip()
+    assert "Truncated JSON" in repair_messages[2]["content"]
+
+
+def test_schema_violation_is_repaired(dummy_client):
+    wrong_type = VACANCY_JSON.replace('"skills": ["Python", "Django", "REST API", "PostgreSQL", "Git"]', '"skills": 5')
+    client = RepairingClient(dummy_client, wrong_type, VACANCY_JSON)
+    content = asyncio.run(extract_vacancy_json(client, "gpt-4o-mini", "prompt"))
+    assert Vacancy.model_validate_json(content).skills[0] == "Python"
+    assert len(client.calls) == 2
+
+
+def test_parse_stream_endpoint_emits_fields_then_result(dummy_client):
+    app.dependency_overrides[get_llm_client] = lambda: dummy_client(VACANCY_JSON)
+    try:
+        response = TestClient(app).post("/vacancy/parse/stream", json={"description": "text"})
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 200
+    events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+    names = [event[0].removeprefix("event: ") for event in events]
+    assert names == ["field"] * len(Vacancy.model_fields) + ["result"]
+    assert json.loads(events[0][1].removeprefix("data: ")) == {"name": "job_title", "value": "Senior Python Developer"}
+    assert json.loads(events[-1][1].removeprefix("data: "))["company"] == "TechSolutions"
+
+
+class UsageStream(DummyStream):
+    """Поток как у OpenAI с include_usage: после ответа — чанк без choices, с usage."""
+
+    async def _chunks(self):
+        async for chunk in super()._chunks():
+            yield chunk
+        usage = type("obj", (), {"prompt_tokens": 120, "completion_tokens": 80, "total_tokens": 200})
+        yield type("obj", (), {"choices": [], "usage": usage})
+
+
+def test_streamed_parse_records_usage(dummy_client):
+    model = "gpt-4o-mini"
+    with_usage = dummy_client(VACANCY_JSON)
+
+    async def create(**kwargs):
+        return UsageStream(VACANCY_JSON)
+
+    with_usage.chat.completions.create = create
+    without_usage = dummy_client(VACANCY_JSON)
+
+    async def scenario(client):
+        with track_cost() as spent:
+            await extract_vacancy_json(client, model, "text")
+        return spent[0]
+
+    prompt, completion = llm_tokens.value(model=model, type="prompt"), llm_tokens.value(model=model, type="completion")
+    spent = asyncio.run(scenario(with_usage))
+    # чанк с usage идёт после закрывающей скобки JSON — его всё равно дочитываем
+    assert llm_tokens.value(model=model, type="prompt") == prompt + 120
+    assert llm_tokens.value(model=model, type="completion") == completion + 80
+    assert spent > 0
+
+    # без usage в потоке — по подсчёту токенов промпта и ответа
+    completion = llm_tokens.value(model=model, type="completion")
+    asyncio.run(scenario(without_usage))
+    assert llm_tokens.value(model=model, type="completion") > completion
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.jobs import JobQueue, JobStore, job_queue
+from app.services.llm import get_llm_client
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(path=str(tmp_path / "jobs.db"), workers=2, lease=0.2, max_attempts=2, poll_interval=0.05, callback_attempts=1,
+                     callback_hosts=["client"], retry_backoff=0)
+
+    async def echo(payload):
+        return {"echo": payload["text"]}
+
+    queue.register("echo", echo)
+    return queue
+
+
+def test_job_is_processed_and_stored(queue):
+    async def main():
+        job_id = await queue.submit("echo", {"text": "привет"})
+        assert (await queue.get(job_id))["status"] == "queued"
+        assert await queue.run_once()
+        assert not await queue.run_once()
+        return await queue.get(job_id)
+
+    job = asyncio.run(main())
+    assert job["status"] == "done"
+    assert job["result"] == {"echo": "привет"}
+    assert job["attempts"] == 1
+
+
+def test_failing_job_is_retried_then_failed(queue):
+    calls = []
+
+    async def broken(payload):
+        calls.append(1)
+        raise RuntimeError("upstream down")
+
+    queue.register("broken", broken)
+
+    async def main():
+        job_id = await queue.submit("broken", {})
+        while await queue.run_once():
+            pass
+        return await queue.get(job_id)
+
+    job = asyncio.run(main())
+    assert len(calls) == 2
+    assert job["status"] == "failed"
+    assert job["error"] == "RuntimeError: upstream down"
+
+
+def test_failed_job_waits_backoff_before_retry(queue):
+    queue.retry_backoff = 0.1
+
+    async def broken(payload):
+        raise RuntimeError("upstream down")
+
+    queue.register("broken", broken)
+
+    async def main():
+        job_id = await queue.submit("broken", {})
+        assert await queue.run_once()
+        # задача снова в очереди, но до конца паузы её не берут
+        assert (await queue.get(job_id))["status"] == "queued"
+        assert not await queue.run_once()
+        await asyncio.sleep(0.12)
+        assert await queue.run_once()
+        return await queue.get(job_id)
+
+    job = asyncio.run(main())
+    assert job["status"] == "failed"
+    assert job["attempts"] == 2
+
+
+def test_callback_url_must_be_allowed(queue, dummy_client):
+    for url in ("http://169.254.169.254/latest/meta-data", "file:///etc/passwd", "ftp://client/hook", "//client/hook"):
+        with pytest.raises(ValueError):
+            asyncio.run(queue.submit("echo", {"text": "x"}, url))
+    assert asyncio.run(queue.submit("echo", {"text": "x"}, "https://CLIENT:8443/hook"))
+
+    app.dependency_overrides[get_llm_client] = lambda: dummy_client("")
+    try:
+        response = TestClient(app).post(
+            "/vacancy/evaluate?async=true&callback_url=http://localhost:8000/admin", json={"vacancy": "v", "resume": "r"}
+        )
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 400
+    assert "not allowed" in response.json()["detail"]
+
+
+def test_job_of_crashed_worker_is_resumed(queue):
+    async def main():
+        job_id = await queue.submit("echo", {"text": "x"})
+        # воркер взял задачу и «упал», не завершив её
+        assert queue.store.claim(lease=0.05)["id"] == job_id
+        assert not await queue.run_once()
+        await asyncio.sleep(0.06)
+        # новый процесс с тем же файлом очереди подхватывает задачу после истечения аренды
+        restarted = JobQueue(path=queue.path)
+        restarted.register("echo", queue.handlers["echo"])
+        assert await restarted.run_once()
+        return await restarted.get(job_id)
+
+    job = asyncio.run(main())
+    assert job["status"] == "done"
+    assert job["attempts"] == 2
+
+
+def test_workers_drain_queue_and_send_callbacks(queue):
+    received = []
+
+    def handler(request: httpx.Request):
+        received.append(json.loads(request.content))
+        return httpx.Response(200)
+
+    async def main():
+        queue._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        queue.start()
+        ids = [await queue.submit("echo", {"text": str(i)}, "http://client/hook") for i in range(5)]
+        deadline = time.monotonic() + 5
+        while len(received) < 5 and time.monotonic() < deadline:
+            await asyncio.sleep(0.02)
+        await queue.stop()
+        return ids, [await queue.get(job_id) for job_id in ids]
+
+    ids, jobs = asyncio.run(main())
+    assert {job["status"] for job in jobs} == {"done"}
+    assert {job["callback_status"] for job in jobs} == {"ok"}
+    assert sorted(body["id"] for body in received) == sorted(ids)
+    assert received[0]["status"] == "done"
+
+
+def test_async_evaluate_returns_job_id_and_result_is_polled(monkeypatch, tmp_path, dummy_client):
+    from app.services.llm import llm_provider
+
+    monkeypatch.setattr(job_queue, "_store", JobStore(str(tmp_path / "jobs.db")))
+    monkeypatch.setattr(llm_provider, "_client", dummy_client("Итоговая оценка: 8/10"))
+    api = TestClient(app)
+
+    response = api.post("/vacancy/evaluate?async=true", json={"vacancy": "v", "resume": "r"})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert response.headers["Location"] == f"/jobs/{job_id}"
+    assert api.get(f"/jobs/{job_id}").json()["status"] == "queued"
+
+    assert asyncio.run(job_queue.run_once())
+    job = api.get(f"/jobs/{job_id}").json()
+    assert job["status"] == "done"
+    assert job["result"]["evaluation"] == "Итоговая оценка: 8/10"
+    assert api.get("/jobs/missing").status_code == 404
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.limiter import AdaptiveLimiter, LLMOverloaded, llm_limiter
+
+
+def test_limit_queues_excess_calls_in_order():
+    limiter = AdaptiveLimiter(initial=2, queue_size=10, queue_timeout=1)
+    order = []
+
+    async def call(n):
+        async with limiter.slot("parse"):
+            order.append(n)
+            assert limiter.inflight <= 2
+            await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(*(call(n) for n in range(6)))
+
+    asyncio.run(main())
+    assert order == list(range(6))
+    assert limiter.inflight == 0
+
+
+def test_full_queue_is_shed_immediately():
+    limiter = AdaptiveLimiter(initial=1, queue_size=1, queue_timeout=5)
+
+    async def main():
+        release = asyncio.Event()
+
+        async def hold():
+            async with limiter.slot("parse"):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        queued = asyncio.create_task(hold())
+        await asyncio.sleep(0.01)
+        with pytest.raises(LLMOverloaded) as info:
+            async with limiter.slot("parse"):
+                pass
+        release.set()
+        await asyncio.gather(holder, queued)
+        return info.value
+
+    error = asyncio.run(main())
+    assert error.reason == "queue_full"
+    assert error.retry_after >= 1
+    assert limiter.shed == 1
+
+
+def test_queue_timeout_is_shed():
+    limiter = AdaptiveLimiter(initial=1, queue_size=5, queue_timeout=0.05)
+
+    async def main():
+        async with limiter.slot("parse"):
+            with pytest.raises(LLMOverloaded) as info:
+                async with limiter.slot("parse"):
+                    pass
+        return info.value
+
+    assert asyncio.run(main()).reason == "queue_timeout"
+    assert limiter.inflight == 0
+    assert not limiter._waiters
+
+
+def test_aimd_grows_under_load_and_backs_off_on_overload():
+    limiter = AdaptiveLimiter(initial=4, max_limit=100, backoff=0.5)
+
+    async def main():
+        async def ok():
+            async with limiter.slot("parse"):
+                await asyncio.sleep(0.01)
+
+        for _ in range(5):
+            await asyncio.gather(*(ok() for _ in range(4)))
+        grown = limiter.limit
+
+        with pytest.raises(asyncio.TimeoutError):
+            async with limiter.slot("parse"):
+                raise asyncio.TimeoutError()
+        return grown
+
+    grown = asyncio.run(main())
+    assert grown > 4
+    assert limiter.limit == pytest.approx(grown * 0.5)
+
+
+def test_latency_spike_reduces_limit():
+    limiter = AdaptiveLimiter(initial=10, backoff=0.5, latency_tolerance=2)
+    limiter.on_success("parse", 0.1)
+    limiter.on_success("parse", 1.0)
+    assert limiter.limit == 5
+
+
+def test_api_returns_503_with_retry_after_when_saturated(monkeypatch, dummy_client):
+    from app.services.llm import get_llm_client
+
+    # все слоты заняты, очереди нет
+    monkeypatch.setattr(llm_limiter, "inflight", int(llm_limiter.limit))
+    monkeypatch.setattr(llm_limiter, "queue_size", 0)
+    app.dependency_overrides[get_llm_client] = lambda: dummy_client("ignored")
+    try:
+        api = TestClient(app)
+        parse = api.post("/vacancy/parse", json={"description": "dummy text"})
+        stream = api.post("/vacancy/generate/stream", json={"Должность": "Python"})
+    finally:
+        app.dependency_overrides.clear()
+    assert parse.status_code == 503
+    assert int(parse.headers["Retry-After"]) >= 1
+    assert stream.status_code == 503
@@ -0,0 +1,19 @@
+import asyncio
+
+from app.services.llm import LLMClientProvider
+
+
+def test_provider_reuses_single_client():
+    provider = LLMClientProvider(api_key="test", max_connections=5, max_keepalive_connections=2)
+    client = provider.client
+    assert provider.client is client
+    assert provider.limits.max_connections == 5
+    assert provider.limits.max_keepalive_connections == 2
+
+
+def test_provider_aclose_closes_client():
+    provider = LLMClientProvider(api_key="test")
+    client = provider.client
+    asyncio.run(provider.aclose())
+    assert client.is_closed()
+    assert provider.client is not client
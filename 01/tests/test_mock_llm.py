@@ -0,0 +1,39 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from benchmarks.mock_llm import MockConfig, create_app
+
+
+def chat(client, **body):
+    payload = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "Respond only with valid JSON"}], **body}
+    return client.post("/v1/chat/completions", json=payload)
+
+
+def test_mock_returns_openai_shaped_completion():
+    client = TestClient(create_app(MockConfig(latency_ms=1, seed=1)))
+    response = chat(client)
+    data = response.json()
+    assert response.status_code == 200
+    assert json.loads(data["choices"][0]["message"]["content"])["job_title"] == "Senior Python Developer"
+    assert data["usage"]["total_tokens"] > 0
+
+
+def test_mock_streams_chunks_and_done():
+    client = TestClient(create_app(MockConfig(latency_ms=1, seed=1)))
+    response = chat(client, stream=True)
+    lines = [line for line in response.text.splitlines() if line.startswith("data: ")]
+    assert lines[-1] == "data: [DONE]"
+    assert json.loads(lines[0][6:])["object"] == "chat.completion.chunk"
+
+
+def test_mock_rate_limits_and_errors():
+    client = TestClient(create_app(MockConfig(latency_ms=1, rpm=2, seed=1)))
+    statuses = [chat(client).status_code for _ in range(3)]
+    assert statuses == [200, 200, 429]
+    limited = chat(client)
+    assert limited.headers["x-ratelimit-remaining-requests"] == "0"
+    assert "retry-after" in limited.headers
+
+    failing = TestClient(create_app(MockConfig(latency_ms=1, error_rate=1, seed=1)))
+    assert chat(failing).status_code == 500
@@ -0,0 +1,54 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.vacancy import Vacancy
+from app.services.prescreen import BM25Index, prescreen, tokenize
+
+client = TestClient(app)
+
+RESUMES = [
+    "Повар, 5 лет на кухне ресторана",
+    "Python разработчик: Django, PostgreSQL, REST API, Git",
+    "Java Spring разработка микросервисов",
+    "Python, FastAPI, PostgreSQL",
+]
+
+PROFILE = Vacancy(
+    job_title="Python разработчик",
+    company="TechSolutions",
+    skills=["Python", "Django", "PostgreSQL"],
+    requirements=["знание Git"],
+)
+
+
+def test_tokenize_keeps_tech_terms_and_stems_russian():
+    assert tokenize("C++, C#, Node.js и разработчиков") == ["c++", "c#", "node.js", "и", "разраб"]
+
+
+def test_bm25_ranks_relevant_resumes_first():
+    scores = BM25Index(RESUMES).score({"python": 2.0, "django": 2.0, "postgresql": 2.0})
+    assert scores.argmax() == 1
+    assert scores[0] == 0
+    assert scores[3] > scores[2]
+
+
+def test_prescreen_drops_irrelevant_resumes():
+    result = prescreen(PROFILE, RESUMES, keep_fraction=0.5)
+    assert result.keep == [1, 3]
+    assert result.dropped == 2
+    everyone = prescreen(PROFILE, RESUMES, keep_fraction=1)
+    assert everyone.keep == [0, 1, 2, 3]
+    # отбор выключен — BM25 не считается, нулевые оценки не выдаются за настоящие
+    assert everyone.scores is None
+    assert everyone.dropped == 0
+
+
+def test_prescreen_endpoint_reports_saved_calls():
+    response = client.post("/vacancy/prescreen", json={
+        "vacancy_profile": PROFILE.model_dump(),
+        "resumes": RESUMES,
+        "keep_fraction": 0.25,
+    })
+    data = response.json()
+    assert data["keep"] == [1]
+    assert data["llm_calls_saved"] == 3
@@ -0,0 +1,97 @@
+import pstats
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.context import RequestStateMiddleware
+from app.main import app
+from app.profiling import TimedRoute, TimingMiddleware, server_timing, span
+from app.services.llm import get_llm_client
+from app.services.usage import llm_cost, llm_tokens, record_usage, usage_cost
+from tests.test_vacancy import VACANCY_JSON
+
+client = TestClient(app)
+
+
+def timing_phases(response) -> dict[str, float]:
+    phases = {}
+    for entry in response.headers["Server-Timing"].split(", "):
+        name, _, rest = entry.partition(";dur=")
+        phases[name] = float(rest.split(";")[0])
+    return phases
+
+
+@pytest.fixture
+def override_llm(dummy_client):
+    dummy = dummy_client(VACANCY_JSON)
+    app.dependency_overrides[get_llm_client] = lambda: dummy
+    yield dummy
+    app.dependency_overrides.clear()
+
+
+def test_server_timing_breaks_down_parse(override_llm):
+    response = client.post("/vacancy/parse", json={"description": "Vacancy text"})
+
+    phases = timing_phases(response)
+    for phase in ("validation", "rules", "prompt", "slot_wait", "ttfb", "generation", "parse", "handler", "serialize", "total"):
+        assert phase in phases
+    assert phases["handler"] <= phases["total"]
+    metrics = client.get("/metrics").text
+    assert 'request_phase_seconds_count{phase="ttfb"}' in metrics
+    assert 'http_request_seconds_count{method="POST",route="/vacancy/parse",status="200"}' in metrics
+
+
+def test_server_timing_counts_repeated_phases():
+    header = server_timing({"llm": (0.25, 2), "prompt": (0.0012, 1)}, 0.5)
+    assert header == 'llm;dur=250.0;desc="x2", prompt;dur=1.2, total;dur=500.0'
+
+
+def test_usage_counters_and_request_headers(override_llm):
+    usage = type("obj", (), {"prompt_tokens": 1000, "completion_tokens": 500, "total_tokens": 1500})
+    before = llm_tokens.value(model="gpt-4o-mini", type="completion")
+
+    # снапшот модели считается по цене базовой модели
+    assert usage_cost("gpt-4o-mini-2024-07-18", 1_000_000, 0) == pytest.approx(0.15)
+    assert usage_cost("unknown-model", 1000, 1000) is None
+
+    record_usage("gpt-4o-mini", usage)
+    assert llm_tokens.value(model="gpt-4o-mini", type="completion") == before + 500
+    assert llm_cost.value(model="gpt-4o-mini") > 0
+
+    timed = FastAPI()
+    timed.router.route_class = TimedRoute
+
+    @timed.get("/usage")
+    async def with_usage():
+        with span("llm"):
+            record_usage("gpt-4o", usage)
+            record_usage("gpt-4o", usage)
+        return {}
+
+    timed.add_middleware(TimingMiddleware)
+    timed.add_middleware(RequestStateMiddleware)
+    response = TestClient(timed).get("/usage")
+    assert response.headers["X-LLM-Tokens"] == "3000"
+    assert float(response.headers["X-LLM-Cost"]) == pytest.approx(2 * (1000 * 2.5 + 500 * 10) / 1e6)
+    assert "llm" in timing_phases(response)
+
+
+def test_profiler_is_enabled_by_header(tmp_path):
+    profiled = FastAPI()
+
+    @profiled.get("/work")
+    def work():
+        return {"sum": sum(range(10_000))}
+
+    profiled.add_middleware(TimingMiddleware, profiling=True, profile_dir=str(tmp_path))
+    profiled.add_middleware(RequestStateMiddleware)
+    test_client = TestClient(profiled)
+
+    assert "X-Profile" not in test_client.get("/work").headers
+    response = test_client.get("/work", headers={"X-Profile": "1"})
+    name = response.headers["X-Profile"]
+    path = tmp_path / name
+    assert path.exists()
+    if name.endswith(".prof"):
+        assert pstats.Stats(str(path)).total_calls > 0
@@ -0,0 +1,33 @@
+import asyncio
+import os
+
+from app.services.prompts import PromptStore, prompt_version
+
+
+def test_prompt_store_serves_from_memory(tmp_path):
+    (tmp_path / "system_vacancy.md").write_text("Ты HR", encoding="utf-8")
+    store = PromptStore(base_dir=tmp_path, reload_interval=0)
+
+    prompt = store.get("system_vacancy")
+    assert prompt.text == "Ты HR"
+    assert prompt.version == prompt_version("Ты HR")
+
+    # без refresh() изменения на диске не видны
+    (tmp_path / "system_vacancy.md").write_text("Ты рекрутер", encoding="utf-8")
+    assert store.get("system_vacancy").text == "Ты HR"
+
+
+def test_prompt_store_refresh_picks_up_changes(tmp_path):
+    path = tmp_path / "system_vacancy.md"
+    path.write_text("v1", encoding="utf-8")
+    store = PromptStore(base_dir=tmp_path, reload_interval=0)
+    old_version = store.get("system_vacancy").version
+
+    path.write_text("v2", encoding="utf-8")
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 10**9))
+    (tmp_path / "system_evaluate.md").write_text("eval", encoding="utf-8")
+
+    changed = asyncio.run(store.refresh())
+    assert sorted(changed) == ["system_evaluate", "system_vacancy"]
+    assert store.get("system_vacancy").version != old_version
+    assert store.versions().keys() == {"system_vacancy", "system_evaluate"}
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import re
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.llm import get_llm_client
+from app.services.ranking import extract_score, rank_resumes
+
+client = TestClient(app)
+
+
+class ScoringClient:
+    """Оценка берётся из текста резюме («score=N»), задержка — из «delay=N»."""
+
+    def __init__(self):
+        self.calls = 0
+        outer = self
+
+        class Completions:
+            async def create(self, **kwargs):
+                outer.calls += 1
+                resume = kwargs["messages"][-1]["content"]
+                delay = re.search(r"delay=(\d+)", resume)
+                await asyncio.sleep(int(delay.group(1)) / 100 if delay else 0)
+                score = re.search(r"score=(\d+)", resume).group(1)
+                content = f"Отчет.\nИтоговая оценка: {score}/10\nSCORE: {score}"
+                return type("obj", (), {"choices": [type("obj", (), {"message": type("obj2", (), {"content": content})})]})
+
+        self.chat = type("obj", (), {"completions": Completions()})
+
+
+def test_extract_score_reads_only_final_score_line():
+    assert extract_score("Кандидат подходит.\nSCORE: 7") == 7
+    assert extract_score("Отчет\n**SCORE: 8.5**\n") == 8.5
+    assert extract_score("SCORE: 6/10") == 6
+    # свободный текст отчета оценкой не считается
+    assert extract_score("Оценка соответствия: 7") is None
+    assert extract_score("Оценка (по шкале от 1 до 10): 6") is None
+    assert extract_score("Совпадает 3 из 10 требований. Оценка: 5\nSCORE: 5") == 5
+    assert extract_score("Совпадает 3 из 10 требований.\nSCORE: 42") is None
+    assert extract_score("Без оценки") is None
+
+
+def test_rank_endpoint_streams_sorted_shortlist():
+    app.dependency_overrides[get_llm_client] = lambda: ScoringClient()
+    try:
+        response = client.post("/vacancy/rank", json={
+            "vacancy": "Python разработчик",
+            "resumes": ["score=3", "score=9", "score=6", "score=7"],
+            "top_k": 2,
+        })
+    finally:
+        app.dependency_overrides.clear()
+
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [e["type"] for e in events] == ["result"] * 4 + ["shortlist"]
+    shortlist = events[-1]
+    assert [item["index"] for item in shortlist["items"]] == [1, 3]
+    assert [item["score"] for item in shortlist["items"]] == [9, 7]
+    assert shortlist["evaluated"] == 4
+    assert shortlist["stopped_early"] is False
+
+
+def test_rank_stops_early_when_top_k_has_max_score():
+    scoring = ScoringClient()
+    resumes = ["score=10", "score=10"] + [f"score=5 delay=50 n={i}" for i in range(10)]
+
+    async def scenario():
+        return [event async for event in rank_resumes("вакансия", resumes, scoring, top_k=2, concurrency=2)]
+
+    events = asyncio.run(scenario())
+    shortlist = events[-1]
+    assert shortlist["stopped_early"] is True
+    assert [item["score"] for item in shortlist["items"]] == [10, 10]
+    assert shortlist["skipped"] == 10
+    assert scoring.calls < len(resumes)
+
+
+def test_rank_prescreen_skips_llm_for_irrelevant_resumes():
+    scoring = ScoringClient()
+    resumes = ["Python Django score=8", "Повар score=1", "Python score=6", "Бухгалтер score=2"]
+
+    async def scenario():
+        return [event async for event in rank_resumes(
+            "Python Django разработчик", resumes, scoring, top_k=1, concurrency=2, keep_fraction=0.5
+        )]
+
+    shortlist = asyncio.run(scenario())[-1]
+    assert scoring.calls == 2
+    assert shortlist["prescreened_out"] == 2
+    assert shortlist["llm_calls_saved"] == 2
+    assert shortlist["items"][0]["index"] == 0
+
+
+def test_rank_early_stop_on_large_candidate_list_finishes():
+    # кандидатов больше, чем вмещает входная очередь bounded_map: ранняя остановка
+    # не должна зависнуть на отмене подачи входов
+    scoring = ScoringClient()
+    resumes = [f"score=10 delay=5 n={i}" for i in range(40)]
+
+    async def scenario():
+        return [event async for event in rank_resumes(
+            "вакансия", resumes, scoring, top_k=1, concurrency=2, stable_after=1
+        )]
+
+    shortlist = asyncio.run(asyncio.wait_for(scenario(), timeout=5))[-1]
+    assert shortlist["type"] == "shortlist"
+    assert shortlist["stopped_early"] is True
+    assert shortlist["skipped"] > 30
@@ -0,0 +1,108 @@
+import asyncio
+
+import httpx2
+import pytest
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from benchmarks.mock_llm import MockConfig, create_app
+from app.services.limiter import LLMOverloaded
+from app.services.ratelimit import RateScheduler, TokenBucket, estimate_tokens, parse_duration
+
+MESSAGES = [{"role": "user", "content": "x" * 400}]
+
+
+def usage(total):
+    return type("obj", (), {"total_tokens": total})
+
+
+def test_parse_duration_and_estimate():
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("1.5s") == 1.5
+    assert parse_duration("20ms") == pytest.approx(0.02)
+    assert estimate_tokens(MESSAGES, 50) == 100 + 4 + 50
+
+
+def test_bucket_wait_time_matches_refill_rate():
+    bucket = TokenBucket(6000)  # 100 в секунду
+    bucket.take(6000)
+    assert bucket.wait_time(50) == pytest.approx(0.5, abs=0.01)
+    # запрос больше ёмкости ждёт только полную корзину
+    assert bucket.wait_time(10**6) == pytest.approx(60, abs=0.1)
+
+
+def test_reservation_is_reconciled_with_usage():
+    scheduler = RateScheduler(rpm=100, tpm=10_000, max_wait=1)
+
+    async def main():
+        async with scheduler.reserve(MESSAGES, 1000) as reservation:
+            assert scheduler.tokens.level == pytest.approx(10_000 - reservation.tokens, abs=1)
+            reservation.settle(usage(200))
+
+    asyncio.run(main())
+    # вернулось всё, кроме фактически потраченных токенов
+    assert scheduler.tokens.level == pytest.approx(10_000 - 200, abs=1)
+    assert scheduler.requests.level == pytest.approx(99, abs=0.1)
+
+
+def test_exhausted_quota_waits_or_sheds():
+    scheduler = RateScheduler(rpm=0, tpm=6000, max_wait=1)
+
+    async def main():
+        async with scheduler.reserve(MESSAGES, 5_900 - 104) as reservation:
+            reservation.settle(usage(5_900))
+        # хватит через ~0.5 с — ждём
+        started = asyncio.get_running_loop().time()
+        async with scheduler.reserve(MESSAGES, 0) as reservation:
+            reservation.settle(usage(104))
+        waited = asyncio.get_running_loop().time() - started
+        # нужно ждать минуту — сразу 503
+        with pytest.raises(LLMOverloaded) as info:
+            async with scheduler.reserve(MESSAGES, 6000):
+                pass
+        return waited, info.value
+
+    waited, error = asyncio.run(main())
+    assert 0.03 < waited < 1
+    assert error.reason == "rate_limit"
+    assert error.retry_after > 1
+
+
+def test_headers_tune_limits_and_429_pauses():
+    scheduler = RateScheduler(rpm=0, tpm=0)
+    scheduler.update_from_headers({
+        "x-ratelimit-limit-requests": "500", "x-ratelimit-remaining-requests": "10",
+        "x-ratelimit-limit-tokens": "200000", "x-ratelimit-remaining-tokens": "150000",
+    })
+    assert scheduler.requests.capacity == 500
+    assert scheduler.requests.level == pytest.approx(10, abs=0.1)
+    assert scheduler.tokens.level == pytest.approx(150_000, abs=10)
+
+    response = httpx2.Response(429, headers={"retry-after": "2"})
+    asyncio.run(scheduler.on_response(response))
+    assert scheduler.wait_time(1) == pytest.approx(2, abs=0.1)
+
+
+def test_client_hook_learns_limits_from_upstream(monkeypatch):
+    from app.services import ratelimit, vacancy
+
+    scheduler = RateScheduler(rpm=0, tpm=0)
+    monkeypatch.setattr(ratelimit, "rate_scheduler", scheduler)
+    monkeypatch.setattr(vacancy, "rate_scheduler", scheduler)
+    mock = create_app(MockConfig(latency_ms=1, rpm=300, tpm=90_000, seed=1))
+    client = AsyncOpenAI(
+        api_key="mock",
+        base_url="http://mock/v1",
+        http_client=DefaultAsyncHttpxClient(
+            transport=httpx2.ASGITransport(app=mock),
+            event_hooks={"response": [scheduler.on_response]},
+        ),
+    )
+
+    async def main():
+        report = await vacancy.evaluate_resume("Python developer", "Резюме: Python", client, None)
+        await client.close()
+        return report
+
+    assert "оценка" in asyncio.run(main())
+    assert scheduler.requests.capacity == 300
+    assert scheduler.tokens.capacity == 90_000
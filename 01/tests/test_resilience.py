@@ -0,0 +1,147 @@
+import asyncio
+import json
+import time
+
+import httpx2
+import openai
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.vacancy import Vacancy
+from app.services.resilience import Budget, Resilience, hedge_wins, llm_resilience
+from app.services.vacancy import parse_vacancy
+from tests.test_vacancy import VACANCY_JSON
+
+
+def connection_error():
+    return openai.APIConnectionError(request=httpx2.Request("POST", "http://llm/v1/chat/completions"))
+
+
+def test_decorrelated_jitter_stays_within_bounds():
+    resilience = Resilience(base=0.1, cap=2)
+    sleep = resilience.base
+    for _ in range(50):
+        new = resilience.next_sleep(sleep)
+        assert resilience.base <= new <= min(2, max(resilience.base, sleep * 3))
+        sleep = new
+
+
+def test_transient_error_is_retried_instead_of_parse_error(monkeypatch, dummy_client):
+    monkeypatch.setattr(llm_resilience, "base", 0.001)
+    client = dummy_client(VACANCY_JSON)
+    create = client.chat.completions.create
+    failures = [connection_error()]
+
+    async def flaky_create(**kwargs):
+        if failures:
+            raise failures.pop()
+        return await create(**kwargs)
+
+    client.chat.completions.create = flaky_create
+    result = asyncio.run(parse_vacancy("dummy text", client))
+    assert isinstance(result, Vacancy)
+    assert len(client.calls) == 1
+
+
+def test_retries_stop_when_budget_is_spent():
+    resilience = Resilience(base=0.001, attempts=5, retry_budget=0)
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        raise connection_error()
+
+    with pytest.raises(openai.APIConnectionError):
+        asyncio.run(resilience.call("evaluate", failing))
+    assert len(calls) == 1
+
+
+def test_request_deadline_returns_504(dummy_client):
+    from app.services.llm import get_llm_client
+
+    client = dummy_client("report")
+    create = client.chat.completions.create
+
+    async def slow_create(**kwargs):
+        await asyncio.sleep(1)
+        return await create(**kwargs)
+
+    client.chat.completions.create = slow_create
+    app.dependency_overrides[get_llm_client] = lambda: client
+    try:
+        started = time.monotonic()
+        response = TestClient(app).post(
+            "/vacancy/evaluate",
+            json={"vacancy": "v", "resume": "r"},
+            headers={"X-Request-Timeout": "0.05"},
+        )
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 504
+    assert time.monotonic() - started < 0.9
+
+
+def test_parse_stream_deadline_sends_error_event(dummy_client):
+    from app.services.llm import get_llm_client
+
+    client = dummy_client(VACANCY_JSON)
+    create = client.chat.completions.create
+
+    async def slow_create(**kwargs):
+        await asyncio.sleep(1)
+        return await create(**kwargs)
+
+    client.chat.completions.create = slow_create
+    app.dependency_overrides[get_llm_client] = lambda: client
+    try:
+        response = TestClient(app).post(
+            "/vacancy/parse/stream",
+            json={"description": "Ищем разработчика в команду"},
+            headers={"X-Request-Timeout": "0.2"},
+        )
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 200
+    assert "event: error" in response.text
+    error = [line for line in response.text.splitlines() if line.startswith("data:")][-1]
+    assert json.loads(error[len("data:"):])["status"] == 504
+
+
+def test_hedge_wins_over_slow_primary():
+    resilience = Resilience(hedge_enabled=True, hedge_min_samples=1, hedge_budget=1)
+    for _ in range(10):
+        resilience.latency.observe("evaluate", 0.01)
+    delays = [1.0, 0.0]
+    cancelled = []
+
+    async def attempt():
+        delay = delays.pop(0)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(delay)
+            raise
+        return delay
+
+    wins = hedge_wins.value(kind="evaluate", winner="hedge")
+    started = time.monotonic()
+    assert asyncio.run(resilience.call("evaluate", attempt, hedge=True)) == 0.0
+    assert time.monotonic() - started < 0.5
+    assert cancelled == [1.0]
+    assert hedge_wins.value(kind="evaluate", winner="hedge") == wins + 1
+
+
+def test_hedge_budget_caps_extra_calls():
+    resilience = Resilience(hedge_enabled=True, hedge_min_samples=1)
+    resilience.hedge_budget = Budget(0)
+    resilience.latency.observe("evaluate", 0.001)
+    calls = []
+
+    async def attempt():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    assert asyncio.run(resilience.call("evaluate", attempt, hedge=True)) == "ok"
+    assert len(calls) == 1
@@ -0,0 +1,119 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.llm import get_llm_client
+from app.services.router import ModelRouter, escalations, model_calls, model_router, text_features
+from benchmarks.replay_router import load_runs, simulate
+from tests.conftest import DummyStream
+from tests.test_vacancy import VACANCY_JSON
+
+client = TestClient(app)
+
+# валидный по схеме разбор, но без компании и навыков
+PARTIAL_JSON = json.dumps({**json.loads(VACANCY_JSON), "company": "", "skills": []})
+
+
+class ModelClient:
+    """Отвечает по модели запроса: fast — неполный JSON, strong — полный."""
+
+    def __init__(self, answers: dict[str, str]):
+        self.calls = []
+        outer = self
+
+        class Completions:
+            async def create(self, **kwargs):
+                outer.calls.append(kwargs["model"])
+                content = answers[kwargs["model"]]
+                if kwargs.get("stream"):
+                    return DummyStream(content)
+                return type("obj", (), {"choices": [type("obj", (), {"message": type("obj2", (), {"content": content})})]})
+
+        self.chat = type("obj", (), {"completions": Completions()})
+
+
+@pytest.fixture
+def cascade(monkeypatch, tmp_path):
+    log = tmp_path / "router.jsonl"
+    monkeypatch.setattr(model_router, "routes", {"parse": ["fast", "strong"], "generate": ["fast", "strong"]})
+    monkeypatch.setattr(model_router, "log_path", str(log))
+    return log
+
+
+def test_parse_escalates_when_required_fields_missing(cascade):
+    llm = ModelClient({"fast": PARTIAL_JSON, "strong": VACANCY_JSON})
+    escalated = escalations.value(kind="parse", reason="missing_fields")
+    app.dependency_overrides[get_llm_client] = lambda: llm
+    try:
+        response = client.post("/vacancy/parse", json={"description": "Ищем разработчика в команду"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert llm.calls == ["fast", "strong"]
+    assert response.headers["X-LLM-Model"] == "strong"
+    assert response.json()["company"] == "TechSolutions"
+    assert escalations.value(kind="parse", reason="missing_fields") == escalated + 1
+
+    records = [json.loads(line) for line in cascade.read_text(encoding="utf-8").splitlines()]
+    assert [(r["model"], r["step"]) for r in records] == [("fast", 0), ("strong", 1)]
+    assert records[0]["run"] == records[1]["run"]
+    assert "company" not in records[0]["features"]["filled"]
+
+
+def test_fast_model_answer_is_kept(cascade):
+    llm = ModelClient({"fast": "Описание " * 50, "strong": "не должен вызываться"})
+    accepted = model_calls.value(kind="generate", model="fast", result="ok")
+    app.dependency_overrides[get_llm_client] = lambda: llm
+    try:
+        response = client.post("/vacancy/generate", json={"Должность": "Python разработчик"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert llm.calls == ["fast"]
+    assert response.headers["X-LLM-Model"] == "fast"
+    assert model_calls.value(kind="generate", model="fast", result="ok") == accepted + 1
+
+
+def test_invalid_answer_escalates_and_last_model_is_not_checked():
+    router = ModelRouter(routes={"evaluate": ["a", "b"]}, min_chars={"evaluate": 100}, log_path="")
+    calls = []
+
+    async def call(model):
+        calls.append(model)
+        if model == "a":
+            raise ValueError("broken JSON")
+        return "коротко"
+
+    assert asyncio.run(router.run("evaluate", call, text_features)) == "коротко"
+    assert calls == ["a", "b"]
+    # без маршрута — одна модель по умолчанию
+    assert router.models("parse") == [router.default]
+    assert router.route_key("evaluate") == "a>b"
+
+
+def test_replay_with_other_thresholds(tmp_path):
+    log = tmp_path / "router.jsonl"
+    records = [
+        # короткий ответ fast, доспросили strong
+        {"run": "1", "kind": "generate", "step": 0, "model": "fast", "seconds": 1.0, "cost": 0.001, "features": {"chars": 150}},
+        {"run": "1", "kind": "generate", "step": 1, "model": "strong", "seconds": 3.0, "cost": 0.01, "features": {"chars": 900}},
+        {"run": "2", "kind": "generate", "step": 0, "model": "fast", "seconds": 1.0, "cost": 0.001, "features": {"chars": 500}},
+    ]
+    log.write_text("\n".join(json.dumps(r) for r in records), encoding="utf-8")
+    runs = load_runs(str(log))["generate"]
+    routes = {"generate": ["fast", "strong"]}
+
+    strict = simulate("generate", runs, ModelRouter(routes, min_chars={"generate": 200}, log_path=""))
+    assert (strict.runs, strict.escalated, strict.unknown) == (2, 1, 0)
+    assert strict.cost == pytest.approx(0.012)
+
+    # порог ниже — оба ответа fast проходят, strong не нужен
+    loose = simulate("generate", runs, ModelRouter(routes, min_chars={"generate": 100}, log_path=""))
+    assert (loose.escalated, dict(loose.answered_by)) == (0, {"fast": 2})
+
+    # порог выше — для второго вызова strong не записан: средние по журналу
+    stricter = simulate("generate", runs, ModelRouter(routes, min_chars={"generate": 600}, log_path=""))
+    assert (stricter.escalated, stricter.unknown) == (2, 1)
@@ -0,0 +1,112 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.vacancy import Vacancy
+from app.services.rules import extract_rules, find_skills, normalize_location, normalize_salary
+from app.services.vacancy import llm_calls_avoided, parse_vacancy
+from tests.test_vacancy import VACANCY_JSON
+
+BOARD_POSTING = """Должность: Senior Python-разработчик
+Компания: ООО «Ромашка»
+Город: Москва, гибрид
+Занятость: полная
+Зарплата: от 180 000 ₽
+Ключевые навыки: Python, FastAPI, PostgreSQL/Redis, Коммуникабельность
+
+Требования:
+- опыт коммерческой разработки от 5 лет
+- знание asyncio
+
+Обязанности:
+• разработка микросервисов
+"""
+
+FREE_POSTING = (
+    "Компания TechSolutions ищет Senior Python разработчика для удалённой работы. "
+    "Обязательные навыки: Python, Django, REST API, PostgreSQL. Опыт работы от 5 лет. "
+    "Зарплата: 200 000–250 000 руб."
+)
+
+
+def test_salary_normalizer():
+    assert normalize_salary("200 000–250 000 руб.") == "200000-250000 руб"
+    assert normalize_salary("от 150к ₽") == "от 150000 руб"
+    assert normalize_salary("$5,000 - $7,000") == "5000-7000 USD"
+    assert normalize_salary("до 300 тыс. руб") == "до 300000 руб"
+    # без валюты в свободном тексте числа не считаются зарплатой
+    assert normalize_salary("опыт от 5 лет") is None
+
+
+def test_location_normalizer_and_skills_gazetteer():
+    assert normalize_location("Работа в Санкт-Петербурге")[0] == "Санкт-Петербург"
+    assert normalize_location("Remote, по всему миру")[0] == "удалённо"
+    assert find_skills("Postgres, k8s, C++ и Go; python") == ["PostgreSQL", "Kubernetes", "C++", "Go", "Python"]
+    # «SQL» внутри «PostgreSQL» — не отдельный навык
+    assert find_skills("PostgreSQL") == ["PostgreSQL"]
+
+
+def test_ambiguous_skill_words_in_free_text_are_not_skills():
+    text = "Офис открылся весной (spring) 2024. Go to office three days a week, R&D center nearby."
+    assert find_skills(text, ambiguous=False) == []
+    rules = extract_rules(text)
+    assert "skills" not in rules.fields
+    # в списке навыков те же слова — навыки
+    assert extract_rules("Стек: Go, Spring, R").fields["skills"] == ["Go", "Spring", "R"]
+
+
+def test_board_posting_is_fully_extracted():
+    rules = extract_rules(BOARD_POSTING)
+    vacancy = rules.to_vacancy()
+    assert vacancy.job_title == "Senior Python-разработчик"
+    assert vacancy.company == "ООО «Ромашка»"
+    assert vacancy.location == "Москва"
+    assert vacancy.employment_type == "полная занятость"
+    assert vacancy.experience_level == "senior"
+    assert vacancy.salary == "от 180000 руб"
+    assert vacancy.skills == ["Python", "FastAPI", "PostgreSQL", "Redis", "Коммуникабельность"]
+    assert vacancy.requirements == ["опыт коммерческой разработки от 5 лет", "знание asyncio"]
+    assert vacancy.responsibilities == ["разработка микросервисов"]
+    assert rules.missing(["job_title", "company", "skills", "salary", "location"], 0.8) == []
+
+
+def test_free_text_posting_needs_llm_for_title():
+    rules = extract_rules(FREE_POSTING)
+    assert rules.fields["company"] == "TechSolutions"
+    assert rules.fields["salary"] == "200000-250000 руб"
+    assert rules.missing(["job_title", "company", "skills", "salary", "location"], 0.8) == ["job_title"]
+
+
+def test_parse_vacancy_skips_llm_for_board_posting(dummy_client):
+    client = dummy_client(VACANCY_JSON)
+    avoided = llm_calls_avoided.value()
+    result = asyncio.run(parse_vacancy(BOARD_POSTING, client))
+    assert isinstance(result, Vacancy)
+    assert result.company == "ООО «Ромашка»"
+    assert client.calls == []
+    assert llm_calls_avoided.value() == avoided + 1
+
+
+def test_parse_vacancy_merges_rules_with_llm(dummy_client):
+    client = dummy_client(VACANCY_JSON.replace('"salary": "200000-250000 руб"', '"salary": "по договорённости"'))
+    result = asyncio.run(parse_vacancy(FREE_POSTING, client))
+    assert len(client.calls) == 1
+    # название — из LLM, уверенная зарплата — из правил
+    assert result.job_title == "Senior Python Developer"
+    assert result.salary == "200000-250000 руб"
+
+
+def test_parse_source_header_and_rules_endpoint(dummy_client):
+    from app.services.llm import get_llm_client
+
+    app.dependency_overrides[get_llm_client] = lambda: dummy_client(VACANCY_JSON)
+    try:
+        api = TestClient(app)
+        response = api.post("/vacancy/parse", json={"description": BOARD_POSTING})
+        rules = api.post("/vacancy/parse/rules", json={"description": FREE_POSTING}).json()
+    finally:
+        app.dependency_overrides.clear()
+    assert response.headers["X-Parse-Source"] == "rules"
+    assert rules["llm_fields"] == ["job_title"]
+    assert rules["confidence"]["company"] >= 0.8
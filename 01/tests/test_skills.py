@@ -0,0 +1,76 @@
+import random
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.vacancy import Vacancy
+from app.services.llm import get_llm_client
+from app.services.skills import AhoCorasick, SkillMatcher, skill_matcher, skills_gap
+
+client = TestClient(app)
+
+RESUME = (
+    "Backend-разработчик. Python3, Django и FastAPI; базы — postgres и Redis.\n"
+    "Фронтенд: JavaScript, немного ASP.NET. Пишу на Go, разворачиваю в кубернетес.\n"
+    "Go to market — не про меня."
+)
+
+
+def test_automaton_finds_every_occurrence():
+    rng = random.Random(7)
+    patterns = ["he", "she", "his", "hers", "s", "ушел", "шел"]
+    text = "".join(rng.choice("hers уш") for _ in range(2000))
+    expected = sorted(
+        (i + len(p), pid) for pid, p in enumerate(patterns) for i in range(len(text)) if text.startswith(p, i)
+    )
+    assert sorted(AhoCorasick(patterns).iter(text)) == expected
+
+
+def test_synonyms_boundaries_and_case():
+    found = skill_matcher.find(RESUME)
+
+    assert list(found)[:4] == ["Python", "Django", "FastAPI", "PostgreSQL"]
+    assert RESUME[slice(*found["PostgreSQL"][0])] == "postgres"
+    assert RESUME[slice(*found["Kubernetes"][0])] == "кубернетес"
+    # «Go» — только с заглавной и как отдельное слово; .NET внутри ASP.NET не навык
+    assert len(found["Go"]) == 2
+    assert ".NET" not in found and "Java" not in found
+
+    matcher = SkillMatcher(skills={"Spring": ["spring", "spring boot"]}, synonyms={}, case_sensitive={})
+    # вложенное «spring» внутри «Spring Boot» не считается вторым упоминанием
+    assert matcher.find("Spring Boot, spring") == {"Spring": [(0, 11), (13, 19)]}
+
+
+def test_gap_for_parsed_vacancy():
+    vacancy = Vacancy(
+        job_title="Python Developer",
+        company="TechSolutions",
+        skills=["Python", "Apache Kafka", "Code review"],
+        requirements=["знание PostgreSQL", "опыт от 3 лет"],
+    )
+    gap = skills_gap(vacancy, RESUME + "\nДелаю code review.")
+
+    assert gap.required == ["Python", "Kafka", "Code review", "PostgreSQL"]
+    assert list(gap.matched) == ["Python", "Code review", "PostgreSQL"]
+    assert gap.missing == ["Kafka"]
+    assert gap.coverage == 0.75
+    assert "не найдены: Kafka" in gap.prompt_note()
+
+
+def test_skills_gap_endpoint_and_evaluate_prompt(dummy_client):
+    response = client.post("/vacancy/skills-gap", json={"vacancy": "Нужны Python, Kafka и Docker", "resume": RESUME})
+    data = response.json()
+    assert data["required"] == ["Python", "Kafka", "Docker"]
+    assert data["missing"] == ["Kafka", "Docker"]
+    assert data["matched"][0] == {"skill": "Python", "positions": [[21, 28]]}
+    assert client.post("/vacancy/skills-gap", json={"resume": RESUME}).status_code == 400
+
+    dummy = dummy_client("Отчёт")
+    app.dependency_overrides[get_llm_client] = lambda: dummy
+    try:
+        client.post("/vacancy/evaluate", json={"vacancy": "Нужны Python, Kafka и Docker", "resume": RESUME})
+    finally:
+        app.dependency_overrides.clear()
+    prompt = dummy.calls[0]["messages"][-1]["content"]
+    assert "есть в резюме: Python" in prompt
+    assert "не найдены: Kafka, Docker" in prompt
@@ -0,0 +1,132 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.vacancy import Vacancy
+from app.services.llm import get_llm_client
+from app.services.store import VacancyStore, store_errors
+from tests.test_vacancy import VACANCY_JSON
+
+client = TestClient(app)
+
+
+def vacancy(i: int, company: str, level: str, skills: list[str]) -> Vacancy:
+    return Vacancy(job_title=f"Developer {i}", company=company, experience_level=level, skills=skills)
+
+
+def test_repeated_parse_skips_llm(dummy_client, isolated_store, monkeypatch):
+    # описания и оценки (temperature=0.7) повторно отдаются только при CACHE_NONDETERMINISTIC=1
+    monkeypatch.setattr(isolated_store, "nondeterministic", True)
+    dummy = dummy_client(VACANCY_JSON)
+    app.dependency_overrides[get_llm_client] = lambda: dummy
+    try:
+        first = client.post("/vacancy/parse", json={"description": "Vacancy text"})
+        second = client.post("/vacancy/parse", json={"description": "  Vacancy   text"})
+        generated = [client.post("/vacancy/generate", json={"Должность": "Python"}) for _ in range(2)]
+        evaluated = [client.post("/vacancy/evaluate", json={"vacancy": "Python", "resume": "Python, 3 года"}) for _ in range(2)]
+    finally:
+        app.dependency_overrides.clear()
+
+    assert second.json() == first.json()
+    assert second.headers["X-Parse-Source"] == "store"
+    assert second.headers["X-Vacancy-Id"] == first.headers["X-Vacancy-Id"]
+    assert generated[0].json() == generated[1].json()
+    assert evaluated[0].json() == evaluated[1].json()
+    # по одному вызову LLM на разбор, генерацию и оценку
+    assert len(dummy.calls) == 3
+
+    stored = client.get(f"/vacancies/{first.headers['X-Vacancy-Id']}").json()
+    assert stored["vacancy"]["company"] == first.json()["company"]
+    assert client.get("/descriptions").json()["items"][0]["input"] == {"Должность": "Python"}
+    assert len(client.get("/evaluations", params={"vacancy": "Python"}).json()["items"]) == 1
+    assert client.get("/evaluations", params={"vacancy": "Go"}).json()["items"] == []
+    assert client.get("/vacancies/999").status_code == 404
+
+
+def test_nondeterministic_results_stored_but_not_reused_by_default(dummy_client):
+    dummy = dummy_client("Описание")
+    app.dependency_overrides[get_llm_client] = lambda: dummy
+    try:
+        client.post("/vacancy/generate", json={"Должность": "Python"})
+        for _ in range(2):
+            client.post("/vacancy/evaluate", json={"vacancy": "Python", "resume": "Python, 3 года"})
+    finally:
+        app.dependency_overrides.clear()
+
+    # повторная оценка снова идёт в LLM
+    assert len(dummy.calls) == 3
+    # записи есть, но повтор их не отдаёт
+    assert len(client.get("/descriptions").json()["items"]) == 1
+    assert len(client.get("/evaluations").json()["items"]) == 1
+
+
+def test_vacancy_key_includes_prompt_version_and_model(isolated_store):
+    async def main():
+        await isolated_store.save_vacancy("text", "v1", "model-a", vacancy(1, "A", "B", []), "llm")
+        return [
+            await isolated_store.find_vacancy(" text ", "v1", "model-a"),
+            await isolated_store.find_vacancy("text", "v2", "model-a"),
+            await isolated_store.find_vacancy("text", "v1", "model-b"),
+        ]
+
+    same, other_prompt, other_model = asyncio.run(main())
+    assert same.company == "A"
+    assert other_prompt is None and other_model is None
+
+
+def test_filters_and_keyset_pagination(isolated_store):
+    async def fill():
+        for i in range(7):
+            await isolated_store.save_vacancy(
+                f"text {i}", "v1", "model",
+                vacancy(i, "Yandex" if i % 2 else "Сбер", "Senior" if i < 4 else "Middle", ["Python", "Go" if i % 3 == 0 else "SQL"]),
+                "llm",
+            )
+        # дубль по тексту не создаёт новую запись
+        assert await isolated_store.save_vacancy("text  0", "v1", "model", vacancy(0, "X", "Y", []), "llm") == 1
+
+    asyncio.run(fill())
+
+    pages, after = [], 0
+    while True:
+        page = client.get("/vacancies", params={"skill": "python", "limit": 3, "after": after}).json()
+        pages.append([item["id"] for item in page["items"]])
+        if page["next"] is None:
+            break
+        after = page["next"]
+    assert pages == [[1, 2, 3], [4, 5, 6], [7]]
+
+    go = client.get("/vacancies", params={"skill": "GO"}).json()["items"]
+    assert [item["id"] for item in go] == [1, 4, 7]
+    yandex_senior = client.get("/vacancies", params={"company": "yandex", "experience_level": "senior"}).json()["items"]
+    assert [item["vacancy"]["job_title"] for item in yandex_senior] == ["Developer 1", "Developer 3"]
+
+
+def test_filters_use_indexes(isolated_store):
+    conn = isolated_store.conn
+    plans = {
+        query: " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params))
+        for query, params in [
+            ("SELECT v.id FROM vacancy_skills s JOIN vacancies v ON v.id = s.vacancy_id WHERE s.skill = ? AND v.id > ? ORDER BY v.id", ("python", 0)),
+            ("SELECT id FROM vacancies v WHERE v.id > ? AND v.company = ? ORDER BY v.id", (0, "yandex")),
+            ("SELECT id FROM evaluations WHERE id > ? AND vacancy_hash = ? ORDER BY id", (0, "h")),
+        ]
+    }
+    assert all("SCAN" not in plan or "USING" in plan for plan in plans.values())
+    assert any("PRIMARY KEY" in plan for plan in plans.values())
+    assert any("vacancies_company" in plan for plan in plans.values())
+    assert any("evaluations_vacancy" in plan for plan in plans.values())
+
+
+def test_store_failure_does_not_break_requests(tmp_path):
+    store = VacancyStore(path=str(tmp_path / "missing" / "store.db"))
+    before = store_errors.value()
+
+    async def main():
+        assert await store.find_vacancy("text", "v1", "model") is None
+        assert await store.save_vacancy("text", "v1", "model", vacancy(1, "A", "B", []), "llm") is None
+        return await store.list_vacancies()
+
+    assert asyncio.run(main()) == ([], None)
+    assert store_errors.value() == before + 3
@@ -0,0 +1,45 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.llm import get_llm_client
+from app.services.vacancy import stream_evaluate_resume, stream_ttfb
+
+client = TestClient(app)
+
+
+def sse_tokens(body: str) -> list[str]:
+    return [json.loads(line[len("data: "):])["token"] for line in body.splitlines() if line.startswith("data: {\"token\"")]
+
+
+def test_generate_stream_sends_tokens_as_sse(dummy_client):
+    dummy = dummy_client("Отличная вакансия для Python разработчика")
+    app.dependency_overrides[get_llm_client] = lambda: dummy
+    ttfb_before = stream_ttfb.count(endpoint="generate")
+    try:
+        response = client.post("/vacancy/generate/stream", json={"Должность": "Python разработчик"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "".join(sse_tokens(response.text)).strip() == "Отличная вакансия для Python разработчика"
+    assert "event: done" in response.text
+    assert dummy.calls[0]["stream"] is True
+    assert stream_ttfb.count(endpoint="generate") == ttfb_before + 1
+    assert "llm_stream_ttfb_seconds_count" in client.get("/metrics").text
+
+
+def test_stream_closes_upstream_when_consumer_stops(dummy_client):
+    dummy = dummy_client("один два три четыре")
+
+    async def scenario():
+        tokens = stream_evaluate_resume("вакансия", "резюме", dummy)
+        first = await tokens.__anext__()
+        await tokens.aclose()
+        return first
+
+    assert asyncio.run(scenario()) == "один "
+    assert dummy.streams[0].closed is True
@@ -1,10 +1,9 @@
+import asyncio
 import pytest
 from app.services.vacancy import parse_vacancy
 from app.models.vacancy import Vacancy
 
-def test_parse_vacancy_success(monkeypatch):
-    class DummyResponse:
-        choices = [type("obj", (), {"message": type("obj2", (), {"content": """
+VACANCY_JSON = """
         {
           "job_title": "Senior Python Developer",
           "company": "TechSolutions",
@@ -17,26 +16,36 @@ def test_parse_vacancy_success(monkeypatch):
           "requirements": ["знание Git", "умение работать в команде", "внимательность к деталям"],
           "responsibilities": ["разработка и поддержка веб-приложений", "участие в проектировании архитектуры"]
         }
-        """})})]
+        """
 
-    def dummy_chat_completions_create(*args, **kwargs):
-        return DummyResponse()
-
-    monkeypatch.setattr("app.services.vacancy.client.chat.completions.create", dummy_chat_completions_create)
-
-    result = parse_vacancy("dummy text")
+def test_parse_vacancy_success(dummy_client):
+    result = asyncio.run(parse_vacancy("dummy text", dummy_client(VACANCY_JSON)))
     assert isinstance(result, Vacancy)
     assert result.job_title == "Senior Python Developer"
 
-def test_parse_vacancy_invalid_json(monkeypatch):
-    class DummyResponse:
-        choices = [type("obj", (), {"message": type("obj2", (), {"content": "INVALID_JSON"})})]
+def test_parse_vacancy_invalid_json(dummy_client):
+    result = asyncio.run(parse_vacancy("dummy text", dummy_client("INVALID_JSON")))
+    assert isinstance(result, dict)
+    assert result.get("parse_error") is True
 
-    def dummy_chat_completions_create(*args, **kwargs):
-        return DummyResponse()
+def test_parse_vacancy_coalesces_identical_calls(dummy_client):
+    from app.services.vacancy import inflight
 
-    monkeypatch.setattr("app.services.vacancy.client.chat.completions.create", dummy_chat_completions_create)
+    client = dummy_client(VACANCY_JSON)
+    create = client.chat.completions.create
 
-    result = parse_vacancy("dummy text")
-    assert isinstance(result, dict)
-    assert result.get("parse_error") is True
+    async def slow_create(**kwargs):
+        await asyncio.sleep(0.05)
+        return await create(**kwargs)
+
+    client.chat.completions.create = slow_create
+    coalesced_before = inflight.coalesced
+
+    async def scenario():
+        return await asyncio.gather(*[parse_vacancy("same text", client) for _ in range(5)])
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, Vacancy) for r in results)
+    assert len(client.calls) == 1
+    assert inflight.coalesced - coalesced_before == 4
+    assert inflight.stats()["in_flight"] == 0
@@ -0,0 +1,87 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import importlib.util
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# bcrypt — если установлен; иначе scrypt из стандартной библиотеки
+HAS_BCRYPT = importlib.util.find_spec("bcrypt") is not None
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+SCRYPT_N = int(os.getenv("SCRYPT_N", str(2 ** 14)))
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+# процессов в пуле хэширования (по умолчанию — по числу ядер) и задач в очереди к нему
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "0")) or os.cpu_count() or 1
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", "0")) or HASH_WORKERS * 4
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def _bcrypt_input(password: str) -> bytes:
+    # bcrypt читает только первые 72 байта (5.x — ValueError), а кириллица — 2 байта на символ:
+    # в bcrypt идёт base64(sha256(пароль)) — 44 байта, в хэше участвует весь пароль
+    return base64.b64encode(hashlib.sha256(password.encode("utf-8")).digest())
+
+
+def hash_password(password: str) -> str:
+    """Хэш с солью и параметрами в одной строке: $2b$... (bcrypt) или scrypt$n$r$p$соль$хэш."""
+    if HAS_BCRYPT:
+        import bcrypt
+
+        return bcrypt.hashpw(_bcrypt_input(password), bcrypt.gensalt(BCRYPT_ROUNDS)).decode("ascii")
+    salt = os.urandom(16)
+    digest = hashlib.scrypt(password.encode("utf-8"), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P)
+    return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(digest)}"
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    if hashed.startswith("scrypt$"):
+        _, n, r, p, salt, digest = hashed.split("$")
+        expected = base64.b64decode(digest)
+        actual = hashlib.scrypt(
+            password.encode("utf-8"), salt=base64.b64decode(salt), n=int(n), r=int(r), p=int(p), dklen=len(expected)
+        )
+        return hmac.compare_digest(actual, expected)
+    import bcrypt
+
+    return bcrypt.checkpw(_bcrypt_input(password), hashed.encode("ascii"))
+
+
+class PasswordHasher:
+    """
+    Хэширование паролей в пуле процессов: bcrypt/scrypt занимают ядро на десятки
+    миллисекунд и в event loop остановили бы все запросы. Пул ограничен:
+    workers процессов и не больше max_pending задач в работе и очереди —
+    остальные запросы ждут слота, не раздувая очередь пула.
+    """
+
+    def __init__(self, workers: int = HASH_WORKERS, max_pending: int = HASH_MAX_PENDING):
+        self.workers = workers
+        self._slots = asyncio.Semaphore(max(max_pending, workers))
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def _run(self, fn, *args):
+        async with self._slots:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(verify_password, password, hashed)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
@@ -1,16 +1,38 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, HTTPException, Query
 from app.models import UserRegister
+from app.users import UserExists, UserRegistry, close_registry, get_registry
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # пул процессов хэширования и соединение с базой
+    close_registry()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 @app.post("/auth/register")
-async def register_user(user: UserRegister):
+async def register_user(user: UserRegister, registry: UserRegistry = Depends(get_registry)):
     if user.username.lower() == "admin":
         raise HTTPException(status_code=400, detail="Username 'admin' is not allowed")
     if user.age < 18:
         raise HTTPException(status_code=400, detail="You must be at least 18 years old")
+    try:
+        await registry.register(user)
+    except UserExists as e:
+        raise HTTPException(status_code=409, detail=str(e))
     return {
         "username": user.username,
         "email": user.email,
         "message": "User successfully registered"
     }
+
+@app.get("/auth/username-available")
+async def username_available(
+    username: str = Query(..., min_length=3, max_length=20),
+    registry: UserRegistry = Depends(get_registry),
+):
+    return {"username": username, "available": await registry.username_available(username)}
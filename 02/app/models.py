@@ -4,9 +4,16 @@ class UserRegister(BaseModel):
     username: str
     email: EmailStr
     age: int
+    password: str
 
     @field_validator("username")
     def username_length(cls, v):
         if not (3 <= len(v) <= 20):
             raise ValueError("Username length must be between 3 and 20 characters")
         return v
+
+    @field_validator("password")
+    def password_length(cls, v):
+        if not (8 <= len(v) <= 128):
+            raise ValueError("Password length must be between 8 and 128 characters")
+        return v
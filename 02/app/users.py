@@ -0,0 +1,149 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from app.bloom import BloomFilter
+from app.hashing import PasswordHasher
+from app.models import UserRegister
+
+# SQLite-файл с пользователями; по умолчанию — в памяти процесса
+USERS_DB = os.getenv("USERS_DB", ":memory:")
+# на сколько имён рассчитан Bloom-фильтр (≈1.2 МБ на миллион при 1% ложных «занято»)
+USERS_BLOOM_CAPACITY = int(os.getenv("USERS_BLOOM_CAPACITY", "1000000"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    email TEXT NOT NULL,
+    username_key TEXT NOT NULL,
+    email_key TEXT NOT NULL,
+    password_hash TEXT NOT NULL,
+    age INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS users_username_key ON users (username_key);
+CREATE UNIQUE INDEX IF NOT EXISTS users_email_key ON users (email_key);
+"""
+
+
+def normalize(value: str) -> str:
+    # ключ уникальности: Alice, ALICE и «ａｌｉｃｅ» (полноширинные) — одно имя
+    return unicodedata.normalize("NFKC", value).strip().casefold()
+
+
+class UserExists(Exception):
+    def __init__(self, field: str):
+        super().__init__(f"{field} is already taken")
+        self.field = field
+
+
+class UserStore:
+    """
+    Пользователи в SQLite. Уникальность username/email без учёта регистра держат
+    уникальные индексы по нормализованным ключам — проверка и вставка атомарны,
+    гонка двух одинаковых регистраций заканчивается UserExists у второй.
+    """
+
+    def __init__(self, path: str = USERS_DB):
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+
+    def _insert(self, user: UserRegister, password_hash: str) -> int:
+        try:
+            with self._lock, self.conn:
+                cursor = self.conn.execute(
+                    "INSERT INTO users (username, email, username_key, email_key, password_hash, age, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (user.username, user.email, normalize(user.username), normalize(user.email),
+                     password_hash, user.age, time.time()),
+                )
+        except sqlite3.IntegrityError as e:
+            raise UserExists("Email" if "email_key" in str(e) else "Username") from None
+        return cursor.lastrowid
+
+    def _exists(self, column: str, key: str) -> bool:
+        with self._lock:
+            return self.conn.execute(f"SELECT 1 FROM users WHERE {column} = ?", (key,)).fetchone() is not None
+
+    def keys(self, column: str) -> list[str]:
+        with self._lock:
+            return [row[0] for row in self.conn.execute(f"SELECT {column} FROM users")]
+
+    async def create(self, user: UserRegister, password_hash: str) -> int:
+        return await asyncio.to_thread(self._insert, user, password_hash)
+
+    async def exists(self, column: str, key: str) -> bool:
+        return await asyncio.to_thread(self._exists, column, key)
+
+    def close(self):
+        self.conn.close()
+
+
+class UserRegistry:
+    """
+    Регистрация: проверка занятости -> хэш пароля в пуле процессов -> вставка.
+    Занятость сначала проверяется Bloom-фильтром: ключа нет в фильтре —
+    имя точно свободно, база не нужна; иначе решает индекс в SQLite.
+    Занятое имя отсекается до хэширования — самой дорогой части.
+    """
+
+    def __init__(self, store: UserStore | None = None, hasher: PasswordHasher | None = None,
+                 capacity: int = USERS_BLOOM_CAPACITY):
+        self.store = store or UserStore()
+        self.hasher = hasher or PasswordHasher()
+        self.filters = {column: BloomFilter(capacity) for column in ("username_key", "email_key")}
+        for column, bloom in self.filters.items():
+            for key in self.store.keys(column):
+                bloom.add(key)
+        # сколько проверок закрыл фильтр и сколько дошло до базы
+        self.bloom_negatives = 0
+        self.db_lookups = 0
+
+    async def _taken(self, column: str, value: str) -> bool:
+        key = normalize(value)
+        if key not in self.filters[column]:
+            self.bloom_negatives += 1
+            return False
+        self.db_lookups += 1
+        return await self.store.exists(column, key)
+
+    async def username_available(self, username: str) -> bool:
+        return not await self._taken("username_key", username)
+
+    async def register(self, user: UserRegister) -> int:
+        if await self._taken("username_key", user.username):
+            raise UserExists("Username")
+        if await self._taken("email_key", user.email):
+            raise UserExists("Email")
+        password_hash = await self.hasher.hash(user.password)
+        user_id = await self.store.create(user, password_hash)
+        self.filters["username_key"].add(normalize(user.username))
+        self.filters["email_key"].add(normalize(user.email))
+        return user_id
+
+    def close(self):
+        self.hasher.close()
+        self.store.close()
+
+
+_registry: UserRegistry | None = None
+
+
+def get_registry() -> UserRegistry:
+    # создаётся при первом запросе: TestClient без lifespan тоже его получает
+    global _registry
+    if _registry is None:
+        _registry = UserRegistry()
+    return _registry
+
+
+def close_registry():
+    global _registry
+    if _registry is not None:
+        _registry.close()
+        _registry = None
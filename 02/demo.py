@@ -3,37 +3,37 @@ import requests
 BASE_URL = "http://127.0.0.1:8000/auth/register"
 
 def test_success():
-    data = {"username": "alice", "email": "alice@example.com", "age": 25}
+    data = {"username": "alice", "email": "alice@example.com", "age": 25, "password": "s3cret-pass"}
     r = requests.post(BASE_URL, json=data)
     print("✅ Success case:")
     print(r.status_code, r.json())
 
 def test_underage():
-    data = {"username": "bob", "email": "bob@example.com", "age": 15}
+    data = {"username": "bob", "email": "bob@example.com", "age": 15, "password": "s3cret-pass"}
     r = requests.post(BASE_URL, json=data)
     print("\n❌ Underage case:")
     print(r.status_code, r.json())
 
 def test_invalid_user():
-    data = {"username": 1234567, "email": "bob@example.com", "age": 35}
+    data = {"username": 1234567, "email": "bob@example.com", "age": 35, "password": "s3cret-pass"}
     r = requests.post(BASE_URL, json=data)
     print("\n❌ Invalid user case:")
     print(r.status_code, r.json())
 
 def test_invalid_email():
-    data = {"username": "bob", "email": "bobexample.com", "age": 35}
+    data = {"username": "bob", "email": "bobexample.com", "age": 35, "password": "s3cret-pass"}
     r = requests.post(BASE_URL, json=data)
     print("\n❌ Invalid email case:")
     print(r.status_code, r.json())
 
 def test_admin():
-    data = {"username": "admin", "email": "admin@example.com", "age": 30}
+    data = {"username": "admin", "email": "admin@example.com", "age": 30, "password": "s3cret-pass"}
     r = requests.post(BASE_URL, json=data)
     print("\n❌ Forbidden username case:")
     print(r.status_code, r.json())
 
 def test_invalid_json():
-    data = {"nouser": "bob", "email": "bob@example.com", "age": 35}
+    data = {"nouser": "bob", "email": "bob@example.com", "age": 35, "password": "s3cret-pass"}
     r = requests.post(BASE_URL, json=data)
     print("\n❌ Invalid json case:")
     print(r.status_code, r.json())
@@ -0,0 +1,94 @@
+"""
+Нагрузочный тест /auth/register: регистраций в секунду при разном числе
+процессов в пуле хэширования (1, 2, 4 ... до числа ядер). Запросы идут в
+приложение в этом же процессе через httpx.ASGITransport; на каждый прогон —
+чистая база в памяти и свой пул. Пока пароли хэшируются, event loop свободен:
+задержка GET /auth/username-available под нагрузкой печатается отдельно.
+
+Запуск:
+    python loadtest.py --users 400 --concurrency 64
+    python loadtest.py --workers 1,2,4,8
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+from app.hashing import HAS_BCRYPT, PasswordHasher
+from app.main import app
+from app.users import UserRegistry, UserStore, get_registry
+
+
+async def run(workers: int, users: int, concurrency: int) -> tuple[float, float, int]:
+    registry = UserRegistry(UserStore(":memory:"), PasswordHasher(workers=workers), capacity=max(users, 1000))
+    app.dependency_overrides[get_registry] = lambda: registry
+    # процессы пула стартуют заранее, чтобы не попасть в замер
+    await asyncio.gather(*(registry.hasher.hash("warm-up-pass") for _ in range(workers)))
+
+    transport = httpx.ASGITransport(app=app)
+    slots = asyncio.Semaphore(concurrency)
+    failed = 0
+    probes: list[float] = []
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async def register(i: int):
+            nonlocal failed
+            async with slots:
+                response = await client.post("/auth/register", json={
+                    "username": f"user{i}", "email": f"user{i}@example.com", "age": 30, "password": f"pass-{i:08d}",
+                })
+                failed += response.status_code != 200
+
+        async def probe():
+            # проверка имени не ждёт хэширования — её задержка показывает, что loop не занят
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/auth/username-available", params={"username": "somebody"})
+                probes.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+
+        prober = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(register(i) for i in range(users)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await prober
+
+    app.dependency_overrides.clear()
+    registry.close()
+    probes.sort()
+    p95 = probes[int(0.95 * (len(probes) - 1))] if probes else 0.0
+    return users / elapsed, p95, failed
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Registrations/sec vs hashing pool size")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--workers", default="", help="размеры пула через запятую; по умолчанию 1, 2, 4 ... до числа ядер")
+    args = parser.parse_args()
+
+    sizes = [int(n) for n in args.workers.split(",") if n]
+    if not sizes:
+        sizes = [1]
+        while sizes[-1] * 2 <= cores:
+            sizes.append(sizes[-1] * 2)
+        if sizes[-1] != cores:
+            sizes.append(cores)
+
+    print(f"ядер: {cores}; хэш: {'bcrypt' if HAS_BCRYPT else 'scrypt'}; {args.users} регистраций, {args.concurrency} параллельно")
+    print(f"{'процессов':>9} | {'рег/с':>8} | {'ускорение':>9} | {'p95 проверки имени, мс':>22} | ошибок")
+    base = None
+    for workers in sizes:
+        rate, p95, failed = asyncio.run(run(workers, args.users, args.concurrency))
+        base = base or rate
+        print(f"{workers:>9} | {rate:>8.1f} | {rate / base:>8.2f}x | {p95 * 1000:>22.1f} | {failed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,8 @@ def test_success_registration():
     response = client.post("/auth/register", json={
         "username": "alice",
         "email": "alice@example.com",
-        "age": 25
+        "age": 25,
+        "password": "s3cret-pass"
     })
     assert response.status_code == 200
     data = response.json()
@@ -20,7 +21,8 @@ def test_underage_registration():
     response = client.post("/auth/register", json={
         "username": "bob",
         "email": "bob@example.com",
-        "age": 15
+        "age": 15,
+        "password": "s3cret-pass"
     })
     assert response.status_code == 400
     assert response.json()["detail"] == "You must be at least 18 years old"
@@ -29,7 +31,39 @@ def test_forbidden_username():
     response = client.post("/auth/register", json={
         "username": "admin",
         "email": "admin@example.com",
-        "age": 30
+        "age": 30,
+        "password": "s3cret-pass"
     })
     assert response.status_code == 400
     assert response.json()["detail"] == "Username 'admin' is not allowed"
+
+def test_duplicate_username_and_email_case_insensitive():
+    payload = {"username": "Carol", "email": "Carol@Example.com", "age": 30, "password": "s3cret-pass"}
+    assert client.post("/auth/register", json=payload).status_code == 200
+
+    response = client.post("/auth/register", json={**payload, "username": "CAROL", "email": "other@example.com"})
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Username is already taken"
+
+    response = client.post("/auth/register", json={**payload, "username": "carol2", "email": "carol@example.COM"})
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Email is already taken"
+
+def test_username_available():
+    client.post("/auth/register", json={
+        "username": "dave",
+        "email": "dave@example.com",
+        "age": 40,
+        "password": "s3cret-pass"
+    })
+    assert client.get("/auth/username-available", params={"username": "Dave"}).json()["available"] is False
+    assert client.get("/auth/username-available", params={"username": "erin"}).json()["available"] is True
+
+def test_short_password():
+    response = client.post("/auth/register", json={
+        "username": "frank",
+        "email": "frank@example.com",
+        "age": 30,
+        "password": "short"
+    })
+    assert response.status_code == 422
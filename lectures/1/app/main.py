@@ -1,16 +1,25 @@
 # app/main.py
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 import uvicorn
 from .routes import examples, examples2, vacancy
 from dotenv import load_dotenv
 import os
+from .services.llm import llm_provider
 
 # Загружаем переменные окружения из .env
 load_dotenv()
     
+# Общий LLM клиент создаётся при старте и закрывается при остановке
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    llm_provider.client
+    yield
+    await llm_provider.aclose()
+
 # Создаём FastAPI приложение
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 @app.get("/")
 def read_root():
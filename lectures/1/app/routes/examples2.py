@@ -1,7 +1,8 @@
 # app/routes/examples2.py
 
-from fastapi import APIRouter, Path, Query, Body, Form, Header, Cookie, WebSocket
+from fastapi import APIRouter, Path, Query, Body, Form, Header, Cookie, WebSocket, Depends
 from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse
+from ..services.codec import DICT_ADAPTER, DICT_LIST_ADAPTER, FastJSONResponse, body_openapi, json_body
 
 router = APIRouter()
 
@@ -36,9 +37,10 @@ def get_order(order_id: str = Path(..., regex="^[0-9]+$", description="ID зак
 # 5️⃣ POST с словарём в body
 # Body — данные POST запроса, передаются как JSON
 # Возвращает присланные данные обратно
-@router.post("/echo")
-def echo(data: dict = Body(..., description="Любые данные в формате JSON")):
-    return {"you_sent": data}
+# Тело проверяется pydantic-core прямо из байтов, ответ — через orjson (services/codec.py)
+@router.post("/echo", openapi_extra=body_openapi(DICT_ADAPTER))
+def echo(data: dict = Depends(json_body(DICT_ADAPTER))):
+    return FastJSONResponse({"you_sent": data})
 
 # 6️⃣ POST, возвращаем текст
 # Пример возврата PlainTextResponse
@@ -95,9 +97,10 @@ def get_tags(tags: list[str] = Query([], description="Список тегов"))
 
 # 1️⃣3️⃣ POST с массивом словарей
 # Принимаем список объектов и возвращаем количество и сами объекты
-@router.post("/bulk")
-def bulk_create(items: list[dict] = Body(..., description="Список объектов")):
-    return {"count": len(items), "items": items}
+# Большие списки: один проход validate_json вместо json.loads + проверки, ответ мимо jsonable_encoder
+@router.post("/bulk", openapi_extra=body_openapi(DICT_LIST_ADAPTER))
+def bulk_create(items: list[dict] = Depends(json_body(DICT_LIST_ADAPTER))):
+    return FastJSONResponse({"count": len(items), "items": items})
 
 # 1️⃣4️⃣ GET с заголовком
 # Чтение значения заголовка X-Token
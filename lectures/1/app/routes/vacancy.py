@@ -1,11 +1,16 @@
 # app/routes/vacancy.py
 
-from fastapi import APIRouter, Body
+from fastapi import APIRouter, Body, Depends
+from openai import AsyncOpenAI
+from app.services.llm import get_llm_client
 from app.services.vacancy import generate_vacancy_description
 
 router = APIRouter()
 
 @router.post("/generate")
-async def generate(vacancy_data: dict[str, str] = Body(...)):
-    description = await generate_vacancy_description(vacancy_data)
+async def generate(
+    vacancy_data: dict[str, str] = Body(...),
+    client: AsyncOpenAI = Depends(get_llm_client)
+):
+    description = await generate_vacancy_description(vacancy_data, client)
     return {"vacancy_description": description}
\ No newline at end of file
@@ -0,0 +1,51 @@
+# app/services/codec.py
+
+import importlib.util
+import json
+from typing import Any
+
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter, ValidationError
+
+# orjson необязателен: без него — обычный json
+HAS_ORJSON = importlib.util.find_spec("orjson") is not None
+
+if HAS_ORJSON:
+    import orjson
+
+# валидаторы тел строятся один раз при импорте, а не на каждый запрос
+DICT_ADAPTER = TypeAdapter(dict)
+DICT_LIST_ADAPTER = TypeAdapter(list[dict])
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON-ответ через orjson (если установлен). Возвращённый из обработчика
+    напрямую, он обходит jsonable_encoder — на больших списках это основное время.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if HAS_ORJSON:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_body(adapter: TypeAdapter):
+    """Зависимость: тело разбирается и проверяется adapter.validate_json за один проход (pydantic-core)."""
+
+    async def dependency(request: Request):
+        body = await request.body()
+        try:
+            return adapter.validate_json(body)
+        except ValidationError as e:
+            errors = [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+            raise RequestValidationError(errors, body=body)
+
+    return dependency
+
+
+def body_openapi(adapter: TypeAdapter) -> dict:
+    """Схема тела для документации роута с json_body."""
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": adapter.json_schema()}}}}
@@ -1,9 +1,8 @@
 # app/services/vacancy.py
 
 from openai import AsyncOpenAI
-import os
 
-async def generate_vacancy_description(vacancy_data: dict, system_path: str = "base/system_vacancy.md"):
+async def generate_vacancy_description(vacancy_data: dict, client: AsyncOpenAI, system_path: str = "base/system_vacancy.md"):
     
     # читаем system роль
     with open(system_path, "r", encoding="utf-8") as f:
@@ -17,11 +16,7 @@ async def generate_vacancy_description(vacancy_data: dict, system_path: str = "b
         {"role": "user", "content": f"Сделай описание вакансии со следующими параметрами:\n{user_content}"}
     ]
 
-    # создаём клиента AsyncOpenAI
-    api_key = os.getenv("OPENAI_API_KEY")
-    client = AsyncOpenAI(api_key=api_key)
-
-    # делаем запрос
+    # делаем запрос через общий клиент приложения
     response = await client.chat.completions.create(
         model="gpt-4o-mini",
         messages=messages,
@@ -1,17 +1,30 @@
 # app/main.py
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import JSONResponse
 import uvicorn
 from .routes import examples, vacancy, auth
 from dotenv import load_dotenv
 import os
+from .services.llm import llm_provider
+from .services.prompts import prompt_store
 
 # Загружаем переменные окружения из .env
 load_dotenv()
     
+# Общий LLM клиент создаётся при старте и закрывается при остановке,
+# там же запускается проверка изменений файлов промптов
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    llm_provider.client
+    prompt_store.start()
+    yield
+    await prompt_store.stop()
+    await llm_provider.aclose()
+
 # Создаём FastAPI приложение
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 @app.get("/")
 def read_root():
@@ -1,22 +1,71 @@
 # app/routes/vacancy.py
 
-from fastapi import APIRouter, Body
-from app.services.vacancy import generate_vacancy_description, evaluate_resume
+import json
+from fastapi import APIRouter, Body, Depends, Request
+from fastapi.responses import StreamingResponse
+from openai import AsyncOpenAI
+from app.services.llm import get_llm_client
+from app.services.vacancy import (
+    generate_vacancy_description,
+    evaluate_resume,
+    build_generate_messages,
+    build_evaluate_messages,
+    stream_completion,
+)
 
 router = APIRouter()
 
 @router.post("/generate")
-async def generate(vacancy_data: dict[str, str] = Body(...)):
-    description = await generate_vacancy_description(vacancy_data)
+async def generate(
+    vacancy_data: dict[str, str] = Body(...),
+    client: AsyncOpenAI = Depends(get_llm_client)
+):
+    description = await generate_vacancy_description(vacancy_data, client)
     return {"vacancy_description": description}
 
 @router.post("/evaluate")
 async def evaluate(
     vacancy: str = Body(..., embed=True),
-    resume: str = Body(..., embed=True)
+    resume: str = Body(..., embed=True),
+    client: AsyncOpenAI = Depends(get_llm_client)
 ):
     """
     Сравнение резюме с вакансией.
     """
-    result = await evaluate_resume(vacancy, resume)
-    return {"evaluation": result}
\ No newline at end of file
+    result = await evaluate_resume(vacancy, resume, client)
+    return {"evaluation": result}
+
+# Потоковые варианты: токены приходят как Server-Sent Events
+async def sse_events(request: Request, tokens):
+    try:
+        async for token in tokens:
+            # клиент ушёл — прекращаем генерацию
+            if await request.is_disconnected():
+                break
+            yield f"data: {json.dumps({'token': token}, ensure_ascii=False)}\n\n"
+        else:
+            yield "event: done\ndata: {}\n\n"
+    finally:
+        await tokens.aclose()
+
+@router.post("/generate/stream")
+async def generate_stream(
+    request: Request,
+    vacancy_data: dict[str, str] = Body(...),
+    client: AsyncOpenAI = Depends(get_llm_client)
+):
+    tokens = stream_completion(client, build_generate_messages(vacancy_data))
+    return StreamingResponse(sse_events(request, tokens), media_type="text/event-stream")
+
+@router.post("/evaluate/stream")
+async def evaluate_stream(
+    request: Request,
+    vacancy: str = Body(..., embed=True),
+    resume: str = Body(..., embed=True),
+    client: AsyncOpenAI = Depends(get_llm_client)
+):
+    """
+    Сравнение резюме с вакансией, ответ приходит по мере генерации.
+    """
+    tokens = stream_completion(client, build_evaluate_messages(vacancy, resume), "evaluate")
+    return StreamingResponse(sse_events(request, tokens), media_type="text/event-stream")
@@ -0,0 +1,48 @@
+# app/services/llm.py
+
+import importlib.util
+import os
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+
+class LLMClientProvider:
+    """
+    Один AsyncOpenAI клиент на всё приложение.
+    Соединения (и TLS-сессии) переиспользуются между запросами,
+    клиент закрывается при остановке приложения.
+    """
+
+    def __init__(self):
+        self.limits = httpx.Limits(
+            max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20")),
+            keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30")),
+        )
+        # HTTP/2 включаем только если установлен пакет h2 (pip install httpx[http2])
+        self.http2 = os.getenv("OPENAI_HTTP2", "1") == "1" and importlib.util.find_spec("h2") is not None
+        self._client: AsyncOpenAI | None = None
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        # создаём лениво, ключ берётся из .env, загруженного в main.py
+        if self._client is None:
+            self._client = AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                http_client=DefaultAsyncHttpxClient(limits=self.limits, http2=self.http2),
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+llm_provider = LLMClientProvider()
+
+
+def get_llm_client() -> AsyncOpenAI:
+    """Зависимость FastAPI: общий AsyncOpenAI клиент."""
+    return llm_provider.client
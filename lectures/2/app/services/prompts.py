@@ -0,0 +1,62 @@
+# app/services/prompts.py
+
+import asyncio
+import os
+from pathlib import Path
+
+# как часто проверять, не изменились ли файлы промптов (секунды; 0 — не проверять)
+PROMPTS_RELOAD_INTERVAL = float(os.getenv("PROMPTS_RELOAD_INTERVAL", "2"))
+
+
+class PromptStore:
+    """
+    Системные промпты (base/*.md) в памяти: файл читается при первом обращении,
+    дальше текст отдаётся из памяти. Изменения подхватываются фоновой проверкой
+    mtime — stat и чтение идут в отдельном потоке, event loop не блокируется.
+    Упрощённый вариант app/services/prompts.py из 01.
+    """
+
+    def __init__(self, reload_interval: float = PROMPTS_RELOAD_INTERVAL):
+        self.reload_interval = reload_interval
+        self._prompts: dict[str, tuple[int, str]] = {}
+        self._task: asyncio.Task | None = None
+
+    def _read(self, path: str) -> str:
+        mtime_ns = Path(path).stat().st_mtime_ns
+        text = Path(path).read_text(encoding="utf-8")
+        self._prompts[path] = (mtime_ns, text)
+        return text
+
+    def get(self, path: str) -> str:
+        cached = self._prompts.get(path)
+        return cached[1] if cached is not None else self._read(path)
+
+    def _scan(self):
+        for path, (mtime_ns, _) in list(self._prompts.items()):
+            if Path(path).stat().st_mtime_ns != mtime_ns:
+                self._read(path)
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await asyncio.to_thread(self._scan)
+            except OSError:
+                # файл могут переписывать прямо сейчас — попробуем в следующий раз
+                pass
+
+    def start(self):
+        if self.reload_interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+prompt_store = PromptStore()
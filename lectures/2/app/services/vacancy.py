@@ -1,13 +1,29 @@
 # app/services/vacancy.py
 
-from openai import AsyncOpenAI
+import logging
 import os
+import time
+from typing import AsyncIterator
+from openai import AsyncOpenAI
+from .prompts import prompt_store
+
+logger = logging.getLogger(__name__)
+
+# модель по виду вызова: LLM_ROUTES=«вид=модель» через запятую, остальное — LLM_DEFAULT_MODEL
+# (формат как в 01, где «вид=модель>модель» — каскад; здесь берётся первая модель маршрута)
+DEFAULT_MODEL = os.getenv("LLM_DEFAULT_MODEL", "gpt-4o-mini")
+ROUTES = {
+    kind: models.split(">")[0]
+    for kind, models in (item.split("=") for item in os.getenv("LLM_ROUTES", "").split(",") if item)
+}
+
+
+def model_for(kind: str) -> str:
+    return ROUTES.get(kind, DEFAULT_MODEL)
 
-async def generate_vacancy_description(vacancy_data: dict, system_path: str = "base/system_vacancy.md"):
-    
-    # читаем system роль
-    with open(system_path, "r", encoding="utf-8") as f:
-        system_content = f.read()
+def build_generate_messages(vacancy_data: dict, system_path: str = "base/system_vacancy.md") -> list[dict]:
+    # system роль — из памяти (файл перечитывается, только когда изменился)
+    system_content = prompt_store.get(system_path)
 
     # формируем user content
     user_content = "\n".join([f"{k}: {v}" for k, v in vacancy_data.items()])
@@ -16,29 +32,23 @@ async def generate_vacancy_description(vacancy_data: dict, system_path: str = "b
         {"role": "system", "content": system_content},
         {"role": "user", "content": f"Сделай описание вакансии со следующими параметрами:\n{user_content}"}
     ]
+    return messages
 
-    # создаём клиента AsyncOpenAI
-    api_key = os.getenv("OPENAI_API_KEY")
-    client = AsyncOpenAI(api_key=api_key)
+async def generate_vacancy_description(vacancy_data: dict, client: AsyncOpenAI, system_path: str = "base/system_vacancy.md"):
+    messages = build_generate_messages(vacancy_data, system_path)
 
-    # делаем запрос
+    # делаем запрос через общий клиент приложения
     response = await client.chat.completions.create(
-        model="gpt-4o-mini",
+        model=model_for("generate"),
         messages=messages,
         temperature=0.7
     )
 
     return response.choices[0].message.content
 
-async def evaluate_resume(vacancy_text: str, resume_text: str, system_path: str = "base/system_evaluate.md"):
-    """
-    Сравнивает резюме и вакансию по заданному промпту.
-    Возвращает структурированный отчет.
-    """
-
-    # читаем system-промпт
-    with open(system_path, "r", encoding="utf-8") as f:
-        system_content = f.read()
+def build_evaluate_messages(vacancy_text: str, resume_text: str, system_path: str = "base/system_evaluate.md") -> list[dict]:
+    # system-промпт — из памяти (файл перечитывается, только когда изменился)
+    system_content = prompt_store.get(system_path)
 
     # формируем user-промпт
     user_content = (
@@ -51,16 +61,44 @@ async def evaluate_resume(vacancy_text: str, resume_text: str, system_path: str
         {"role": "system", "content": system_content},
         {"role": "user", "content": user_content}
     ]
+    return messages
 
-    # клиент OpenAI
-    api_key = os.getenv("OPENAI_API_KEY")
-    client = AsyncOpenAI(api_key=api_key)
+async def evaluate_resume(vacancy_text: str, resume_text: str, client: AsyncOpenAI, system_path: str = "base/system_evaluate.md"):
+    """
+    Сравнивает резюме и вакансию по заданному промпту.
+    Возвращает структурированный отчет.
+    """
+    messages = build_evaluate_messages(vacancy_text, resume_text, system_path)
 
-    # делаем запрос
+    # делаем запрос через общий клиент приложения
     response = await client.chat.completions.create(
-        model="gpt-4o-mini",
+        model=model_for("evaluate"),
         messages=messages,
         temperature=0.7
     )
 
-    return response.choices[0].message.content
\ No newline at end of file
+    return response.choices[0].message.content
+
+async def stream_completion(client: AsyncOpenAI, messages: list[dict], kind: str = "generate") -> AsyncIterator[str]:
+    """
+    Потоковый вариант запроса: токены отдаются по мере генерации.
+    Если клиент отключился, поток к OpenAI закрывается — лишние токены не оплачиваем.
+    """
+    started = time.perf_counter()
+    stream = await client.chat.completions.create(
+        model=model_for(kind),
+        messages=messages,
+        temperature=0.7,
+        stream=True
+    )
+    first_token = True
+    try:
+        async for chunk in stream:
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            if first_token:
+                logger.info("TTFB %s: %.0f ms", kind, (time.perf_counter() - started) * 1000)
+                first_token = False
+            yield chunk.choices[0].delta.content
+    finally:
+        await stream.close()